@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Cold-start benchmark: launches fresh interpreters and measures the time until
+# the login dialog is on screen, and until the main window has rendered its
+# dashboard. Exits non-zero when the median time to the login dialog misses
+# the target.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in each child process, with the working directory holding the database
+DRIVER = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo_root!r})
+import job_marketplace
+imported = time.perf_counter()
+
+app = job_marketplace.QApplication(sys.argv)
+app.setStyle('Fusion')
+db_manager = job_marketplace.DatabaseManager()
+login_dialog = job_marketplace.LoginDialog(db_manager)
+login_dialog.show()
+app.processEvents()
+login_shown = time.perf_counter()
+login_dialog.close()
+
+db_manager.cursor.execute("SELECT id, user_type, name, email FROM users WHERE user_type = ? LIMIT 1",
+                          ({user_type!r},))
+user_id, user_type, name, email = db_manager.cursor.fetchone()
+window = job_marketplace.JobMarketplaceApp(
+    db_manager, {{'id': user_id, 'user_type': user_type, 'name': name, 'email': email}})
+window.show()
+app.processEvents()
+window_shown = time.perf_counter()
+
+print(json.dumps({{
+    'import': imported - start,
+    'login_dialog': login_shown - start,
+    'main_window': window_shown - login_shown,
+}}))
+'''
+
+
+def seed_database(directory, jobs):
+    sys.path.insert(0, REPO_ROOT)
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        from job_marketplace_db import DatabaseManager
+        db_manager = DatabaseManager()
+        db_manager.register_user('bench_provider', 'x', 'provider', 'Bench Provider', 'provider@example.com')
+        db_manager.register_user('bench_seeker', 'x', 'seeker', 'Bench Seeker', 'seeker@example.com')
+        provider_id = db_manager.authenticate_user('bench_provider', 'x')['id']
+        for i in range(jobs):
+            db_manager.post_job(provider_id, f"Job {i}", f"Company {i % 50}", 40000 + i % 100 * 1000,
+                                "Full-time", "Benchmark listing")
+        db_manager.close()
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job Marketplace cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=2000, help="jobs to seed the database with")
+    parser.add_argument('--user-type', choices=['provider', 'seeker'], default='seeker')
+    parser.add_argument('--target-ms', type=float, default=1000,
+                        help="budget for the median time from interpreter start to login dialog")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    driver = DRIVER.format(repo_root=REPO_ROOT, user_type=args.user_type)
+
+    with tempfile.TemporaryDirectory() as directory:
+        seed_database(directory, args.jobs)
+        # Warm the OS file cache once so runs compare like with like
+        subprocess.run([sys.executable, '-c', driver], cwd=directory, env=env, capture_output=True, check=True)
+
+        runs = []
+        for _ in range(args.runs):
+            work = tempfile.mkdtemp(dir=directory)
+            for name in os.listdir(directory):
+                if name.endswith('.db'):
+                    shutil.copy(os.path.join(directory, name), work)
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, '-c', driver], cwd=work, env=env,
+                                    capture_output=True, text=True, check=True)
+            total = time.perf_counter() - start
+            timings = json.loads(result.stdout.strip().splitlines()[-1])
+            # Charge the time the child cannot see (interpreter startup and
+            # shutdown) to reaching the login dialog, erring on the slow side
+            interpreter = total - timings['login_dialog'] - timings['main_window']
+            timings['login_dialog'] += interpreter
+            runs.append(timings)
+
+    print(f"{args.runs} runs, {args.jobs} jobs, {args.user_type}")
+    for phase in ('import', 'login_dialog', 'main_window'):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<14} median {statistics.median(values):8.1f}ms   max {max(values):8.1f}ms")
+
+    login_median = statistics.median(run['login_dialog'] * 1000 for run in runs)
+    if login_median > args.target_ms:
+        print(f"FAIL: login dialog median {login_median:.1f}ms exceeds target {args.target_ms:.0f}ms")
+        sys.exit(1)
+    print(f"OK: login dialog median {login_median:.1f}ms within target {args.target_ms:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Multi-process load test: N worker processes, each with its own DatabaseManager
+# (as N running copies of the app would have), drive a weighted mix of logins
+# (session token checks; the password is verified once per worker), job
+# searches, applications and status updates against one database file.
+# Every combination of journal mode, worker count, busy timeout and read mode is
+# run on a fresh copy of the same seeded database, and reported as throughput,
+# latency percentiles, time spent waiting on locks and "database is locked"
+# failures.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from job_marketplace_auth import hash_password  # noqa: E402
+from job_marketplace_db import DatabaseManager  # noqa: E402
+
+DEFAULT_MIX = 'authenticate=15,search=55,apply=20,status=10'
+JOB_TYPES = ['Full-time', 'Part-time', 'Contract', 'Internship']
+TITLE_WORDS = ['Engineer', 'Analyst', 'Designer', 'Manager', 'Developer', 'Consultant']
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        if name not in ('authenticate', 'search', 'apply', 'status'):
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}'")
+        mix[name] = float(weight)
+    return mix
+
+
+def seed_database(directory, seekers, jobs, applications):
+    db_manager = DatabaseManager(os.path.join(directory, 'job_marketplace.db'),
+                                 os.path.join(directory, 'job_marketplace_archive.db'))
+    # One password hash for everyone: each hash_password takes ~0.1 s
+    password_hash = hash_password('x')
+    db_manager.add_user('load_provider', password_hash, 'provider', 'Load Provider', 'provider@example.com')
+    for i in range(seekers):
+        db_manager.add_user(f'load_seeker_{i}', password_hash, 'seeker', f'Load Seeker {i}', f'seeker{i}@example.com')
+    provider_id = db_manager.authenticate_user('load_provider', 'x')['id']
+
+    random.seed(0)
+    db_manager.import_jobs(({
+        'title': f"{random.choice(TITLE_WORDS)} {i}",
+        'company': f"Company {i % 200}",
+        'salary': str(30000 + random.randrange(120) * 1000),
+        'type': random.choice(JOB_TYPES),
+        'description': "Load test listing",
+    } for i in range(jobs)), provider_id)
+
+    seeker_ids = [row[0] for row in db_manager.cursor.execute(
+        "SELECT id FROM users WHERE user_type = 'seeker' ORDER BY id")]
+    job_ids = [row[0] for row in db_manager.cursor.execute("SELECT id FROM jobs")]
+    for seeker_id in seeker_ids:
+        db_manager.apply_for_jobs(random.sample(job_ids, min(applications, len(job_ids))), seeker_id, "Seeded")
+    db_manager.close()
+
+
+def timed_call(db_manager, operation, busy_timeout):
+    # Busy waits are done here rather than in SQLite's own busy handler so they
+    # can be timed: on "database is locked" the statement's transaction is rolled
+    # back and retried with backoff until busy_timeout has been spent waiting.
+    start = time.perf_counter()
+    first_busy = None
+    delay = 0.001
+    while True:
+        try:
+            operation()
+        except sqlite3.OperationalError as error:
+            if 'locked' not in str(error) and 'busy' not in str(error):
+                raise
+            db_manager.conn.rollback()
+            now = time.perf_counter()
+            if first_busy is None:
+                first_busy = now
+            if now - first_busy >= busy_timeout:
+                return now - start, now - first_busy, True
+            time.sleep(min(delay, busy_timeout - (now - first_busy)))
+            delay = min(delay * 2, 0.05)
+            continue
+        end = time.perf_counter()
+        return end - start, 0.0 if first_busy is None else end - first_busy, False
+
+
+def run_worker(worker, directory, config, mix, duration, barrier, results):
+    rng = random.Random(worker)
+    db_manager = DatabaseManager(os.path.join(directory, 'job_marketplace.db'),
+                                 os.path.join(directory, 'job_marketplace_archive.db'),
+                                 snapshot=config['reads'] == 'snapshot')
+    db_manager.cursor.execute("PRAGMA busy_timeout = 0")
+    db_manager.cursor.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+
+    username = f'load_seeker_{worker}'
+    seeker_id = db_manager.authenticate_user(username, 'x')['id']
+    token = db_manager.create_session(seeker_id)
+    job_ids = [row[0] for row in db_manager.cursor.execute("SELECT id FROM jobs")]
+    application_ids = [row[0] for row in db_manager.cursor.execute("SELECT id FROM applications")]
+
+    def search():
+        filters = {'job_type': rng.choice(JOB_TYPES)}
+        if rng.random() < 0.5:
+            filters['title'] = rng.choice(TITLE_WORDS)
+        if rng.random() < 0.5:
+            filters['min_salary'] = rng.randrange(30, 140) * 1000
+        db_manager.get_jobs(filters)
+
+    operations = {
+        'authenticate': lambda: db_manager.authenticate_session(token),
+        'search': search,
+        'apply': lambda: db_manager.apply_for_job(rng.choice(job_ids), seeker_id, "Load test"),
+        'status': lambda: db_manager.update_application_status(
+            rng.choice(application_ids), rng.choice(['Reviewing', 'Accepted', 'Rejected'])),
+    }
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    samples = []
+    barrier.wait()
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        name = rng.choices(names, weights)[0]
+        latency, lock_wait, failed = timed_call(db_manager, operations[name], config['busy_timeout'])
+        samples.append((name, latency, lock_wait, failed))
+    db_manager.close()
+    results.put(samples)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    latencies = sorted(latency for _, latency, _, failed in samples if not failed)
+    summary = {
+        'operations': len(samples),
+        'throughput': len(latencies) / duration,
+        'lock_wait_seconds': sum(lock_wait for _, _, lock_wait, _ in samples),
+        'waited_operations': sum(1 for _, _, lock_wait, _ in samples if lock_wait),
+        'locked_failures': sum(1 for _, _, _, failed in samples if failed),
+    }
+    for p in PERCENTILES:
+        value = percentile(latencies, p)
+        summary[f'p{p}_ms'] = None if value is None else value * 1000
+    return summary
+
+
+def run_config(template, config, mix, duration):
+    directory = tempfile.mkdtemp(dir=template)
+    for name in os.listdir(template):
+        if name.endswith('.db'):
+            shutil.copy(os.path.join(template, name), directory)
+    conn = sqlite3.connect(os.path.join(directory, 'job_marketplace.db'))
+    # WAL is a property of the file and has to be set before the workers open it;
+    # the rollback-journal modes are per connection and set again by each worker
+    conn.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+    conn.close()
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(config['workers'])
+    results = context.Queue()
+    processes = [context.Process(target=run_worker, args=(worker, directory, config, mix, duration, barrier, results))
+                 for worker in range(config['workers'])]
+    for process in processes:
+        process.start()
+    samples = []
+    for _ in processes:
+        samples.extend(results.get())
+    for process in processes:
+        process.join()
+    shutil.rmtree(directory)
+
+    by_operation = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+    return dict(config, **summarize(samples, duration),
+                by_operation={name: summarize(values, duration) for name, values in sorted(by_operation.items())})
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def config_label(result):
+    return (f"{result['journal_mode']}/{result['workers']}w/"
+            f"{result['busy_timeout'] * 1000:.0f}ms/{result['reads']}")
+
+
+def print_header():
+    print(f"{'configuration':<28}{'ops/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'lock wait':>11}{'locked':>8}")
+
+
+def print_result(result):
+    print(f"{config_label(result):<28}{result['throughput']:>9.0f}"
+          f"{format_ms(result['p50_ms']):>8}{format_ms(result['p95_ms']):>8}{format_ms(result['p99_ms']):>8}"
+          f"{result['lock_wait_seconds']:>10.2f}s{result['locked_failures']:>8}", flush=True)
+
+
+def write_html(path, results, settings):
+    rows = []
+    for result in results:
+        for name, summary in [('all', result)] + list(result['by_operation'].items()):
+            rows.append(
+                "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in (
+                    config_label(result) if name == 'all' else "", name, summary['operations'],
+                    f"{summary['throughput']:.0f}", format_ms(summary['p50_ms']), format_ms(summary['p95_ms']),
+                    format_ms(summary['p99_ms']), f"{summary['lock_wait_seconds']:.2f}",
+                    summary['waited_operations'], summary['locked_failures'],
+                )) + "</tr>"
+            )
+    headers = ["configuration", "operation", "operations", "ops/s", "p50 ms", "p95 ms", "p99 ms",
+               "lock wait s", "waited", "locked failures"]
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Job Marketplace load test</title>"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}</style></head><body>\n"
+            "<h1>Job Marketplace load test</h1>\n"
+            f"<p>{html.escape(json.dumps(settings))}</p>\n"
+            "<table><tr>" + "".join(f"<th>{header}</th>" for header in headers) + "</tr>\n"
+            + "\n".join(rows) + "\n</table></body></html>\n"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job Marketplace multi-process load test")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--journal-modes', nargs='+', default=['delete', 'wal'])
+    parser.add_argument('--busy-timeouts', type=float, nargs='+', default=[5.0],
+                        help="seconds an operation may wait on locks before it counts as failed")
+    parser.add_argument('--reads', nargs='+', choices=['file', 'snapshot'], default=['file'],
+                        help="serve reads from the file or from an in-memory snapshot")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per configuration")
+    parser.add_argument('--jobs', type=int, default=2000, help="jobs to seed the database with")
+    parser.add_argument('--applications', type=int, default=20, help="seeded applications per seeker")
+    parser.add_argument('--json', help="write the results as JSON to this path")
+    parser.add_argument('--html', help="write an HTML report to this path")
+    args = parser.parse_args()
+
+    settings = {'mix': args.mix, 'duration': args.duration, 'jobs': args.jobs, 'applications': args.applications}
+    results = []
+    print_header()
+    with tempfile.TemporaryDirectory() as template:
+        seed_database(template, max(args.workers), args.jobs, args.applications)
+        for journal_mode, workers, busy_timeout, reads in itertools.product(
+                args.journal_modes, args.workers, args.busy_timeouts, args.reads):
+            config = {'journal_mode': journal_mode, 'workers': workers, 'busy_timeout': busy_timeout, 'reads': reads}
+            results.append(run_config(template, config, args.mix, args.duration))
+            print_result(results[-1])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as report:
+            json.dump({'settings': settings, 'results': results}, report, indent=2)
+    if args.html:
+        write_html(args.html, results, settings)
+
+
+if __name__ == '__main__':
+    main()
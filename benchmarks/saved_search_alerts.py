@@ -0,0 +1,120 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Cost of matching newly posted jobs against saved searches, through the reverse
+# index (notify_saved_searches) and by checking every saved search, as a plain
+# loop over them would. Searches are a mix of keyword, location, salary band and
+# job type filters over a synthetic vocabulary.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from job_marketplace_db import SAVED_SEARCH_FIELDS, DatabaseManager, saved_search_term  # noqa: E402
+
+JOB_TYPES = ['Full-time', 'Part-time', 'Contract', 'Internship']
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+# The same filters and inserts as notify_saved_searches, over every saved search
+SCAN_QUERY = """
+INSERT OR IGNORE INTO temp.scan_notifications
+SELECT s.seeker_id, s.id, :job_id, :created_date FROM saved_searches s
+WHERE (s.title IS NULL OR :title LIKE '%' || s.title || '%')
+  AND (s.company IS NULL OR :company LIKE '%' || s.company || '%')
+  AND (s.job_type IS NULL OR s.job_type = :job_type)
+  AND (s.category IS NULL OR s.category = :category)
+  AND (s.location IS NULL OR s.location = :location)
+  AND (s.min_salary IS NULL OR :salary_max >= s.min_salary)
+  AND (s.max_salary IS NULL OR :salary_min <= s.max_salary)
+"""
+
+
+def make_search(rng, words, locations):
+    filters = {}
+    kind = rng.random()
+    if kind < 0.65:
+        filters['title'] = rng.choice(words)
+    elif kind < 0.9:
+        filters['location'] = rng.choice(locations)
+    else:
+        filters['min_salary'] = rng.randrange(20, 200) * 1000
+        filters['max_salary'] = filters['min_salary'] + rng.randrange(5, 30) * 1000
+    if rng.random() < 0.5:
+        filters['job_type'] = rng.choice(JOB_TYPES)
+    return filters
+
+
+def seed_searches(db_manager, count, rng, words, locations):
+    # Raw INSERTs: save_search commits per search
+    db_manager.register_user('bench_seeker', 'x', 'seeker', 'Bench Seeker', 'seeker@example.com')
+    seeker_id = db_manager.authenticate_user('bench_seeker', 'x')['id']
+    columns = ", ".join(SAVED_SEARCH_FIELDS)
+    placeholders = ", ".join('?' * len(SAVED_SEARCH_FIELDS))
+    for i in range(count):
+        filters = make_search(rng, words, locations)
+        term = saved_search_term(filters)
+        db_manager.cursor.execute(
+            f"INSERT INTO saved_searches (seeker_id, name, {columns}, term) VALUES (?, ?, {placeholders}, ?)",
+            [seeker_id, f"search {i}"] + [filters.get(field) for field in SAVED_SEARCH_FIELDS] + [term]
+        )
+        if term is None:
+            db_manager.cursor.execute("INSERT INTO saved_searches_salary_rtree VALUES (?, ?, ?)",
+                                      (db_manager.cursor.lastrowid, filters['min_salary'], filters['max_salary']))
+    db_manager.conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Saved search alert matching cost")
+    parser.add_argument('--searches', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--jobs', type=int, default=200, help="jobs posted per size")
+    parser.add_argument('--words', type=int, default=2000, help="title vocabulary size")
+    args = parser.parse_args()
+
+    print(f"{'searches':>10}{'alerts/job':>12}{'index ms/job':>14}{'scan ms/job':>13}")
+    for count in args.searches:
+        rng = random.Random(42)
+        words = [''.join(rng.choice(LETTERS) for _ in range(7)) for _ in range(args.words)]
+        locations = [f"City {i}" for i in range(200)]
+        with tempfile.TemporaryDirectory() as directory:
+            db_manager = DatabaseManager(os.path.join(directory, 'job_marketplace.db'),
+                                         os.path.join(directory, 'job_marketplace_archive.db'))
+            seed_searches(db_manager, count, rng, words, locations)
+            jobs = [{
+                'job_id': None, 'created_date': 0, 'title': f"{rng.choice(words)} {rng.choice(words)}",
+                'company': f"Company {i % 50}", 'job_type': rng.choice(JOB_TYPES), 'category': None,
+                'location': rng.choice(locations), 'salary_min': rng.randrange(30, 150) * 1000,
+            } for i in range(args.jobs)]
+            for job in jobs:
+                job['salary_max'] = job['salary_min']
+
+            # Notifications need real jobs
+            db_manager.register_user('bench_provider', 'x', 'provider', 'Bench Provider', 'provider@example.com')
+            provider_id = db_manager.authenticate_user('bench_provider', 'x')['id']
+            for i, job in enumerate(jobs):
+                db_manager.cursor.execute(
+                    "INSERT INTO jobs (provider_id, title, company, job_type, posted_date) VALUES (?, ?, ?, ?, 0)",
+                    (provider_id, job['title'], job['company'], job['job_type']))
+                job['job_id'] = db_manager.cursor.lastrowid
+
+            start = time.perf_counter()
+            alerts = sum(db_manager.notify_saved_searches(**job) for job in jobs)
+            indexed = (time.perf_counter() - start) / args.jobs
+            db_manager.conn.commit()
+
+            db_manager.cursor.execute(
+                "CREATE TEMP TABLE scan_notifications (seeker_id, search_id, job_id, created_date, "
+                "UNIQUE (search_id, job_id))")
+            start = time.perf_counter()
+            for job in jobs:
+                db_manager.cursor.execute(SCAN_QUERY, job)
+            scanned = (time.perf_counter() - start) / args.jobs
+            db_manager.close()
+
+        print(f"{count:>10,}{alerts / args.jobs:>12.1f}{indexed * 1000:>14.2f}{scanned * 1000:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Database size and read latency before and after compressing descriptions and
+# cover letters. The database is filled with uncompressed text, as one created
+# before compression existed would be, then migrated with
+# compress_text_columns and vacuumed.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from job_marketplace_db import DatabaseManager  # noqa: E402
+
+SENTENCES = [
+    "We are looking for a motivated {role} to join our growing {team} team.",
+    "You will work closely with product managers, designers and other engineers.",
+    "Responsibilities include designing, building and maintaining {thing}.",
+    "Strong communication skills and attention to detail are essential.",
+    "Experience with {skill} and {skill} is a plus.",
+    "We offer competitive salary, health insurance and flexible working hours.",
+    "The ideal candidate has {years} years of experience in a similar role.",
+    "This is a {kind} position based in our {city} office.",
+    "I am writing to express my interest in the {role} position at your company.",
+    "In my previous role I was responsible for {thing} and mentored junior colleagues.",
+    "I have hands-on experience with {skill}, {skill} and {skill}.",
+    "I would welcome the opportunity to discuss how I can contribute to your team.",
+    "Thank you for considering my application.",
+]
+WORDS = {
+    'role': ['software engineer', 'data analyst', 'product designer', 'project manager', 'sales associate'],
+    'team': ['platform', 'analytics', 'design', 'operations', 'customer success'],
+    'thing': ['internal tools', 'data pipelines', 'customer dashboards', 'reporting systems', 'mobile apps'],
+    'skill': ['Python', 'SQL', 'Excel', 'Figma', 'Kubernetes', 'React', 'Tableau', 'Java'],
+    'years': ['two', 'three', 'five', 'seven'],
+    'kind': ['full-time', 'part-time', 'contract', 'remote'],
+    'city': ['Bangalore', 'London', 'Berlin', 'New York', 'Singapore'],
+}
+
+
+def make_text(rng, sentences):
+    text = " ".join(rng.choice(SENTENCES) for _ in range(sentences))
+    while '{' in text:
+        start = text.index('{')
+        end = text.index('}', start)
+        text = text[:start] + rng.choice(WORDS[text[start + 1:end]]) + text[end + 1:]
+    return text
+
+
+def seed_database(db_manager, jobs, applications, rng):
+    db_manager.register_user('bench_provider', 'x', 'provider', 'Bench Provider', 'provider@example.com')
+    db_manager.register_user('bench_seeker', 'x', 'seeker', 'Bench Seeker', 'seeker@example.com')
+    provider_id = db_manager.authenticate_user('bench_provider', 'x')['id']
+    now = int(time.time())
+    # Raw INSERTs: post_job and apply_for_job would already compress
+    db_manager.cursor.executemany(
+        "INSERT INTO jobs (provider_id, title, company, job_type, description, posted_date) VALUES (?, ?, ?, ?, ?, ?)",
+        ((provider_id, f"Job {i}", f"Company {i % 50}", "Full-time", make_text(rng, rng.randrange(3, 15)), now)
+         for i in range(jobs))
+    )
+    for i in range(applications):
+        db_manager.cursor.execute(
+            "INSERT INTO users (username, password, user_type, name, email) VALUES (?, 'x', 'seeker', ?, ?)",
+            (f"seeker{i}", f"Seeker {i}", f"seeker{i}@example.com")
+        )
+        db_manager.cursor.execute(
+            "INSERT INTO applications (job_id, seeker_id, application_date, cover_letter) VALUES (?, ?, ?, ?)",
+            (rng.randrange(1, jobs + 1), db_manager.cursor.lastrowid, now, make_text(rng, rng.randrange(1, 8)))
+        )
+    db_manager.conn.commit()
+
+
+def column_bytes(db_manager):
+    return sum(db_manager.cursor.execute(
+        f"SELECT COALESCE(SUM(length(CAST({column} AS BLOB))), 0) FROM {table}").fetchone()[0]
+        for table, column in (('jobs', 'description'), ('applications', 'cover_letter')))
+
+
+def measure(db_manager, path, jobs, reads, rng):
+    db_manager.cursor.execute("VACUUM")
+    results = {'file_bytes': os.path.getsize(path), 'text_bytes': column_bytes(db_manager)}
+
+    # Detail dialogs: one job, or one application's cover letter
+    job_ids = [rng.randrange(1, jobs + 1) for _ in range(reads)]
+    start = time.perf_counter()
+    for job_id in job_ids:
+        db_manager.get_job_by_id(job_id)
+    results['job_detail_us'] = (time.perf_counter() - start) / reads * 1e6
+
+    start = time.perf_counter()
+    for job_id in job_ids:
+        db_manager.get_applications({'job_id': job_id})
+    results['application_detail_us'] = (time.perf_counter() - start) / reads * 1e6
+
+    # The jobs tab lists every job without showing descriptions
+    start = time.perf_counter()
+    db_manager.get_jobs()
+    results['job_list_ms'] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text compression size and latency report")
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--applications', type=int, default=50000)
+    parser.add_argument('--reads', type=int, default=2000, help="detail reads to time")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'job_marketplace.db')
+        db_manager = DatabaseManager(path, os.path.join(directory, 'job_marketplace_archive.db'))
+        seed_database(db_manager, args.jobs, args.applications, rng)
+        before = measure(db_manager, path, args.jobs, args.reads, random.Random(1))
+
+        start = time.perf_counter()
+        db_manager.train_compression_dictionary()
+        trained = time.perf_counter() - start
+        compressed = db_manager.compress_text_columns()
+        migrated = time.perf_counter() - start - trained
+        after = measure(db_manager, path, args.jobs, args.reads, random.Random(1))
+        db_manager.close()
+
+    print(f"{args.jobs} jobs, {args.applications} applications; {compressed} values compressed "
+          f"(dictionary {trained:.1f}s, migration {migrated:.1f}s)")
+    print(f"{'':<24}{'before':>12}{'after':>12}{'change':>9}")
+    for key, label in (('file_bytes', "database bytes"), ('text_bytes', "text column bytes"),
+                       ('job_detail_us', "job detail (us)"), ('application_detail_us', "application detail (us)"),
+                       ('job_list_ms', "job list (ms)")):
+        change = (after[key] / before[key] - 1) * 100
+        print(f"{label:<24}{before[key]:>12,.0f}{after[key]:>12,.0f}{change:>8.1f}%")
+
+
+if __name__ == '__main__':
+    main()
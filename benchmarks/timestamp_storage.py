@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+# Compares the old "%Y-%m-%d %H:%M:%S" TEXT timestamps with INTEGER epoch
+# seconds: size of the date index and speed of sorting by date.
+
+
+def build_database(path, as_text, rows):
+    conn = sqlite3.connect(path)
+    column_type = "TEXT" if as_text else "INTEGER"
+    conn.execute(f'''
+    CREATE TABLE applications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        application_date {column_type},
+        status TEXT DEFAULT 'Pending'
+    )
+    ''')
+
+    random.seed(42)
+    start = int(datetime(2020, 1, 1).timestamp())
+    values = []
+    for _ in range(rows):
+        epoch = start + random.randrange(5 * 365 * 24 * 3600)
+        date = datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S") if as_text else epoch
+        values.append((random.randrange(1000), random.randrange(10000), date))
+
+    conn.executemany("INSERT INTO applications (job_id, seeker_id, application_date) VALUES (?, ?, ?)", values)
+    conn.execute("CREATE INDEX idx_applications_date ON applications(application_date)")
+    conn.commit()
+    return conn
+
+
+def index_size(conn):
+    return conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name = 'idx_applications_date'").fetchone()[0]
+
+
+def time_query(conn, query, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TEXT vs INTEGER timestamp storage benchmark")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for label, as_text in (("TEXT", True), ("INTEGER", False)):
+            conn = build_database(os.path.join(directory, f"{label}.db"), as_text, args.rows)
+            results[label] = (
+                index_size(conn),
+                # Full sort by date, as the applications tab does
+                time_query(conn, "SELECT id, application_date FROM applications "
+                                 "ORDER BY application_date DESC", args.repeat),
+                # Sorting without the index, e.g. combined with a filter
+                time_query(conn, "SELECT id, application_date FROM applications NOT INDEXED "
+                                 "WHERE job_id < 500 ORDER BY application_date DESC", args.repeat),
+            )
+            conn.close()
+
+    print(f"{args.rows} rows")
+    print(f"{'storage':<10}{'index bytes':>14}{'indexed sort':>16}{'unindexed sort':>18}")
+    for label, (size, indexed, unindexed) in results.items():
+        print(f"{label:<10}{size:>14,}{indexed * 1000:>14.1f}ms{unindexed * 1000:>16.1f}ms")
+
+    text_size, integer_size = results["TEXT"][0], results["INTEGER"][0]
+    print(f"index size reduction: {(1 - integer_size / text_size) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,291 +1,157 @@
-import sys
+import logging
+import os
 import sqlite3
-from datetime import datetime
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QBoxLayout, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QComboBox, QTabWidget,
                              QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
                              QFormLayout, QTextEdit, QGroupBox, QSpinBox, QDialog,
-                             QDialogButtonBox, QStackedWidget, QSplitter)
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QIcon, QPixmap
-
-
-class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect('job_marketplace.db')
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        # Create users table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            user_type TEXT NOT NULL,
-            name TEXT,
-            email TEXT,
-            registration_date TEXT
-        )
-        ''')
-
-        # Create jobs table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            provider_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            company TEXT NOT NULL,
-            salary REAL,
-            job_type TEXT NOT NULL,
-            description TEXT,
-            posted_date TEXT,
-            FOREIGN KEY (provider_id) REFERENCES users(id)
-        )
-        ''')
-
-        # Create applications table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS applications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_id INTEGER NOT NULL,
-            seeker_id INTEGER NOT NULL,
-            application_date TEXT,
-            status TEXT DEFAULT 'Pending',
-            cover_letter TEXT,
-            FOREIGN KEY (job_id) REFERENCES jobs(id),
-            FOREIGN KEY (seeker_id) REFERENCES users(id)
-        )
-        ''')
-
-        self.conn.commit()
-
-    def register_user(self, username, password, user_type, name, email):
-        try:
-            registration_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute(
-                "INSERT INTO users (username, password, user_type, name, email, registration_date) VALUES (?, ?, ?, ?, ?, ?)",
-                (username, password, user_type, name, email, registration_date)
-            )
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-
-    def authenticate_user(self, username, password):
-        self.cursor.execute(
-            "SELECT id, user_type, name, email FROM users WHERE username = ? AND password = ?",
-            (username, password)
-        )
-        user_data = self.cursor.fetchone()
-        if user_data:
-            return {
-                'id': user_data[0],
-                'user_type': user_data[1],
-                'name': user_data[2],
-                'email': user_data[3]
-            }
-        return None
-
-    def post_job(self, provider_id, title, company, salary, job_type, description):
-        posted_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute(
-            "INSERT INTO jobs (provider_id, title, company, salary, job_type, description, posted_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (provider_id, title, company, salary, job_type, description, posted_date)
-        )
-        self.conn.commit()
-        return self.cursor.lastrowid
-
-    def get_jobs(self, filters=None):
-        query = """
-        SELECT j.id, j.title, j.company, j.salary, j.job_type, j.description, 
-               j.posted_date, u.name as provider_name, u.email as provider_email,
-               (SELECT COUNT(*) FROM applications WHERE job_id = j.id) as application_count
-        FROM jobs j
-        JOIN users u ON j.provider_id = u.id
-        """
-
-        where_clauses = []
-        params = []
-
-        if filters:
-            if filters.get('title'):
-                where_clauses.append("j.title LIKE ?")
-                params.append(f"%{filters['title']}%")
-
-            if filters.get('company'):
-                where_clauses.append("j.company LIKE ?")
-                params.append(f"%{filters['company']}%")
-
-            if filters.get('job_type') and filters['job_type'] != "All":
-                where_clauses.append("j.job_type = ?")
-                params.append(filters['job_type'])
-
-            if filters.get('min_salary'):
-                where_clauses.append("j.salary >= ?")
-                params.append(filters['min_salary'])
-
-            if filters.get('max_salary'):
-                where_clauses.append("j.salary <= ?")
-                params.append(filters['max_salary'])
-
-            if filters.get('provider_id'):
-                where_clauses.append("j.provider_id = ?")
-                params.append(filters['provider_id'])
-
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        query += " ORDER BY j.posted_date DESC"
-
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
-
-    def get_job_by_id(self, job_id):
-        self.cursor.execute("""
-        SELECT j.id, j.title, j.company, j.salary, j.job_type, j.description, 
-               j.posted_date, u.name as provider_name, u.email as provider_email
-        FROM jobs j
-        JOIN users u ON j.provider_id = u.id
-        WHERE j.id = ?
-        """, (job_id,))
-        return self.cursor.fetchone()
-
-    def delete_job(self, job_id, provider_id):
-        # First check if the job belongs to the provider
-        self.cursor.execute("SELECT id FROM jobs WHERE id = ? AND provider_id = ?", (job_id, provider_id))
-        if not self.cursor.fetchone():
-            return False
-
-        # Delete all applications for this job
-        self.cursor.execute("DELETE FROM applications WHERE job_id = ?", (job_id,))
-
-        # Delete the job
-        self.cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
-        self.conn.commit()
-        return True
-
-    def apply_for_job(self, job_id, seeker_id, cover_letter):
-        # Check if user already applied for this job
-        self.cursor.execute("SELECT id FROM applications WHERE job_id = ? AND seeker_id = ?", (job_id, seeker_id))
-        if self.cursor.fetchone():
-            return False, "You have already applied for this job"
-
-        application_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute(
-            "INSERT INTO applications (job_id, seeker_id, application_date, cover_letter) VALUES (?, ?, ?, ?)",
-            (job_id, seeker_id, application_date, cover_letter)
-        )
-        self.conn.commit()
-        return True, "Application submitted successfully"
-
-    def get_applications(self, filters=None):
-        query = """
-        SELECT a.id, a.job_id, j.title, j.company, u.name as applicant_name, 
-               u.email as applicant_email, a.application_date, a.status, a.cover_letter
-        FROM applications a
-        JOIN jobs j ON a.job_id = j.id
-        JOIN users u ON a.seeker_id = u.id
-        """
-
-        where_clauses = []
-        params = []
-
-        if filters:
-            if filters.get('job_id'):
-                where_clauses.append("a.job_id = ?")
-                params.append(filters['job_id'])
-
-            if filters.get('seeker_id'):
-                where_clauses.append("a.seeker_id = ?")
-                params.append(filters['seeker_id'])
-
-            if filters.get('provider_id'):
-                where_clauses.append("j.provider_id = ?")
-                params.append(filters['provider_id'])
-
-            if filters.get('status'):
-                where_clauses.append("a.status = ?")
-                params.append(filters['status'])
-
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        query += " ORDER BY a.application_date DESC"
-
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
-
-    def update_application_status(self, application_id, new_status):
-        self.cursor.execute(
-            "UPDATE applications SET status = ? WHERE id = ?",
-            (new_status, application_id)
-        )
-        self.conn.commit()
-        return True
-
-    def get_user_applications(self, user_id):
-        self.cursor.execute("""
-        SELECT a.id, j.title, j.company, a.application_date, a.status
-        FROM applications a
-        JOIN jobs j ON a.job_id = j.id
-        WHERE a.seeker_id = ?
-        ORDER BY a.application_date DESC
-        """, (user_id,))
-        return self.cursor.fetchall()
-
-    def get_dashboard_stats(self, user_id, user_type):
-        stats = {}
-
-        if user_type == 'provider':
-            # Total jobs posted
-            self.cursor.execute("SELECT COUNT(*) FROM jobs WHERE provider_id = ?", (user_id,))
-            stats['total_jobs'] = self.cursor.fetchone()[0]
-
-            # Total applications received
-            self.cursor.execute("""
-            SELECT COUNT(*) FROM applications a
-            JOIN jobs j ON a.job_id = j.id
-            WHERE j.provider_id = ?
-            """, (user_id,))
-            stats['total_applications'] = self.cursor.fetchone()[0]
-
-            # Applications by status
-            self.cursor.execute("""
-            SELECT a.status, COUNT(*) FROM applications a
-            JOIN jobs j ON a.job_id = j.id
-            WHERE j.provider_id = ?
-            GROUP BY a.status
-            """, (user_id,))
-            status_counts = self.cursor.fetchall()
-            stats['status_counts'] = {status: count for status, count in status_counts}
-
-        elif user_type == 'seeker':
-            # Total applications sent
-            self.cursor.execute("SELECT COUNT(*) FROM applications WHERE seeker_id = ?", (user_id,))
-            stats['total_applications'] = self.cursor.fetchone()[0]
-
-            # Applications by status
-            self.cursor.execute("""
-            SELECT status, COUNT(*) FROM applications
-            WHERE seeker_id = ?
-            GROUP BY status
-            """, (user_id,))
-            status_counts = self.cursor.fetchall()
-            stats['status_counts'] = {status: count for status, count in status_counts}
-
-        return stats
-
-    def close(self):
-        self.conn.close()
+                             QDialogButtonBox, QCheckBox, QDateEdit, QFileDialog, QInputDialog)
+from PyQt5.QtCore import Qt, QDate, QSettings, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from job_marketplace_auth import check_password, hash_password
+from job_marketplace_db import (DatabaseManager, APPLICATION_SORTS, APPLICATION_STATUSES, FUNNEL_STAGES, JOB_SORTS,
+                                PASSWORD_HASH_BATCH, SALARY_BUCKETS, format_salary, format_timestamp, row_sort_key)
+from job_marketplace_locations import parse_location
+from job_marketplace_profiling import Profiler
+
+# Failures of background work (housekeeping, detail prefetch), which the user
+# did not ask for and cannot act on; without logging configured, warnings go to
+# stderr
+logger = logging.getLogger(__name__)
+
+# JOB_MARKETPLACE_STARTUP_TRACE=1 prints per-phase startup timings to stderr in the
+# layout of `python -X importtime` (combine the two for the full picture)
+STARTUP_TRACE = bool(os.environ.get('JOB_MARKETPLACE_STARTUP_TRACE'))
+STARTUP_START = time.perf_counter()
+
+
+@contextmanager
+def startup_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if STARTUP_TRACE:
+            end = time.perf_counter()
+            print(f"startup time: {(end - start) * 1e6:>10.0f} | {(end - STARTUP_START) * 1e6:>10.0f} | {name}",
+                  file=sys.stderr)
+
+
+# JOB_MARKETPLACE_PROFILE=<trace.json> records UI handlers to a Chrome trace on exit,
+# each split into SQL, Qt and Python time. With JOB_MARKETPLACE_PROFILE_CPROFILE=1
+# cProfile also runs during handlers (stats in <trace.json>.pstats), and with
+# JOB_MARKETPLACE_PROFILE_TRACEMALLOC=1 handlers report the memory they allocate.
+PROFILE_PATH = os.environ.get('JOB_MARKETPLACE_PROFILE')
+
+# Handlers recorded as trace spans, by class name
+PROFILED_HANDLERS = {
+    'JobMarketplaceApp': ['build_tab', 'load_dashboard', 'load_analytics', 'sweep_expired_jobs', 'poll_changes',
+                          'finish_housekeeping', 'load_jobs', 'reload_jobs', 'sort_jobs', 'fetch_more_jobs', 'search_jobs',
+                          'load_applications', 'reload_applications', 'sort_applications', 'fetch_more_applications',
+                          'show_job_detail', 'apply_for_job', 'show_post_job_dialog', 'delete_job',
+                          'view_job_applications', 'show_application_detail', 'prefetch_details',
+                          'finish_prefetch'],
+    'LoginDialog': ['handle_login', 'handle_register', 'finish_login', 'finish_register'],
+    'JobDetailDialog': ['__init__'],
+    'ApplicationDialog': ['__init__', 'submit_application'],
+    'JobPostingDialog': ['__init__', 'save_job'],
+    'ApplicationStatusDialog': ['__init__', 'save_resume', 'update_status'],
+}
+
+# Qt calls that fill in widgets; their time is the Qt share of a handler
+PROFILED_QT_CALLS = {
+    QTableWidget: ['setItem', 'insertRow', 'removeRow', 'setRowCount', 'sortItems'],
+    QComboBox: ['addItem', 'addItems', 'insertItem', 'removeItem', 'setItemText', 'clear'],
+    QLabel: ['setText'],
+    QBoxLayout: ['addWidget', 'addLayout'],
+    QFormLayout: ['addRow'],
+    QWidget: ['setParent'],
+}
+
+
+def start_profiling(path):
+    profiler = Profiler(path, use_cprofile=bool(os.environ.get('JOB_MARKETPLACE_PROFILE_CPROFILE')),
+                        use_tracemalloc=bool(os.environ.get('JOB_MARKETPLACE_PROFILE_TRACEMALLOC')))
+    profiler.instrument(DatabaseManager, [name for name, value in vars(DatabaseManager).items()
+                                          if callable(value) and not name.startswith('_')], 'sql', spans=True)
+    for cls, names in PROFILED_QT_CALLS.items():
+        profiler.instrument(cls, names, 'qt')
+    # Time spent in a modal dialog is the user's, not the handler's
+    profiler.instrument(QDialog, ['exec_'], 'modal')
+    profiler.instrument(QMessageBox, ['information', 'warning', 'critical', 'question'], 'modal')
+    profiler.instrument(QFileDialog, ['getOpenFileName', 'getSaveFileName'], 'modal')
+    profiler.instrument(QInputDialog, ['getText'], 'modal')
+    for class_name, names in PROFILED_HANDLERS.items():
+        profiler.instrument_handlers(globals()[class_name], names)
+    return profiler
+
+
+def read_details(db_manager, kind, ids, include_archived):
+    # Full records of those of `ids` that exist, by id; see cached_details
+    if kind == 'jobs':
+        return db_manager.get_jobs_by_ids(ids, include_archived)
+    return {app[0]: app for app in db_manager.get_applications({'ids': ids, 'include_archived': include_archived})}
+
+
+# Where the session token of the last login is kept (QSettings), so a relaunch
+# within SESSION_LIFETIME skips the login dialog and its password check
+SETTINGS_ORGANIZATION = "JobMarketplace"
+SETTINGS_APPLICATION = "Job Marketplace"
+SESSION_TOKEN_SETTING = "session/token"
+
+# Expiry sweeper cadence: idle interval, and the pause between chunks while
+# there is a backlog of expired jobs
+SWEEP_INTERVAL_MS = 10 * 60 * 1000
+SWEEP_BACKLOG_INTERVAL_MS = 250
+
+# How often open windows check the change log for writes by any instance
+CHANGE_POLL_INTERVAL_MS = 1000
+
+# Detail prefetch: once selection or hover has rested on a table row this long,
+# the full records of that row and this many rows either side are read in one
+# query on a worker thread into a cache of the most recently used records, for
+# the detail dialogs
+DETAIL_PREFETCH_DELAY_MS = 100
+DETAIL_PREFETCH_NEIGHBOURS = 2
+DETAIL_CACHE_SIZE = 64
+
+# Bytes of an attached resume shown in the application dialog's preview, and
+# copied per write when saving it
+RESUME_PREVIEW_BYTES = 16 * 1024
+RESUME_COPY_CHUNK = 1024 * 1024
+
+# Main window tabs, each built on first activation; analytics is for providers
+DASHBOARD_TAB, JOBS_TAB, APPLICATIONS_TAB, ANALYTICS_TAB = range(4)
+
+# Days of daily activity shown on the analytics tab
+ANALYTICS_DAYS = 30
+
+# Sortable table columns and their server-side sort keys. Text sorts start
+# ascending, the others descending (highest, newest first).
+JOB_SORT_COLUMNS = {1: 'title', 2: 'company', 3: 'salary', 5: 'posted_date', 6: 'applications'}
+APPLICATION_SORT_COLUMNS = {3: 'date', 4: 'status', 5: 'score'}
+ASCENDING_FIRST_SORTS = {'title', 'company', 'status'}
 
 
 class LoginDialog(QDialog):
+    # Password hashing takes ~0.1 s, so it runs on a worker thread; the result
+    # comes back through this signal, queued to the UI thread, as the callback
+    # to run and the finished future
+    hashed = pyqtSignal(object, object)
+
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = None
+        self.session_token = None
+        self.worker = ThreadPoolExecutor(max_workers=1)
+        self.hashed.connect(lambda callback, future: callback(future.result()))
         self.setWindowTitle("Job Marketplace - Login")
         self.setMinimumSize(400, 300)
 
@@ -314,9 +180,9 @@ class LoginDialog(QDialog):
         login_layout.addRow("Username:", self.login_username)
         login_layout.addRow("Password:", self.login_password)
 
-        login_button = QPushButton("Login")
-        login_button.clicked.connect(self.handle_login)
-        login_layout.addRow("", login_button)
+        self.login_button = QPushButton("Login")
+        self.login_button.clicked.connect(self.handle_login)
+        login_layout.addRow("", self.login_button)
 
         login_widget.setLayout(login_layout)
         self.tabs.addTab(login_widget, "Login")
@@ -339,9 +205,9 @@ class LoginDialog(QDialog):
         register_layout.addRow("Email:", self.register_email)
         register_layout.addRow("Account Type:", self.register_type)
 
-        register_button = QPushButton("Register")
-        register_button.clicked.connect(self.handle_register)
-        register_layout.addRow("", register_button)
+        self.register_button = QPushButton("Register")
+        self.register_button.clicked.connect(self.handle_register)
+        register_layout.addRow("", self.register_button)
 
         register_widget.setLayout(register_layout)
         self.tabs.addTab(register_widget, "Register")
@@ -357,12 +223,28 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please fill in all fields")
             return
 
-        user_data = self.db_manager.authenticate_user(username, password)
-        if user_data:
-            self.user_data = user_data
-            self.accept()
-        else:
+        # authenticate_user, with check_password on the worker
+        user_data, password_hash = self.db_manager.get_login(username)
+        self.run_hash(lambda result: self.finish_login(user_data, *result), check_password, password, password_hash)
+
+    def finish_login(self, user_data, matches, new_hash):
+        self.set_busy(False)
+        if not matches:
             QMessageBox.warning(self, "Login Failed", "Invalid username or password")
+            return
+        if new_hash:
+            self.db_manager.set_password_hash(user_data['id'], new_hash)
+        self.session_token = self.db_manager.create_session(user_data['id'])
+        self.user_data = user_data
+        self.accept()
+
+    def run_hash(self, callback, function, *args):
+        self.set_busy(True)
+        self.worker.submit(function, *args).add_done_callback(lambda future: self.hashed.emit(callback, future))
+
+    def set_busy(self, busy):
+        self.login_button.setEnabled(not busy)
+        self.register_button.setEnabled(not busy)
 
     def handle_register(self):
         username = self.register_username.text()
@@ -375,8 +257,12 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please fill in all fields")
             return
 
-        success = self.db_manager.register_user(username, password, user_type, name, email)
-        if success:
+        self.run_hash(lambda password_hash: self.finish_register(username, password, password_hash, user_type, name,
+                                                                 email), hash_password, password)
+
+    def finish_register(self, username, password, password_hash, user_type, name, email):
+        self.set_busy(False)
+        if self.db_manager.add_user(username, password_hash, user_type, name, email):
             QMessageBox.information(self, "Success", "Registration successful. Please log in.")
             self.tabs.setCurrentIndex(0)  # Switch to login tab
             self.login_username.setText(username)
@@ -412,12 +298,16 @@ class JobDetailDialog(QDialog):
         details_group = QGroupBox("Job Details")
         details_layout = QFormLayout()
 
-        salary_label = QLabel(f"${job_data[3]:,.2f}")
+        salary_label = QLabel(format_salary(job_data[9], job_data[10]))
         job_type_label = QLabel(job_data[4])
-        posted_date_label = QLabel(job_data[6])
+        posted_date_label = QLabel(format_timestamp(job_data[6]))
 
         details_layout.addRow("Salary:", salary_label)
         details_layout.addRow("Job Type:", job_type_label)
+        if job_data[11]:
+            details_layout.addRow("Category:", QLabel(job_data[11]))
+        if job_data[12]:
+            details_layout.addRow("Location:", QLabel(job_data[12]))
         details_layout.addRow("Posted Date:", posted_date_label)
 
         details_group.setLayout(details_layout)
@@ -457,25 +347,45 @@ class JobDetailDialog(QDialog):
 
 
 class ApplicationDialog(QDialog):
-    def __init__(self, job_data, user_data, db_manager, parent=None):
+    def __init__(self, jobs_data, user_data, db_manager, parent=None):
         super().__init__(parent)
-        self.job_data = job_data
+        # One or more job rows (from get_job_by_id) to apply to with the same letter
+        self.jobs_data = jobs_data
         self.user_data = user_data
         self.db_manager = db_manager
 
-        self.setWindowTitle(f"Apply for: {job_data[1]}")
+        if len(jobs_data) == 1:
+            self.setWindowTitle(f"Apply for: {jobs_data[0][1]}")
+        else:
+            self.setWindowTitle(f"Apply for {len(jobs_data)} jobs")
         self.setMinimumSize(500, 400)
 
         layout = QVBoxLayout()
 
         # Job title
-        title_label = QLabel(f"Job: {job_data[1]} at {job_data[2]}")
+        if len(jobs_data) == 1:
+            title_label = QLabel(f"Job: {jobs_data[0][1]} at {jobs_data[0][2]}")
+        else:
+            title_label = QLabel(f"{len(jobs_data)} selected jobs")
         title_font = QFont()
         title_font.setPointSize(14)
         title_font.setBold(True)
         title_label.setFont(title_font)
         layout.addWidget(title_label)
 
+        # Selected jobs, with the outcome per job once submitted
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(3)
+        self.results_table.setHorizontalHeaderLabels(["Job Title", "Company", "Result"])
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, job in enumerate(jobs_data):
+            self.results_table.insertRow(row)
+            self.results_table.setItem(row, 0, QTableWidgetItem(job[1]))
+            self.results_table.setItem(row, 1, QTableWidgetItem(job[2]))
+        self.results_table.setVisible(len(jobs_data) > 1)
+        layout.addWidget(self.results_table)
+
         # Application form
         form_group = QGroupBox("Application Form")
         form_layout = QFormLayout()
@@ -496,17 +406,36 @@ class ApplicationDialog(QDialog):
         form_layout.addRow(cover_letter_label)
         form_layout.addWidget(self.cover_letter)
 
+        # Optional resume, attached to every job applied for
+        resume_layout = QHBoxLayout()
+        self.resume_path = None
+        self.resume_label = QLabel("No file attached")
+        attach_button = QPushButton("Attach Resume...")
+        attach_button.clicked.connect(self.choose_resume)
+        resume_layout.addWidget(self.resume_label)
+        resume_layout.addStretch()
+        resume_layout.addWidget(attach_button)
+        form_layout.addRow("Resume:", resume_layout)
+
         form_group.setLayout(form_layout)
         layout.addWidget(form_group)
 
         # Buttons
-        button_box = QDialogButtonBox(QDialogButtonBox.Apply | QDialogButtonBox.Cancel)
-        button_box.accepted.connect(self.submit_application)
-        button_box.rejected.connect(self.reject)
-        layout.addWidget(button_box)
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Apply | QDialogButtonBox.Cancel)
+        self.button_box.button(QDialogButtonBox.Apply).clicked.connect(self.submit_application)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
 
+        self.applied_count = 0
         self.setLayout(layout)
 
+    def choose_resume(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Attach Resume", "",
+                                              "Documents (*.pdf *.doc *.docx *.txt *.md);;All Files (*)")
+        if path:
+            self.resume_path = path
+            self.resume_label.setText(os.path.basename(path))
+
     def submit_application(self):
         cover_letter = self.cover_letter.toPlainText().strip()
 
@@ -514,17 +443,56 @@ class ApplicationDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please include a cover letter or message")
             return
 
-        success, message = self.db_manager.apply_for_job(
-            self.job_data[0],  # job_id
-            self.user_data['id'],  # seeker_id
-            cover_letter
-        )
+        resume_hash = resume_name = None
+        if self.resume_path:
+            try:
+                with open(self.resume_path, 'rb') as resume_file:
+                    resume_hash = self.db_manager.store_attachment(resume_file)
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(self, "Error", f"Could not attach the resume: {error}")
+                return
+            resume_name = os.path.basename(self.resume_path)
+
+        if len(self.jobs_data) == 1:
+            success, message = self.db_manager.apply_for_job(
+                self.jobs_data[0][0],  # job_id
+                self.user_data['id'],  # seeker_id
+                cover_letter,
+                resume_hash,
+                resume_name
+            )
 
-        if success:
-            QMessageBox.information(self, "Success", message)
+            if success:
+                QMessageBox.information(self, "Success", message)
+                self.accept()
+            else:
+                QMessageBox.warning(self, "Error", message)
+            return
+
+        results = self.db_manager.apply_for_jobs(
+            [job[0] for job in self.jobs_data], self.user_data['id'], cover_letter, resume_hash, resume_name)
+
+        for row, job in enumerate(self.jobs_data):
+            success, message = results[job[0]]
+            result_item = QTableWidgetItem(message)
+            result_item.setForeground(Qt.darkGreen if success else Qt.darkRed)
+            self.results_table.setItem(row, 2, result_item)
+            self.applied_count += success
+
+        # Results stay visible; closing reports whether anything was submitted
+        self.button_box.button(QDialogButtonBox.Apply).setEnabled(False)
+        self.cover_letter.setReadOnly(True)
+        self.button_box.rejected.disconnect(self.reject)
+        self.button_box.rejected.connect(self.close_with_results)
+        self.button_box.button(QDialogButtonBox.Cancel).setText("Close")
+        QMessageBox.information(self, "Applications Submitted",
+                                f"Applied to {self.applied_count} of {len(self.jobs_data)} jobs")
+
+    def close_with_results(self):
+        if self.applied_count:
             self.accept()
         else:
-            QMessageBox.warning(self, "Error", message)
+            self.reject()
 
 
 class JobPostingDialog(QDialog):
@@ -562,16 +530,42 @@ class JobPostingDialog(QDialog):
         self.salary.setValue(50000)
         self.salary.setPrefix("$ ")
 
+        self.salary_max = QSpinBox()
+        self.salary_max.setRange(0, 1000000)
+        self.salary_max.setSingleStep(1000)
+        self.salary_max.setValue(50000)
+        self.salary_max.setPrefix("to $ ")
+
+        salary_layout = QHBoxLayout()
+        salary_layout.addWidget(self.salary)
+        salary_layout.addWidget(self.salary_max)
+
         self.job_type = QComboBox()
         self.job_type.addItems(["Full-time", "Part-time", "Contract", "Internship", "Remote"])
 
+        self.location = QLineEdit()
+        self.location.setPlaceholderText("e.g. Bangalore, India or Remote")
+
+        self.category = QLineEdit()
+        self.category.setPlaceholderText("e.g. IT, Marketing, Data Science")
+
+        # The minimum date doubles as "No deadline"
+        self.deadline = QDateEdit()
+        self.deadline.setCalendarPopup(True)
+        self.deadline.setMinimumDate(QDate.currentDate().addDays(-1))
+        self.deadline.setSpecialValueText("No deadline")
+        self.deadline.setDate(self.deadline.minimumDate())
+
         self.description = QTextEdit()
         self.description.setPlaceholderText("Provide a detailed job description, requirements, and benefits...")
 
         form_layout.addRow("Job Title:", self.job_title)
         form_layout.addRow("Company:", self.company)
-        form_layout.addRow("Salary:", self.salary)
+        form_layout.addRow("Salary:", salary_layout)
         form_layout.addRow("Job Type:", self.job_type)
+        form_layout.addRow("Location:", self.location)
+        form_layout.addRow("Category:", self.category)
+        form_layout.addRow("Deadline:", self.deadline)
         form_layout.addRow("Description:", self.description)
 
         form_widget = QWidget()
@@ -589,21 +583,42 @@ class JobPostingDialog(QDialog):
     def save_job(self):
         title = self.job_title.text().strip()
         company = self.company.text().strip()
-        salary = self.salary.value()
+        salary = (self.salary.value(), max(self.salary.value(), self.salary_max.value()))
         job_type = self.job_type.currentText()
         description = self.description.toPlainText().strip()
+        deadline = None
+        if self.deadline.date() != self.deadline.minimumDate():
+            deadline = self.deadline.date().toString("yyyy-MM-dd")
 
         if not all([title, company, description]):
             QMessageBox.warning(self, "Error", "Please fill in all required fields")
             return
 
+        # Reposts are allowed, but hidden from job search as duplicates
+        duplicate = self.db_manager.find_duplicate_job(title, company, description)
+        if duplicate:
+            original = self.db_manager.get_job_by_id(duplicate[0])
+            reply = QMessageBox.question(
+                self,
+                "Possible Duplicate",
+                f"This listing is {duplicate[1]:.0%} similar to \"{original[1]}\" at {original[2]} "
+                f"(#{original[0]}). Post it anyway? Duplicates are not shown in job searches.",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+
         job_id = self.db_manager.post_job(
             self.user_data['id'],
             title,
             company,
             salary,
             job_type,
-            description
+            description,
+            self.location.text().strip(),
+            self.category.text().strip(),
+            deadline
         )
 
         if job_id:
@@ -638,7 +653,7 @@ class ApplicationStatusDialog(QDialog):
 
         applicant_label = QLabel(application_data[4])
         email_label = QLabel(application_data[5])
-        date_label = QLabel(application_data[6])
+        date_label = QLabel(format_timestamp(application_data[6]))
         status_label = QLabel(application_data[7])
 
         details_layout.addRow("Applicant:", applicant_label)
@@ -649,6 +664,15 @@ class ApplicationStatusDialog(QDialog):
         details_group.setLayout(details_layout)
         layout.addWidget(details_group)
 
+        # Status history, from the application event log
+        history_group = QGroupBox("Status History")
+        history_layout = QFormLayout()
+        for from_status, to_status, event_date in db_manager.get_application_events(application_data[0]):
+            change = "Applied" if from_status is None else f"{from_status} \u2192 {to_status}"
+            history_layout.addRow(f"{format_timestamp(event_date)}:", QLabel(change))
+        history_group.setLayout(history_layout)
+        layout.addWidget(history_group)
+
         # Cover letter
         cover_group = QGroupBox("Cover Letter")
         cover_layout = QVBoxLayout()
@@ -661,13 +685,27 @@ class ApplicationStatusDialog(QDialog):
         cover_group.setLayout(cover_layout)
         layout.addWidget(cover_group)
 
+        # Attached resume
+        if application_data[9]:
+            resume_group = QGroupBox(f"Resume: {application_data[10]}")
+            resume_layout = QVBoxLayout()
+            resume_preview = QTextEdit()
+            resume_preview.setReadOnly(True)
+            resume_preview.setPlainText(self.resume_preview(application_data[9]))
+            resume_layout.addWidget(resume_preview)
+            save_resume_button = QPushButton("Save As...")
+            save_resume_button.clicked.connect(self.save_resume)
+            resume_layout.addWidget(save_resume_button)
+            resume_group.setLayout(resume_layout)
+            layout.addWidget(resume_group)
+
         # Status update (for provider only)
         if hasattr(parent, 'user_data') and parent.user_data['user_type'] == 'provider':
             status_group = QGroupBox("Update Application Status")
             status_layout = QHBoxLayout()
 
             self.status_combo = QComboBox()
-            self.status_combo.addItems(["Pending", "Reviewing", "Interview", "Accepted", "Rejected"])
+            self.status_combo.addItems(APPLICATION_STATUSES)
             self.status_combo.setCurrentText(application_data[7])
 
             update_button = QPushButton("Update Status")
@@ -686,6 +724,36 @@ class ApplicationStatusDialog(QDialog):
 
         self.setLayout(layout)
 
+    def resume_preview(self, digest):
+        # Only the first pages of the memory-mapped file are read
+        try:
+            with self.db_manager.open_attachment(digest) as resume:
+                size = len(resume)
+                head = resume[:RESUME_PREVIEW_BYTES]
+        except FileNotFoundError:
+            return "The attached file is missing from the attachment store."
+
+        if b"\0" not in head:
+            try:
+                text = head.decode('utf-8')
+            except UnicodeDecodeError:
+                # May just be a character cut in half at the end of the preview
+                text = head.decode('utf-8', errors='replace')
+            return text + ("\n..." if size > RESUME_PREVIEW_BYTES else "")
+        kind = "PDF document" if head.startswith(b"%PDF") else "Binary file"
+        return f"{kind}, {size / 1024:,.0f} KB. Use Save As to open it."
+
+    def save_resume(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Resume", self.application_data[10])
+        if not path:
+            return
+        try:
+            with self.db_manager.open_attachment(self.application_data[9]) as resume, open(path, 'wb') as target:
+                for offset in range(0, len(resume), RESUME_COPY_CHUNK):
+                    target.write(resume[offset:offset + RESUME_COPY_CHUNK])
+        except OSError as error:
+            QMessageBox.warning(self, "Error", f"Could not save the resume: {error}")
+
     def update_status(self):
         new_status = self.status_combo.currentText()
         success = self.db_manager.update_application_status(self.application_data[0], new_status)
@@ -698,18 +766,33 @@ class ApplicationStatusDialog(QDialog):
 
 
 class JobMarketplaceApp(QMainWindow):
-    def __init__(self):
+    # A housekeeping run (see housekeeping) has finished; carries its future
+    housekeeping_done = pyqtSignal(object)
+    # A detail prefetch (see fetch_details) has finished; carries its future
+    prefetch_done = pyqtSignal(object)
+
+    def __init__(self, db_manager, user_data):
         super().__init__()
-        self.db_manager = DatabaseManager()
-        self.user_data = None
+        self.db_manager = db_manager
+        self.user_data = user_data
 
-        # Perform login
-        login_dialog = LoginDialog(self.db_manager)
-        if login_dialog.exec_() == QDialog.Accepted:
-            self.user_data = login_dialog.user_data
-            self.init_ui()
-        else:
-            sys.exit()
+        # Full job and application records by (kind, id, include_archived), least
+        # recently used first
+        self.detail_cache = OrderedDict()
+        # Moves on whenever cached records are dropped, so a prefetch that read
+        # them before the change does not put them back
+        self.detail_generation = 0
+        self.prefetch_target = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch_details)
+        # Prefetch queries run on a worker thread with a connection of its own,
+        # so a slow read never holds up the UI
+        self.prefetch_worker = ThreadPoolExecutor(max_workers=1)
+        self.prefetch_db = None
+        self.prefetch_done.connect(self.finish_prefetch)
+
+        self.init_ui()
 
     def init_ui(self):
         self.setWindowTitle("Job Marketplace")
@@ -743,8 +826,54 @@ class JobMarketplaceApp(QMainWindow):
         # Tabs
         self.tabs = QTabWidget()
 
-        # Dashboard tab
-        dashboard_tab = QWidget()
+        # Only the dashboard is built up front; the other tabs are built, and
+        # their data loaded, when first shown
+        self.built_tabs = set()
+        self.tab_builders = {
+            DASHBOARD_TAB: ("Dashboard", self.build_dashboard_tab),
+            JOBS_TAB: ("Jobs", self.build_jobs_tab),
+            APPLICATIONS_TAB: ("Applications", self.build_applications_tab),
+        }
+        if self.user_data['user_type'] == 'provider':
+            self.tab_builders[ANALYTICS_TAB] = ("Analytics", self.build_analytics_tab)
+        for index in sorted(self.tab_builders):
+            self.tabs.addTab(QWidget(), self.tab_builders[index][0])
+        self.build_tab(DASHBOARD_TAB)
+        self.tabs.currentChanged.connect(self.build_tab)
+
+        main_layout.addWidget(self.tabs)
+
+        main_widget.setLayout(main_layout)
+        self.setCentralWidget(main_widget)
+
+        # Housekeeping runs on a worker thread with connections of its own, so
+        # vacuum steps, checkpoints and attachment GC never stall the UI
+        self.housekeeping_worker = ThreadPoolExecutor(max_workers=1)
+        self.housekeeping_db = None
+        self.housekeeping_running = False
+        self.housekeeping_done.connect(self.finish_housekeeping)
+
+        # Background expiry sweeper; the first tick runs shortly after startup
+        self.sweep_timer = QTimer(self)
+        self.sweep_timer.timeout.connect(self.sweep_expired_jobs)
+        self.sweep_timer.start(SWEEP_BACKLOG_INTERVAL_MS)
+
+        # Change feed: writes by this or any other instance are applied to the
+        # open tables as row-level deltas instead of full reloads
+        self.change_seq = self.db_manager.latest_change()
+        self.change_timer = QTimer(self)
+        self.change_timer.timeout.connect(self.poll_changes)
+        self.change_timer.start(CHANGE_POLL_INTERVAL_MS)
+
+    def build_tab(self, index):
+        if index in self.built_tabs or index not in self.tab_builders:
+            return
+        self.built_tabs.add(index)
+        name, builder = self.tab_builders[index]
+        with startup_phase(f"build {name.lower()} tab"):
+            builder(self.tabs.widget(index))
+
+    def build_dashboard_tab(self, dashboard_tab):
         dashboard_layout = QVBoxLayout()
 
         dashboard_title = QLabel("Dashboard")
@@ -780,11 +909,40 @@ class JobMarketplaceApp(QMainWindow):
         recent_group.setLayout(recent_layout)
         dashboard_layout.addWidget(recent_group)
 
+        if self.user_data['user_type'] == 'seeker':
+            # New jobs matching the seeker's saved searches
+            alerts_group = QGroupBox("Job Alerts")
+            alerts_layout = QVBoxLayout()
+
+            self.notifications_table = QTableWidget()
+            self.notifications_table.setColumnCount(5)
+            self.notifications_table.setHorizontalHeaderLabels(["Job ID", "Job Title", "Company", "Saved Search", "Date"])
+            self.notifications_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            self.notifications_table.setSelectionBehavior(QTableWidget.SelectRows)
+            self.notifications_table.setEditTriggers(QTableWidget.NoEditTriggers)
+            self.notifications_table.doubleClicked.connect(self.show_notification_job)
+            alerts_layout.addWidget(self.notifications_table)
+
+            alerts_controls_layout = QHBoxLayout()
+            mark_read_button = QPushButton("Mark All Read")
+            mark_read_button.clicked.connect(self.mark_notifications_read)
+            alerts_controls_layout.addWidget(mark_read_button)
+            alerts_controls_layout.addStretch()
+
+            self.saved_searches_combo = QComboBox()
+            alerts_controls_layout.addWidget(self.saved_searches_combo)
+            delete_search_button = QPushButton("Delete Saved Search")
+            delete_search_button.clicked.connect(self.delete_saved_search)
+            alerts_controls_layout.addWidget(delete_search_button)
+            alerts_layout.addLayout(alerts_controls_layout)
+
+            alerts_group.setLayout(alerts_layout)
+            dashboard_layout.addWidget(alerts_group)
+            self.load_notifications()
+
         dashboard_tab.setLayout(dashboard_layout)
-        self.tabs.addTab(dashboard_tab, "Dashboard")
 
-        # Jobs tab
-        jobs_tab = QWidget()
+    def build_jobs_tab(self, jobs_tab):
         jobs_layout = QVBoxLayout()
 
         # Search and filter area
@@ -797,8 +955,23 @@ class JobMarketplaceApp(QMainWindow):
         self.search_company = QLineEdit()
         self.search_company.setPlaceholderText("Company")
 
+        # Facet combos are filled from search results with per-value counts
         self.search_type = QComboBox()
-        self.search_type.addItems(["All", "Full-time", "Part-time", "Contract", "Internship", "Remote"])
+        self.search_type.addItem("All Types", None)
+
+        self.search_category = QComboBox()
+        self.search_category.addItem("All Categories", None)
+
+        self.search_location = QComboBox()
+        self.search_location.addItem("All Locations", None)
+
+        # Widens the location filter to every location in this radius
+        self.search_radius = QSpinBox()
+        self.search_radius.setRange(0, 5000)
+        self.search_radius.setSingleStep(25)
+        self.search_radius.setPrefix("Within ")
+        self.search_radius.setSuffix(" km")
+        self.search_radius.setSpecialValueText("Exact location")
 
         self.min_salary = QSpinBox()
         self.min_salary.setRange(0, 1000000)
@@ -820,12 +993,21 @@ class JobMarketplaceApp(QMainWindow):
         filter_layout.addWidget(self.search_title)
         filter_layout.addWidget(self.search_company)
         filter_layout.addWidget(self.search_type)
+        filter_layout.addWidget(self.search_category)
+        filter_layout.addWidget(self.search_location)
+        filter_layout.addWidget(self.search_radius)
         filter_layout.addWidget(self.min_salary)
         filter_layout.addWidget(self.max_salary)
         filter_layout.addWidget(search_button)
         filter_layout.addWidget(reset_button)
 
-        filter_group.setLayout(filter_layout)
+        filter_group_layout = QVBoxLayout()
+        filter_group_layout.addLayout(filter_layout)
+
+        self.salary_facets_label = QLabel()
+        filter_group_layout.addWidget(self.salary_facets_label)
+
+        filter_group.setLayout(filter_group_layout)
         jobs_layout.addWidget(filter_group)
 
         # Jobs table
@@ -837,9 +1019,13 @@ class JobMarketplaceApp(QMainWindow):
             jobs_controls_layout.addWidget(post_job_button)
 
         refresh_button = QPushButton("Refresh")
-        refresh_button.clicked.connect(self.load_jobs)
+        refresh_button.clicked.connect(self.poll_changes)
         jobs_controls_layout.addWidget(refresh_button)
 
+        self.include_archived_jobs = QCheckBox("Include archived")
+        self.include_archived_jobs.toggled.connect(self.search_jobs)
+        jobs_controls_layout.addWidget(self.include_archived_jobs)
+
         jobs_controls_layout.addStretch()
 
         jobs_layout.addLayout(jobs_controls_layout)
@@ -855,9 +1041,23 @@ class JobMarketplaceApp(QMainWindow):
 
         self.jobs_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.jobs_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.jobs_table.setSelectionMode(QTableWidget.ExtendedSelection)
         self.jobs_table.setEditTriggers(QTableWidget.NoEditTriggers)
         self.jobs_table.doubleClicked.connect(self.show_job_detail)
 
+        # Sorted and paged by the database: header clicks re-query, and scrolling
+        # to the bottom fetches the next page
+        self.job_sort = ('posted_date', True)
+        self.jobs_after = None
+        self.jobs_table.horizontalHeader().setSortIndicatorShown(True)
+        self.jobs_table.horizontalHeader().sectionClicked.connect(self.sort_jobs)
+        self.jobs_table.verticalScrollBar().valueChanged.connect(self.fetch_more_jobs)
+
+        self.jobs_table.setMouseTracking(True)  # for itemEntered
+        self.jobs_table.itemEntered.connect(lambda item: self.schedule_prefetch('jobs', item.row()))
+        self.jobs_table.itemSelectionChanged.connect(
+            lambda: self.schedule_prefetch('jobs', self.jobs_table.currentRow()))
+
         jobs_layout.addWidget(self.jobs_table)
 
         # Action buttons for jobs
@@ -871,6 +1071,10 @@ class JobMarketplaceApp(QMainWindow):
             apply_job_button = QPushButton("Apply for Job")
             apply_job_button.clicked.connect(self.apply_for_job)
             job_actions_layout.addWidget(apply_job_button)
+
+            save_search_button = QPushButton("Save Search")
+            save_search_button.clicked.connect(self.save_search)
+            job_actions_layout.addWidget(save_search_button)
         else:  # provider
             view_applications_button = QPushButton("View Applications")
             view_applications_button.clicked.connect(self.view_job_applications)
@@ -883,10 +1087,9 @@ class JobMarketplaceApp(QMainWindow):
         jobs_layout.addLayout(job_actions_layout)
 
         jobs_tab.setLayout(jobs_layout)
-        self.tabs.addTab(jobs_tab, "Jobs")
+        self.load_jobs()
 
-        # Applications tab
-        applications_tab = QWidget()
+    def build_applications_tab(self, applications_tab):
         applications_layout = QVBoxLayout()
 
         applications_title = QLabel("Applications")
@@ -900,17 +1103,22 @@ class JobMarketplaceApp(QMainWindow):
         applications_controls_layout = QHBoxLayout()
 
         refresh_apps_button = QPushButton("Refresh")
-        refresh_apps_button.clicked.connect(self.load_applications)
+        refresh_apps_button.clicked.connect(self.poll_changes)
         applications_controls_layout.addWidget(refresh_apps_button)
 
+        self.include_archived_applications = QCheckBox("Include archived")
+        self.include_archived_applications.toggled.connect(self.load_applications)
+        applications_controls_layout.addWidget(self.include_archived_applications)
+
         applications_controls_layout.addStretch()
 
         applications_layout.addLayout(applications_controls_layout)
 
         self.applications_table = QTableWidget()
         if self.user_data['user_type'] == 'provider':
-            self.applications_table.setColumnCount(5)
-            self.applications_table.setHorizontalHeaderLabels(["ID", "Job Title", "Applicant", "Date", "Status"])
+            self.applications_table.setColumnCount(6)
+            self.applications_table.setHorizontalHeaderLabels(
+                ["ID", "Job Title", "Applicant", "Date", "Status", "Score"])
         else:  # seeker
             self.applications_table.setColumnCount(5)
             self.applications_table.setHorizontalHeaderLabels(["ID", "Job Title", "Company", "Date", "Status"])
@@ -920,6 +1128,17 @@ class JobMarketplaceApp(QMainWindow):
         self.applications_table.setEditTriggers(QTableWidget.NoEditTriggers)
         self.applications_table.doubleClicked.connect(self.show_application_detail)
 
+        self.application_sort = ('date', True)
+        self.applications_after = None
+        self.applications_table.horizontalHeader().setSortIndicatorShown(True)
+        self.applications_table.horizontalHeader().sectionClicked.connect(self.sort_applications)
+        self.applications_table.verticalScrollBar().valueChanged.connect(self.fetch_more_applications)
+
+        self.applications_table.setMouseTracking(True)  # for itemEntered
+        self.applications_table.itemEntered.connect(lambda item: self.schedule_prefetch('applications', item.row()))
+        self.applications_table.itemSelectionChanged.connect(
+            lambda: self.schedule_prefetch('applications', self.applications_table.currentRow()))
+
         applications_layout.addWidget(self.applications_table)
 
         # Action buttons for applications
@@ -932,16 +1151,277 @@ class JobMarketplaceApp(QMainWindow):
         applications_layout.addLayout(app_actions_layout)
 
         applications_tab.setLayout(applications_layout)
-        self.tabs.addTab(applications_tab, "Applications")
+        self.load_applications()
 
-        main_layout.addWidget(self.tabs)
+    def build_analytics_tab(self, analytics_tab):
+        analytics_layout = QVBoxLayout()
+
+        analytics_title = QLabel("Hiring Funnel")
+        analytics_title_font = QFont()
+        analytics_title_font.setPointSize(14)
+        analytics_title_font.setBold(True)
+        analytics_title.setFont(analytics_title_font)
+        analytics_layout.addWidget(analytics_title)
+
+        controls_layout = QHBoxLayout()
+        self.analytics_job = QComboBox()
+        self.analytics_job.addItem("All Jobs", None)
+        for job in self.db_manager.get_jobs({'provider_id': self.user_data['id'], 'include_duplicates': True}):
+            self.analytics_job.addItem(f"{job[1]} (#{job[0]})", job[0])
+        self.analytics_job.currentIndexChanged.connect(self.load_analytics)
+        controls_layout.addWidget(self.analytics_job)
+        controls_layout.addStretch()
+        analytics_layout.addLayout(controls_layout)
+
+        # Funnel totals: applications reaching each stage
+        self.funnel_table = QTableWidget()
+        self.funnel_table.setColumnCount(4)
+        self.funnel_table.setHorizontalHeaderLabels(["Stage", "Applications", "Of Applied", "Avg. Days to Reach"])
+        self.funnel_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.funnel_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        analytics_layout.addWidget(self.funnel_table)
+
+        activity_group = QGroupBox(f"Daily Activity (last {ANALYTICS_DAYS} days)")
+        activity_layout = QVBoxLayout()
+        self.activity_table = QTableWidget()
+        self.activity_table.setColumnCount(len(FUNNEL_STAGES) + 1)
+        self.activity_table.setHorizontalHeaderLabels(["Date"] + FUNNEL_STAGES)
+        self.activity_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.activity_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        activity_layout.addWidget(self.activity_table)
+        activity_group.setLayout(activity_layout)
+        analytics_layout.addWidget(activity_group)
+
+        analytics_tab.setLayout(analytics_layout)
+        self.load_analytics()
+
+    def load_analytics(self):
+        job_id = self.analytics_job.currentData()
+        funnel = self.db_manager.get_application_funnel(self.user_data['id'], job_id)
+        applied = funnel['Applied'][0]
+        self.funnel_table.setRowCount(0)
+        for row, stage in enumerate(FUNNEL_STAGES):
+            reached, seconds = funnel[stage]
+            self.funnel_table.insertRow(row)
+            self.funnel_table.setItem(row, 0, QTableWidgetItem(stage))
+            self.funnel_table.setItem(row, 1, QTableWidgetItem(str(reached)))
+            self.funnel_table.setItem(row, 2, QTableWidgetItem(f"{reached / applied:.0%}" if applied else ""))
+            days = "" if seconds is None or stage == 'Applied' else f"{seconds / 86400:.1f}"
+            self.funnel_table.setItem(row, 3, QTableWidgetItem(days))
+
+        # Newest day first
+        start = int(time.time()) - (ANALYTICS_DAYS - 1) * 86400
+        activity = self.db_manager.get_application_activity(self.user_data['id'], start, job_id=job_id)
+        self.activity_table.setRowCount(0)
+        for row, (day, counts) in enumerate(reversed(activity)):
+            self.activity_table.insertRow(row)
+            # Rollup days are UTC days
+            self.activity_table.setItem(row, 0, QTableWidgetItem(time.strftime("%Y-%m-%d", time.gmtime(day))))
+            for column, stage in enumerate(FUNNEL_STAGES, 1):
+                self.activity_table.setItem(row, column, QTableWidgetItem(str(counts.get(stage, 0))))
+
+    def sweep_expired_jobs(self):
+        # One bounded chunk per tick keeps the UI responsive; tick faster while
+        # expired jobs remain. Then housekeeping starts on the worker, unless
+        # a run is still going.
+        backlog = self.db_manager.sweep_expired_jobs(max_chunks=1)
+        if not backlog and not self.housekeeping_running:
+            self.housekeeping_running = True
+            self.housekeeping_worker.submit(self.housekeeping).add_done_callback(self.housekeeping_done.emit)
+        self.sweep_timer.setInterval(SWEEP_BACKLOG_INTERVAL_MS if backlog else SWEEP_INTERVAL_MS)
+
+    def housekeeping(self):
+        # Runs on the housekeeping worker: pruning, attachment GC, a batch of
+        # plaintext passwords to hash, statistics, one step of incremental
+        # vacuum and a WAL checkpoint. A failed step (say "database is locked"
+        # while another process writes) is reported and the others still run;
+        # the next run tries it again. Returns whether vacuum or hashing have
+        # more to do.
+        if self.housekeeping_db is None:
+            self.housekeeping_db = self.db_manager.reopen()
+        db_manager = self.housekeeping_db
+        results = {}
+        for step in (db_manager.prune_change_log, db_manager.prune_sessions, db_manager.gc_attachments,
+                     db_manager.hash_plaintext_passwords, db_manager.run_maintenance):
+            try:
+                results[step.__name__] = step()
+            except (sqlite3.Error, OSError) as error:
+                logger.warning("housekeeping: %s failed: %s", step.__name__, error)
+        maintenance = results.get('run_maintenance')
+        return (results.get('hash_plaintext_passwords') == PASSWORD_HASH_BATCH
+                or bool(maintenance and maintenance['pending'] and sum(maintenance['vacuumed'].values())))
+
+    def finish_housekeeping(self, future):
+        # Runs on the UI thread, where an exception would abort the app: a
+        # failed run is only reported, and the next tick starts another one.
+        # Further runs follow quickly while vacuum or hashing have more to do.
+        self.housekeeping_running = False
+        error = future.exception()
+        if error is not None:
+            logger.warning("housekeeping failed", exc_info=error)
+        elif future.result():
+            self.sweep_timer.setInterval(SWEEP_BACKLOG_INTERVAL_MS)
+
+    def stop_housekeeping(self):
+        # Waits for a running step, then closes the worker's connections
+        self.sweep_timer.stop()
+        if self.housekeeping_db is not None:
+            self.housekeeping_worker.submit(self.housekeeping_db.close)
+        self.housekeeping_worker.shutdown()
+
+    def poll_changes(self):
+        if not self.db_manager.changes_pending():
+            return
+        self.change_seq, changed = self.db_manager.changes_since(self.change_seq)
+        self.forget_details(changed)
+        if changed is None:
+            # Fell behind the retained log: reload everything
+            self.refresh_dashboard()
+            if JOBS_TAB in self.built_tabs:
+                self.reload_jobs(facets=True)
+            if APPLICATIONS_TAB in self.built_tabs:
+                self.reload_applications()
+            if ANALYTICS_TAB in self.built_tabs:
+                self.load_analytics()
+            return
+        if not changed['jobs']:
+            return
 
-        main_widget.setLayout(main_layout)
-        self.setCentralWidget(main_widget)
+        self.refresh_dashboard()
+        if ANALYTICS_TAB in self.built_tabs and changed['applications']:
+            self.load_analytics()
+        # Facet counts are left as they are until the next search
+        if JOBS_TAB in self.built_tabs:
+            jobs = self.db_manager.get_jobs(dict(self.job_filters, ids=changed['jobs']))
+            self.apply_row_changes(self.jobs_table, changed['jobs'], jobs, self.job_sort_key,
+                                   self.job_sort[1], self.jobs_after is not None, self.set_job_row)
+        if APPLICATIONS_TAB in self.built_tabs and changed['applications']:
+            if self.application_sort[0] == 'score':
+                # New and changed applications need scoring before they can be placed
+                self.db_manager.score_applications(self.application_filters['job_id'])
+            applications = self.db_manager.get_applications(
+                dict(self.application_filters, ids=changed['applications']))
+            self.apply_row_changes(self.applications_table, changed['applications'], applications,
+                                   self.application_sort_key, self.application_sort[1],
+                                   self.applications_after is not None, self.set_application_row)
+
+    def apply_row_changes(self, table, changed_ids, rows, sort_key, descending, more_pages, set_row):
+        # `rows` are the changed rows that still match the table's filters: update
+        # those already shown, drop the changed ones that no longer match, and
+        # insert the rest where they sort. Rows that sort after the last loaded
+        # row are left to the page that will fetch them.
+        rows_by_id = {row[0]: row for row in rows}
+        for index in reversed(range(table.rowCount())):
+            row_id = int(table.item(index, 0).text())
+            if row_id in changed_ids:
+                if row_id in rows_by_id:
+                    set_row(index, rows_by_id.pop(row_id))
+                else:
+                    table.removeRow(index)
+
+        for row in rows_by_id.values():
+            key = sort_key(row)
+            low, high = 0, table.rowCount()
+            while low < high:
+                middle = (low + high) // 2
+                middle_key = table.item(middle, 0).data(Qt.UserRole)
+                if middle_key > key if descending else middle_key < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == table.rowCount() and more_pages:
+                continue
+            table.insertRow(low)
+            set_row(low, row)
+
+    def schedule_prefetch(self, kind, row):
+        # Restarting the timer coalesces a run of selection and hover changes
+        if row < 0:
+            return
+        self.prefetch_target = (kind, row)
+        self.prefetch_timer.start(DETAIL_PREFETCH_DELAY_MS)
 
-        # Load data
-        self.load_jobs()
-        self.load_applications()
+    def prefetch_details(self):
+        kind, row = self.prefetch_target
+        if kind == 'jobs':
+            table, include_archived = self.jobs_table, self.include_archived_jobs.isChecked()
+        else:
+            table, include_archived = self.applications_table, bool(self.application_filters.get('include_archived'))
+        rows = range(max(row - DETAIL_PREFETCH_NEIGHBOURS, 0),
+                     min(row + DETAIL_PREFETCH_NEIGHBOURS + 1, table.rowCount()))
+        missing = [row_id for row_id in (int(table.item(index, 0).text()) for index in rows)
+                   if (kind, row_id, include_archived) not in self.detail_cache]
+        if missing:
+            self.prefetch_worker.submit(self.fetch_details, kind, missing, include_archived,
+                                        self.detail_generation).add_done_callback(self.prefetch_done.emit)
+
+    def fetch_details(self, kind, ids, include_archived, generation):
+        # Runs on the prefetch worker; finish_prefetch caches the records
+        if self.prefetch_db is None:
+            self.prefetch_db = self.db_manager.reopen()
+        return kind, include_archived, generation, read_details(self.prefetch_db, kind, ids, include_archived)
+
+    def finish_prefetch(self, future):
+        # A failed prefetch only means the dialog reads the record itself
+        error = future.exception()
+        if error is not None:
+            logger.warning("detail prefetch failed", exc_info=error)
+            return
+        kind, include_archived, generation, fetched = future.result()
+        if generation == self.detail_generation:
+            self.cache_details(kind, include_archived, fetched)
+
+    def stop_prefetch(self):
+        # Waits for a running prefetch, then closes the worker's connections
+        self.prefetch_timer.stop()
+        if self.prefetch_db is not None:
+            self.prefetch_worker.submit(self.prefetch_db.close)
+        self.prefetch_worker.shutdown()
+
+    def cached_details(self, kind, ids, include_archived=False):
+        # Full records ('jobs' as from get_job_by_id, 'applications' as from
+        # get_applications) of those of `ids` that exist, by id. Records not in
+        # the cache are read in one query and cached.
+        missing = [row_id for row_id in ids if (kind, row_id, include_archived) not in self.detail_cache]
+        fetched = read_details(self.db_manager, kind, missing, include_archived) if missing else {}
+
+        details = {}
+        for row_id in ids:
+            key = (kind, row_id, include_archived)
+            if key in self.detail_cache:
+                self.detail_cache.move_to_end(key)
+                details[row_id] = self.detail_cache[key]
+            elif row_id in fetched:
+                details[row_id] = fetched[row_id]
+        self.cache_details(kind, include_archived, fetched)
+        return details
+
+    def cache_details(self, kind, include_archived, fetched):
+        for row_id, record in fetched.items():
+            self.detail_cache[(kind, row_id, include_archived)] = record
+            self.detail_cache.move_to_end((kind, row_id, include_archived))
+        while len(self.detail_cache) > DETAIL_CACHE_SIZE:
+            self.detail_cache.popitem(last=False)
+
+    def forget_details(self, changed):
+        # Drop cached records of rows the change log names; all of them when
+        # `changed` is None (fell behind the log)
+        self.detail_generation += 1
+        if changed is None:
+            self.detail_cache.clear()
+            return
+        for key in [key for key in self.detail_cache if key[1] in changed[key[0]]]:
+            del self.detail_cache[key]
+
+    def refresh_dashboard(self):
+        if DASHBOARD_TAB not in self.built_tabs:
+            return
+        self.load_dashboard()
+        if self.user_data['user_type'] == 'provider':
+            self.load_recent_applications()
+        else:
+            self.load_recent_jobs()
+            self.load_notifications()
 
     def load_dashboard(self):
         # Clear existing stats
@@ -991,6 +1471,19 @@ class JobMarketplaceApp(QMainWindow):
         status_group.setLayout(status_layout)
         self.stats_layout.addWidget(status_group)
 
+        if self.user_data['user_type'] == 'seeker':
+            alerts_group = QGroupBox("New Job Alerts")
+            alerts_layout = QVBoxLayout()
+            alerts_label = QLabel(str(stats.get('unread_notifications', 0)))
+            alerts_label.setAlignment(Qt.AlignCenter)
+            alerts_font = QFont()
+            alerts_font.setPointSize(24)
+            alerts_font.setBold(True)
+            alerts_label.setFont(alerts_font)
+            alerts_layout.addWidget(alerts_label)
+            alerts_group.setLayout(alerts_layout)
+            self.stats_layout.addWidget(alerts_group)
+
     def load_recent_applications(self):
         # Clear table
         self.recent_applications.setRowCount(0)
@@ -1007,7 +1500,7 @@ class JobMarketplaceApp(QMainWindow):
             self.recent_applications.setItem(row, 0, QTableWidgetItem(str(app[0])))
             self.recent_applications.setItem(row, 1, QTableWidgetItem(app[2]))
             self.recent_applications.setItem(row, 2, QTableWidgetItem(app[4]))
-            self.recent_applications.setItem(row, 3, QTableWidgetItem(app[6]))
+            self.recent_applications.setItem(row, 3, QTableWidgetItem(format_timestamp(app[6])))
             self.recent_applications.setItem(row, 4, QTableWidgetItem(app[7]))
 
     def load_recent_jobs(self):
@@ -1026,67 +1519,231 @@ class JobMarketplaceApp(QMainWindow):
             self.recent_jobs.setItem(row, 0, QTableWidgetItem(str(job[0])))
             self.recent_jobs.setItem(row, 1, QTableWidgetItem(job[1]))
             self.recent_jobs.setItem(row, 2, QTableWidgetItem(job[2]))
-            salary_item = QTableWidgetItem(f"${job[3]:,.2f}")
+            salary_item = QTableWidgetItem(format_salary(job[10], job[11]))
             salary_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             self.recent_jobs.setItem(row, 3, salary_item)
             self.recent_jobs.setItem(row, 4, QTableWidgetItem(job[4]))
 
+    def load_notifications(self):
+        self.notifications_table.setRowCount(0)
+        for row, notification in enumerate(self.db_manager.get_notifications(self.user_data['id'])):
+            self.notifications_table.insertRow(row)
+            self.notifications_table.setItem(row, 0, QTableWidgetItem(str(notification[1])))
+            self.notifications_table.setItem(row, 1, QTableWidgetItem(notification[2]))
+            self.notifications_table.setItem(row, 2, QTableWidgetItem(notification[3]))
+            self.notifications_table.setItem(row, 3, QTableWidgetItem(notification[4]))
+            self.notifications_table.setItem(row, 4, QTableWidgetItem(format_timestamp(notification[5])))
+            if not notification[6]:
+                # Unread alerts in bold
+                font = QFont()
+                font.setBold(True)
+                for column in range(self.notifications_table.columnCount()):
+                    self.notifications_table.item(row, column).setFont(font)
+
+        selected = self.saved_searches_combo.currentData()
+        self.saved_searches_combo.clear()
+        for search_id, name, _, _ in self.db_manager.get_saved_searches(self.user_data['id']):
+            self.saved_searches_combo.addItem(name, search_id)
+        index = self.saved_searches_combo.findData(selected)
+        if index >= 0:
+            self.saved_searches_combo.setCurrentIndex(index)
+
+    def show_notification_job(self):
+        selected_rows = self.notifications_table.selectionModel().selectedRows()
+        if not selected_rows:
+            return
+        job_data = self.db_manager.get_job_by_id(int(self.notifications_table.item(selected_rows[0].row(), 0).text()))
+        if job_data:
+            JobDetailDialog(job_data, self).exec_()
+
+    def mark_notifications_read(self):
+        self.db_manager.mark_notifications_read(self.user_data['id'])
+        self.refresh_dashboard()
+
+    def delete_saved_search(self):
+        search_id = self.saved_searches_combo.currentData()
+        if search_id is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Confirm Deletion",
+            f"Delete the saved search \"{self.saved_searches_combo.currentText()}\" and its alerts?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.db_manager.delete_saved_search(search_id, self.user_data['id'])
+            self.refresh_dashboard()
+
     def load_jobs(self):
-        # Clear table
-        self.jobs_table.setRowCount(0)
+        if JOBS_TAB not in self.built_tabs:
+            return
 
         # Get filtered jobs
-        filters = {}
+        filters = {'include_archived': self.include_archived_jobs.isChecked()}
         if self.user_data['user_type'] == 'provider':
+            # Providers see all their own postings, duplicates included
             filters['provider_id'] = self.user_data['id']
+            filters['include_duplicates'] = True
 
-        jobs = self.db_manager.get_jobs(filters)
+        self.job_filters = filters
+        self.reload_jobs(facets=True)
 
-        # Populate table
-        for row, job in enumerate(jobs):
-            self.jobs_table.insertRow(row)
-            self.jobs_table.setItem(row, 0, QTableWidgetItem(str(job[0])))
-            self.jobs_table.setItem(row, 1, QTableWidgetItem(job[1]))
-            self.jobs_table.setItem(row, 2, QTableWidgetItem(job[2]))
-            salary_item = QTableWidgetItem(f"${job[3]:,.2f}")
-            salary_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.jobs_table.setItem(row, 3, salary_item)
-            self.jobs_table.setItem(row, 4, QTableWidgetItem(job[4]))
-            self.jobs_table.setItem(row, 5, QTableWidgetItem(job[6]))
+    def reload_jobs(self, facets=False):
+        # First page in the current sort order, and optionally fresh facet counts
+        sort, descending = self.job_sort
+        if facets:
+            jobs, self.jobs_after, counts = self.db_manager.search_jobs(self.job_filters, sort, descending)
+            self.update_facets(counts)
+        else:
+            jobs, self.jobs_after = self.db_manager.get_jobs_page(self.job_filters, sort, descending)
+        self.jobs_table.setRowCount(0)
+        self.append_rows(self.jobs_table, jobs, self.set_job_row)
+        self.show_sort_indicator(self.jobs_table, JOB_SORT_COLUMNS, self.job_sort)
+
+    def sort_jobs(self, column):
+        sort = self.next_sort(JOB_SORT_COLUMNS.get(column), self.job_sort)
+        if sort:
+            self.job_sort = sort
+            self.reload_jobs()
+        self.show_sort_indicator(self.jobs_table, JOB_SORT_COLUMNS, self.job_sort)
+
+    def fetch_more_jobs(self, value):
+        if self.jobs_after is None or value < self.jobs_table.verticalScrollBar().maximum():
+            return
+        jobs, self.jobs_after = self.db_manager.get_jobs_page(self.job_filters, *self.job_sort,
+                                                              after=self.jobs_after)
+        self.append_rows(self.jobs_table, jobs, self.set_job_row)
+
+    def next_sort(self, sort, current):
+        # Clicking the sorted column reverses it; another sortable column starts
+        # in its natural direction. None for columns that cannot be sorted.
+        if sort is None:
+            return None
+        if sort == current[0]:
+            return sort, not current[1]
+        return sort, sort not in ASCENDING_FIRST_SORTS
+
+    def show_sort_indicator(self, table, sort_columns, current):
+        # The header moves the indicator on every click; put it back on the sort in effect
+        column = next(column for column, sort in sort_columns.items() if sort == current[0])
+        table.horizontalHeader().setSortIndicator(column, Qt.DescendingOrder if current[1] else Qt.AscendingOrder)
+
+    def append_rows(self, table, rows, set_row):
+        for row in rows:
+            index = table.rowCount()
+            table.insertRow(index)
+            set_row(index, row)
+
+    def job_sort_key(self, job):
+        return row_sort_key(JOB_SORTS, self.job_sort[0], job)
+
+    def set_job_row(self, row, job):
+        id_item = QTableWidgetItem(str(job[0]))
+        # Sort key, for placing rows added by the change feed
+        id_item.setData(Qt.UserRole, self.job_sort_key(job))
+        self.jobs_table.setItem(row, 0, id_item)
+        self.jobs_table.setItem(row, 1, QTableWidgetItem(job[1]))
+        self.jobs_table.setItem(row, 2, QTableWidgetItem(job[2]))
+        salary_item = QTableWidgetItem(format_salary(job[10], job[11]))
+        salary_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.jobs_table.setItem(row, 3, salary_item)
+        self.jobs_table.setItem(row, 4, QTableWidgetItem(job[4]))
+        self.jobs_table.setItem(row, 5, QTableWidgetItem(format_timestamp(job[6])))
 
-            if self.user_data['user_type'] == 'provider':
-                self.jobs_table.setItem(row, 6, QTableWidgetItem(str(job[9])))
+        if self.user_data['user_type'] == 'provider':
+            self.jobs_table.setItem(row, 6, QTableWidgetItem(str(job[9])))
+
+    def update_facets(self, facets):
+        self.update_facet_combo(self.search_type, facets['job_type'])
+        self.update_facet_combo(self.search_category, facets['category'])
+        self.update_facet_combo(self.search_location, facets['location'])
+
+        buckets = [f"{label} ({facets['salary'][label]})" for _, label in SALARY_BUCKETS
+                   if facets['salary'][label]]
+        self.salary_facets_label.setText("Salary: " + ", ".join(buckets) if buckets else "")
+
+    def update_facet_combo(self, combo, counts):
+        # Rebuild the combo as "value (count)" entries, keeping the current selection
+        selected = combo.currentData()
+        combo.blockSignals(True)
+        while combo.count() > 1:
+            combo.removeItem(1)
+
+        for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            combo.addItem(f"{value} ({count})", value)
+
+        index = combo.findData(selected) if selected is not None else 0
+        if index < 0:
+            combo.addItem(f"{selected} (0)", selected)
+            index = combo.count() - 1
+        combo.setCurrentIndex(index)
+        combo.blockSignals(False)
 
     def load_applications(self):
-        # Clear table
-        self.applications_table.setRowCount(0)
+        if APPLICATIONS_TAB not in self.built_tabs:
+            return
 
         # Get applications
-        filters = {}
+        filters = {'include_archived': self.include_archived_applications.isChecked()}
         if self.user_data['user_type'] == 'provider':
             filters['provider_id'] = self.user_data['id']
         else:  # seeker
             filters['seeker_id'] = self.user_data['id']
 
-        applications = self.db_manager.get_applications(filters)
+        self.application_filters = filters
+        if self.application_sort[0] == 'score':
+            self.application_sort = ('date', True)
+        self.reload_applications()
 
-        # Populate table
-        for row, app in enumerate(applications):
-            self.applications_table.insertRow(row)
-            self.applications_table.setItem(row, 0, QTableWidgetItem(str(app[0])))
-            self.applications_table.setItem(row, 1, QTableWidgetItem(app[2]))
+    def reload_applications(self):
+        self.applications_table.setRowCount(0)
+        applications, self.applications_after = self.db_manager.get_applications_page(
+            self.application_filters, *self.application_sort)
+        self.append_rows(self.applications_table, applications, self.set_application_row)
+        self.show_sort_indicator(self.applications_table, APPLICATION_SORT_COLUMNS, self.application_sort)
+
+    def sort_applications(self, column):
+        sort = self.next_sort(APPLICATION_SORT_COLUMNS.get(column), self.application_sort)
+        # Scores are only comparable within one job
+        if sort and (sort[0] != 'score' or self.application_filters.get('job_id')):
+            self.application_sort = sort
+            self.reload_applications()
+        self.show_sort_indicator(self.applications_table, APPLICATION_SORT_COLUMNS, self.application_sort)
+
+    def fetch_more_applications(self, value):
+        if self.applications_after is None or value < self.applications_table.verticalScrollBar().maximum():
+            return
+        applications, self.applications_after = self.db_manager.get_applications_page(
+            self.application_filters, *self.application_sort, after=self.applications_after)
+        self.append_rows(self.applications_table, applications, self.set_application_row)
 
-            if self.user_data['user_type'] == 'provider':
-                self.applications_table.setItem(row, 2, QTableWidgetItem(app[4]))  # applicant name
-            else:  # seeker
-                self.applications_table.setItem(row, 2, QTableWidgetItem(app[3]))  # company
+    def application_sort_key(self, app):
+        return row_sort_key(APPLICATION_SORTS, self.application_sort[0], app)
 
-            self.applications_table.setItem(row, 3, QTableWidgetItem(app[6]))
-            self.applications_table.setItem(row, 4, QTableWidgetItem(app[7]))
+    def set_application_row(self, row, app):
+        id_item = QTableWidgetItem(str(app[0]))
+        # Sort key, for placing rows added by the change feed
+        id_item.setData(Qt.UserRole, self.application_sort_key(app))
+        self.applications_table.setItem(row, 0, id_item)
+        self.applications_table.setItem(row, 1, QTableWidgetItem(app[2]))
+
+        if self.user_data['user_type'] == 'provider':
+            self.applications_table.setItem(row, 2, QTableWidgetItem(app[4]))  # applicant name
+        else:  # seeker
+            self.applications_table.setItem(row, 2, QTableWidgetItem(app[3]))  # company
+
+        self.applications_table.setItem(row, 3, QTableWidgetItem(format_timestamp(app[6])))
+        self.applications_table.setItem(row, 4, QTableWidgetItem(app[7]))
+
+        if self.user_data['user_type'] == 'provider':
+            score_item = QTableWidgetItem("" if app[11] is None else f"{app[11]:.0f}")
+            score_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.applications_table.setItem(row, 5, score_item)
 
     def search_jobs(self):
         # Get search parameters
-        filters = {}
+        filters = {'include_archived': self.include_archived_jobs.isChecked()}
 
         title = self.search_title.text().strip()
         if title:
@@ -1096,9 +1753,20 @@ class JobMarketplaceApp(QMainWindow):
         if company:
             filters['company'] = company
 
-        job_type = self.search_type.currentText()
-        if job_type != "All":
-            filters['job_type'] = job_type
+        for field, combo in (('job_type', self.search_type),
+                             ('category', self.search_category),
+                             ('location', self.search_location)):
+            if combo.currentData() is not None:
+                filters[field] = combo.currentData()
+
+        if 'location' in filters and self.search_radius.value() > 0:
+            location = parse_location(filters['location'])
+            if location[3] is None:
+                QMessageBox.warning(self, "Search", f"No coordinates are known for {filters['location']}")
+                return
+            filters['near'] = (location[3], location[4])
+            filters['within_km'] = self.search_radius.value()
+            del filters['location']
 
         min_salary = self.min_salary.value()
         if min_salary > 0:
@@ -1110,33 +1778,32 @@ class JobMarketplaceApp(QMainWindow):
 
         if self.user_data['user_type'] == 'provider':
             filters['provider_id'] = self.user_data['id']
-
-        # Clear table
-        self.jobs_table .setRowCount(0)
-
-        # Get filtered jobs
-        jobs = self.db_manager.get_jobs(filters)
-
-        # Populate table with search results
-        for row, job in enumerate(jobs):
-            self.jobs_table.insertRow(row)
-            self.jobs_table.setItem(row, 0, QTableWidgetItem(str(job[0])))
-            self.jobs_table.setItem(row, 1, QTableWidgetItem(job[1]))
-            self.jobs_table.setItem(row, 2, QTableWidgetItem(job[2]))
-            salary_item = QTableWidgetItem(f"${job[3]:,.2f}")
-            salary_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.jobs_table.setItem(row, 3, salary_item)
-            self.jobs_table.setItem(row, 4, QTableWidgetItem(job[4]))
-            self.jobs_table.setItem(row, 5, QTableWidgetItem(job[6]))
-
-            if self.user_data['user_type'] == 'provider':
-                self.jobs_table.setItem(row, 6, QTableWidgetItem(str(job[9])))
+            filters['include_duplicates'] = True
+
+        # Get filtered jobs along with facet counts for refining the search
+        self.job_filters = filters
+        self.reload_jobs(facets=True)
+
+    def save_search(self):
+        # Saves the filters of the last search; matching jobs posted from now on
+        # show up under Job Alerts on the dashboard
+        name, ok = QInputDialog.getText(self, "Save Search", "Name for this search:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        self.db_manager.save_search(self.user_data['id'], name, self.job_filters)
+        self.refresh_dashboard()
+        QMessageBox.information(self, "Search Saved",
+                                "You will be alerted on the dashboard when new jobs match this search")
 
     def reset_job_search(self):
         # Clear search fields
         self.search_title.clear()
         self.search_company.clear()
         self.search_type.setCurrentIndex(0)
+        self.search_category.setCurrentIndex(0)
+        self.search_location.setCurrentIndex(0)
+        self.search_radius.setValue(0)
         self.min_salary.setValue(0)
         self.max_salary.setValue(200000)
 
@@ -1150,7 +1817,7 @@ class JobMarketplaceApp(QMainWindow):
             return
 
         job_id = int(self.jobs_table.item(selected_rows[0].row(), 0).text())
-        job_data = self.db_manager.get_job_by_id(job_id)
+        job_data = self.cached_details('jobs', [job_id], self.include_archived_jobs.isChecked()).get(job_id)
 
         if job_data:
             dialog = JobDetailDialog(job_data, self)
@@ -1165,14 +1832,15 @@ class JobMarketplaceApp(QMainWindow):
             QMessageBox.warning(self, "No Selection", "Please select a job to apply for")
             return
 
-        job_id = int(self.jobs_table.item(selected_rows[0].row(), 0).text())
-        job_data = self.db_manager.get_job_by_id(job_id)
+        # Every selected job gets the same cover letter
+        job_ids = [int(self.jobs_table.item(index.row(), 0).text()) for index in selected_rows]
+        details = self.cached_details('jobs', job_ids)
+        jobs_data = [details[job_id] for job_id in job_ids if job_id in details]
 
-        if job_data:
-            dialog = ApplicationDialog(job_data, self.user_data, self.db_manager, self)
+        if jobs_data:
+            dialog = ApplicationDialog(jobs_data, self.user_data, self.db_manager, self)
             if dialog.exec_() == QDialog.Accepted:
-                self.load_applications()
-                self.load_jobs()  # Refresh job list to update application counts
+                self.poll_changes()  # New applications and updated application counts
 
     def show_post_job_dialog(self):
         if self.user_data['user_type'] != 'provider':
@@ -1180,8 +1848,7 @@ class JobMarketplaceApp(QMainWindow):
 
         dialog = JobPostingDialog(self.user_data, self.db_manager, self)
         if dialog.exec_() == QDialog.Accepted:
-            self.load_jobs()
-            self.load_dashboard()
+            self.poll_changes()
 
     def delete_job(self):
         if self.user_data['user_type'] != 'provider':
@@ -1192,23 +1859,29 @@ class JobMarketplaceApp(QMainWindow):
             QMessageBox.warning(self, "No Selection", "Please select a job to delete")
             return
 
-        job_id = int(self.jobs_table.item(selected_rows[0].row(), 0).text())
+        job_ids = [int(self.jobs_table.item(index.row(), 0).text()) for index in selected_rows]
+
+        if len(job_ids) == 1:
+            question = ("Are you sure you want to delete this job listing? "
+                        "This will also delete all applications for this job.")
+        else:
+            question = (f"Are you sure you want to delete these {len(job_ids)} job listings? "
+                        "This will also delete all applications for them.")
 
         reply = QMessageBox.question(
             self,
             "Confirm Deletion",
-            "Are you sure you want to delete this job listing? This will also delete all applications for this job.",
+            question,
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
 
         if reply == QMessageBox.Yes:
-            success = self.db_manager.delete_job(job_id, self.user_data['id'])
-            if success:
-                QMessageBox.information(self, "Success", "Job deleted successfully")
-                self.load_jobs()
-                self.load_applications()
-                self.load_dashboard()
+            deleted = self.db_manager.delete_jobs(job_ids, self.user_data['id'])
+            if deleted:
+                QMessageBox.information(self, "Success",
+                                        "Job deleted successfully" if deleted == 1 else f"{deleted} jobs deleted")
+                self.poll_changes()
             else:
                 QMessageBox.warning(self, "Error", "Failed to delete job")
 
@@ -1224,22 +1897,16 @@ class JobMarketplaceApp(QMainWindow):
         job_id = int(self.jobs_table.item(selected_rows[0].row(), 0).text())
 
         # Switch to applications tab and filter by job_id
-        self.tabs.setCurrentIndex(2)  # Applications tab
-
-        # Clear table
-        self.applications_table.setRowCount(0)
-
-        # Get applications for this job
-        applications = self.db_manager.get_applications({'job_id': job_id})
+        self.tabs.setCurrentIndex(APPLICATIONS_TAB)
 
-        # Populate table
-        for row, app in enumerate(applications):
-            self.applications_table.insertRow(row)
-            self.applications_table.setItem(row, 0, QTableWidgetItem(str(app[0])))
-            self.applications_table.setItem(row, 1, QTableWidgetItem(app[2]))
-            self.applications_table.setItem(row, 2, QTableWidgetItem(app[4]))  # applicant name
-            self.applications_table.setItem(row, 3, QTableWidgetItem(app[6]))
-            self.applications_table.setItem(row, 4, QTableWidgetItem(app[7]))
+        # Get applications for this job, best match first
+        self.db_manager.score_applications(job_id)
+        self.application_filters = {
+            'job_id': job_id,
+            'include_archived': self.include_archived_jobs.isChecked(),
+        }
+        self.application_sort = ('score', True)
+        self.reload_applications()
 
     def show_application_detail(self):
         selected_rows = self.applications_table.selectionModel().selectedRows()
@@ -1249,13 +1916,12 @@ class JobMarketplaceApp(QMainWindow):
 
         app_id = int(self.applications_table.item(selected_rows[0].row(), 0).text())
 
-        # Get application data
-        applications = self.db_manager.get_applications({'id': app_id})
-        if applications:
-            dialog = ApplicationStatusDialog(applications[0], self.db_manager, self)
+        application = self.cached_details('applications', [app_id],
+                                          bool(self.application_filters.get('include_archived'))).get(app_id)
+        if application:
+            dialog = ApplicationStatusDialog(application, self.db_manager, self)
             if dialog.exec_() == QDialog.Accepted:
-                self.load_applications()
-                self.load_dashboard()
+                self.poll_changes()
 
     def logout(self):
         reply = QMessageBox.question(
@@ -1267,17 +1933,78 @@ class JobMarketplaceApp(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            self.db_manager.close()
+            # Back to the login dialog (see main); the saved session ends too
+            settings = QSettings()
+            self.db_manager.end_session(settings.value(SESSION_TOKEN_SETTING, ""))
+            settings.remove(SESSION_TOKEN_SETTING)
+            self.logged_out = True
             self.close()
-            # Restart application
-            QApplication.exit(0)
+
+def open_database():
+    # JOB_MARKETPLACE_SNAPSHOT=<seconds> serves reads from an in-memory snapshot
+    # that lags other processes' writes by at most that many seconds, and
+    # JOB_MARKETPLACE_SHARD_MAP=<shards.json> splits jobs and applications across
+    # the regional shard files it names (see job_marketplace_shards)
+    options = {}
+    snapshot_staleness = os.environ.get('JOB_MARKETPLACE_SNAPSHOT')
+    if snapshot_staleness:
+        options = {'snapshot': True, 'max_staleness': float(snapshot_staleness)}
+    shard_map = os.environ.get('JOB_MARKETPLACE_SHARD_MAP')
+    if shard_map:
+        from job_marketplace_shards import open_sharded
+        return open_sharded('job_marketplace.db', shard_map, **options)
+    return DatabaseManager(**options)
+
 
 def main():
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')  # Modern look across platforms
-    window = JobMarketplaceApp()
-    window.show()
-    sys.exit(app.exec_())
+    # Before any widget is built, so signals connect to the profiled handlers
+    profiler = start_profiling(PROFILE_PATH) if PROFILE_PATH else None
+
+    with startup_phase("create QApplication"):
+        app = QApplication(sys.argv)
+        app.setStyle('Fusion')  # Modern look across platforms
+        app.setOrganizationName(SETTINGS_ORGANIZATION)
+        app.setApplicationName(SETTINGS_APPLICATION)
+
+    with startup_phase("open database"):
+        db_manager = open_database()
+
+    # The session saved by the last login, if still valid, stands in for the
+    # login dialog
+    settings = QSettings()
+    with startup_phase("resume session"):
+        user_data = db_manager.authenticate_session(settings.value(SESSION_TOKEN_SETTING, ""))
+
+    status = 0
+    while True:
+        if user_data is None:
+            # Log in before any of the main window is built
+            with startup_phase("build login dialog"):
+                login_dialog = LoginDialog(db_manager)
+            accepted = login_dialog.exec_() == QDialog.Accepted
+            login_dialog.worker.shutdown()
+            if not accepted:
+                break
+            user_data = login_dialog.user_data
+            settings.setValue(SESSION_TOKEN_SETTING, login_dialog.session_token)
+
+        with startup_phase("build main window"):
+            window = JobMarketplaceApp(db_manager, user_data)
+            window.logged_out = False
+            window.show()
+        # Returns when the window closes, on logout as well
+        status = app.exec_()
+        window.stop_housekeeping()
+        window.stop_prefetch()
+        if not window.logged_out:
+            break
+        window.deleteLater()
+        user_data = None
+
+    db_manager.close()
+    if profiler:
+        profiler.save()
+    sys.exit(status)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Content-addressed file store for application attachments (resumes). Files are
+# named by the SHA-256 of their contents, so the same resume attached to many
+# applications is stored once. The database only keeps the hash.
+
+# Uploads are read, hashed and written in chunks of this size
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+ATTACHMENT_MAX_BYTES = 20 * 1024 * 1024
+
+
+class AttachmentStore:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        # Fan out over 256 directories so none grows too large
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def stage(self, source, max_bytes=ATTACHMENT_MAX_BYTES):
+        # Stream a binary file object into a temporary file in the store, hashing
+        # it on the way. Returns (digest, size, temp_path); publish() moves the
+        # file into place.
+        temp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                while True:
+                    chunk = source.read(ATTACHMENT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"Attachments are limited to {max_bytes // (1024 * 1024)} MB")
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return digest.hexdigest(), size, temp_path
+
+    def publish(self, temp_path, digest):
+        # Atomic; replacing an existing copy is harmless as the contents are equal
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+    @contextmanager
+    def open(self, digest):
+        # Read-only memory map of the file, so previews and copies touch only the
+        # pages they read. Empty files cannot be mapped and read as b"".
+        with open(self.path(digest), 'rb') as attachment:
+            if os.fstat(attachment.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(attachment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view
+
+    def remove(self, digest):
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def digests(self):
+        # (digest, modification time) of every stored file
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                yield prefix + name, os.path.getmtime(os.path.join(directory, name))
+
+    def remove_stale_temp_files(self, older_than):
+        # Left behind by uploads that were interrupted
+        temp_dir = os.path.join(self.root, 'tmp')
+        if not os.path.isdir(temp_dir):
+            return
+        cutoff = time.time() - older_than
+        for name in os.listdir(temp_dir):
+            path = os.path.join(temp_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import hmac
+import secrets
+
+# Password hashing and session tokens. Passwords are stored as
+# "scheme$params$salt$hash" strings: scrypt where the OpenSSL build has it,
+# PBKDF2-SHA256 otherwise. Both are deliberately slow (~0.1 s), so callers with
+# a UI run them off the UI thread (see LoginDialog).
+
+# scrypt cost: 128 * n * r bytes of memory (32 MiB) per hash
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+PBKDF2_ITERATIONS = 600000
+PASSWORD_SALT_BYTES = 16
+PASSWORD_HASH_BYTES = 32
+PASSWORD_SCHEME = 'scrypt' if hasattr(hashlib, 'scrypt') else 'pbkdf2_sha256'
+
+# Session tokens: random, URL-safe, and stored only as their SHA-256 digest
+SESSION_TOKEN_BYTES = 32
+
+# Verified when a username is unknown, so the answer takes as long as for a
+# wrong password
+_unknown_user_hash = None
+
+
+def b64(data):
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def derive_key(scheme, params, password, salt):
+    if scheme == 'scrypt':
+        n, r, p = params
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=SCRYPT_MAXMEM,
+                              dklen=PASSWORD_HASH_BYTES)
+    if scheme == 'pbkdf2_sha256':
+        iterations, = params
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, PASSWORD_HASH_BYTES)
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+
+def current_params(scheme):
+    return (SCRYPT_N, SCRYPT_R, SCRYPT_P) if scheme == 'scrypt' else (PBKDF2_ITERATIONS,)
+
+
+def hash_password(password):
+    salt = secrets.token_bytes(PASSWORD_SALT_BYTES)
+    params = current_params(PASSWORD_SCHEME)
+    key = derive_key(PASSWORD_SCHEME, params, password, salt)
+    return "$".join([PASSWORD_SCHEME, ",".join(map(str, params)), b64(salt), b64(key)])
+
+
+def parse_password_hash(stored):
+    # (scheme, params, salt, key) of a hash_password string, or None for
+    # anything else, e.g. a plaintext password from before hashing
+    parts = stored.split('$')
+    if len(parts) != 4 or parts[0] not in ('scrypt', 'pbkdf2_sha256'):
+        return None
+    scheme, params, salt, key = parts
+    try:
+        params = tuple(int(param) for param in params.split(','))
+        salt, key = unb64(salt), unb64(key)
+    except ValueError:
+        return None
+    if len(params) != len(current_params(scheme)):
+        return None
+    return scheme, params, salt, key
+
+
+def is_hash_shaped(stored):
+    return stored.split('$', 1)[0] in ('scrypt', 'pbkdf2_sha256') and stored.count('$') == 3
+
+
+def check_password(password, stored):
+    # (matches, new_hash): new_hash is set when the password matched a hash
+    # with an older scheme or cost, or a plaintext password from before hashing,
+    # and should replace it. `stored` None (unknown user) never matches, and
+    # neither does a value shaped like a hash that does not parse as one.
+    global _unknown_user_hash
+    if stored is None:
+        if _unknown_user_hash is None:
+            _unknown_user_hash = hash_password(secrets.token_urlsafe())
+        check_password(password, _unknown_user_hash)
+        return False, None
+
+    parsed = parse_password_hash(stored)
+    if parsed is None:
+        if is_hash_shaped(stored):
+            return False, None
+        # Plaintext, left by a client that predates hashing (housekeeping hashes
+        # those in batches, see hash_plaintext_passwords); empty for the user
+        # copies of shards, which never log in
+        matches = bool(stored) and hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+        return matches, hash_password(password) if matches else None
+
+    scheme, params, salt, key = parsed
+    try:
+        matches = hmac.compare_digest(derive_key(scheme, params, password, salt), key)
+    except ValueError:
+        # Costs hashlib rejects, e.g. an scrypt n that is not a power of two
+        return False, None
+    outdated = scheme != PASSWORD_SCHEME or params != current_params(scheme)
+    return matches, hash_password(password) if matches and outdated else None
+
+
+def new_session_token():
+    return secrets.token_urlsafe(SESSION_TOKEN_BYTES)
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
@@ -0,0 +1,251 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from job_marketplace_db import format_salary, format_timestamp
+
+# Static catalog of the current jobs in the jobs_database.json shape (UUID-keyed
+# job objects) for downstream consumers. A catalog directory holds:
+#
+#   manifest.json                  the change sequence number published, and the files below
+#   jobs-<seq>-<shard>.json.gz     the catalog as of the last rebuild, split into shards by UUID
+#   changes-<from>-<to>.json.gz    the jobs written between two publishes; null for removed ones
+#
+# A publish only writes a change file for the jobs in the change log since the
+# previous one. Once the change files hold CATALOG_COMPACT_RATIO of the rebuilt
+# catalog's size, the shards are rebuilt and the change files dropped, so the
+# cost of publishing follows the churn rather than the size of the catalog.
+#
+# Files are written under temporary names and renamed into place, the manifest
+# last, so readers never see part of a publish. The files of the previous
+# manifest are kept until the next publish for readers still on it. Every file
+# is a JSON object with one job per line: json.load reads it, and iter_catalog
+# streams it.
+
+CATALOG_FORMAT = 1
+CATALOG_MANIFEST = 'manifest.json'
+CATALOG_SHARDS = 16
+CATALOG_COMPACT_RATIO = 0.25
+
+# Jobs are published under UUIDs derived from their database ids, so a job
+# keeps its UUID from one publish to the next
+CATALOG_NAMESPACE = uuid.UUID('93202d4d-c040-40d6-b610-333dcc6ac1ed')
+
+
+def job_uuid(job_id):
+    return str(uuid.uuid5(CATALOG_NAMESPACE, str(job_id)))
+
+
+def shard_of(key, shards):
+    return int(key[:8], 16) % shards
+
+
+def catalog_entry(row):
+    # (UUID, feed object) for an iter_catalog_jobs row. Requirements are not
+    # stored, so jobs are published without them.
+    job_id, title, company, location, description, salary_min, salary_max, posted_date, deadline, job_type, \
+        category = row
+    key = job_uuid(job_id)
+    return key, {
+        'id': key,
+        'title': title,
+        'company': company,
+        'location': location,
+        'description': description,
+        'salary': format_salary(salary_min, salary_max),
+        'posted_date': format_timestamp(posted_date, "%Y-%m-%d"),
+        'deadline': deadline,
+        'type': job_type,
+        'category': category,
+    }
+
+
+class CatalogFileWriter:
+    # Streams (UUID, job) entries into a gzip'd JSON object, one per line, under
+    # a temporary name; commit() moves the finished file into place
+    def __init__(self, path):
+        self.path = path
+        fd, self.temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        self.raw = os.fdopen(fd, 'wb')
+        # mtime=0 keeps the bytes of an unchanged shard identical between rebuilds
+        self.gzip = gzip.GzipFile(fileobj=self.raw, mode='wb', mtime=0)
+        self.text = io.TextIOWrapper(self.gzip, encoding='utf-8')
+        self.text.write("{")
+        self.count = 0
+
+    def add(self, key, job):
+        self.text.write(("," if self.count else "") + "\n" + json.dumps(key) + ": "
+                        + json.dumps(job, ensure_ascii=False, separators=(',', ':')))
+        self.count += 1
+
+    def commit(self):
+        self.text.write("\n}\n")
+        self.text.flush()
+        self.gzip.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.raw.close()
+        os.remove(self.temp_path)
+
+
+def write_manifest(directory, manifest):
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(temp_path, os.path.join(directory, CATALOG_MANIFEST))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_manifest(directory):
+    # The published manifest, or None before the first publish
+    try:
+        with open(os.path.join(directory, CATALOG_MANIFEST), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+
+def manifest_files(manifest):
+    if manifest is None:
+        return set()
+    return set(manifest['shards']) | {change['file'] for change in manifest['changes']}
+
+
+def publish_catalog(db_manager, directory, shards=CATALOG_SHARDS, compact_ratio=CATALOG_COMPACT_RATIO):
+    # Publish the jobs written since the last publish, or rebuild the catalog
+    # when there is none yet, the change log no longer reaches back to it, the
+    # shard count differs or the change files have grown past compact_ratio.
+    # Rows are read after the sequence number, so a job written meanwhile may be
+    # published again next time; entries are whole jobs, so that is harmless.
+    # Returns a summary of what was written.
+    os.makedirs(directory, exist_ok=True)
+    previous = read_manifest(directory)
+    if previous is not None and previous.get('format') == CATALOG_FORMAT and len(previous['shards']) == shards:
+        latest, job_ids = db_manager.job_changes_since(previous['seq'])
+        if job_ids is not None and latest >= previous['seq']:
+            if latest == previous['seq']:
+                return {'seq': latest, 'rebuilt': False, 'published': 0, 'removed': 0, 'files': []}
+            pending = sum(change['count'] for change in previous['changes']) + len(job_ids)
+            if pending <= compact_ratio * previous['count']:
+                return publish_changes(db_manager, directory, previous, latest, job_ids)
+    return rebuild_catalog(db_manager, directory, previous, shards)
+
+
+def publish_changes(db_manager, directory, previous, latest, job_ids):
+    name = f"changes-{previous['seq']}-{latest}.json.gz"
+    writer = CatalogFileWriter(os.path.join(directory, name))
+    try:
+        removed = {job_uuid(job_id) for job_id in job_ids}
+        for row in db_manager.iter_catalog_jobs(job_ids):
+            key, job = catalog_entry(row)
+            writer.add(key, job)
+            removed.discard(key)
+        # Deleted, archived and duplicate jobs leave the catalog
+        for key in sorted(removed):
+            writer.add(key, None)
+        writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+    manifest = dict(previous, seq=latest, published_date=int(time.time()),
+                    changes=previous['changes'] + [{'file': name, 'from_seq': previous['seq'], 'to_seq': latest,
+                                                    'count': writer.count}])
+    finish_publish(directory, previous, manifest)
+    return {'seq': latest, 'rebuilt': False, 'published': writer.count - len(removed), 'removed': len(removed),
+            'files': [name]}
+
+
+def rebuild_catalog(db_manager, directory, previous, shards):
+    # The sequence number is read first, so the change log covers anything
+    # written while the shards are streamed out
+    latest = db_manager.latest_change()
+    names = [f"jobs-{latest}-{shard:02d}.json.gz" for shard in range(shards)]
+    writers = []
+    try:
+        for name in names:
+            writers.append(CatalogFileWriter(os.path.join(directory, name)))
+        for row in db_manager.iter_catalog_jobs():
+            key, job = catalog_entry(row)
+            writers[shard_of(key, shards)].add(key, job)
+        for writer in writers:
+            writer.commit()
+    except BaseException:
+        for writer in writers:
+            if os.path.exists(writer.temp_path):
+                writer.discard()
+        raise
+    count = sum(writer.count for writer in writers)
+    manifest = {'format': CATALOG_FORMAT, 'seq': latest, 'base_seq': latest, 'published_date': int(time.time()),
+                'count': count, 'shards': names, 'changes': []}
+    finish_publish(directory, previous, manifest)
+    return {'seq': latest, 'rebuilt': True, 'published': count, 'removed': 0, 'files': names}
+
+
+def finish_publish(directory, previous, manifest):
+    write_manifest(directory, manifest)
+    # Keep the files of the previous manifest for readers that opened it
+    keep = manifest_files(manifest) | manifest_files(previous)
+    for name in os.listdir(directory):
+        if name.endswith('.json.gz') and name.startswith(('jobs-', 'changes-')) and name not in keep:
+            os.remove(os.path.join(directory, name))
+
+
+def iter_catalog_file(path):
+    # (UUID, job) pairs of one catalog file, read a line at a time; job is None
+    # for jobs a change file removes
+    with gzip.open(path, 'rt', encoding='utf-8') as catalog_file:
+        for line in catalog_file:
+            line = line.rstrip().rstrip(',')
+            if line in ("{", "}", ""):
+                continue
+            key, _, job = line.partition(": ")
+            yield json.loads(key), json.loads(job)
+
+
+def iter_catalog(directory, manifest=None):
+    # (UUID, job) pairs of the whole published catalog, streamed shard by shard.
+    # Only the change files since the last rebuild are held in memory.
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        return
+    changed = {}
+    for change in manifest['changes']:
+        changed.update(iter_catalog_file(os.path.join(directory, change['file'])))
+    for name in manifest['shards']:
+        for key, job in iter_catalog_file(os.path.join(directory, name)):
+            if key not in changed:
+                yield key, job
+    for key, job in changed.items():
+        if job is not None:
+            yield key, job
+
+
+def iter_catalog_changes(directory, since, manifest=None):
+    # For consumers that keep a copy: (seq, entries) where entries streams the
+    # (UUID, job or None) changes published after sequence number `since`, in
+    # order, and seq is the number to pass next time. entries is None when the
+    # catalog has been rebuilt since then and the copy has to be reloaded
+    # through iter_catalog.
+    manifest = manifest or read_manifest(directory)
+    if manifest is None or since < manifest['base_seq'] or since > manifest['seq']:
+        return (manifest['seq'] if manifest else 0), None
+
+    def entries():
+        for change in manifest['changes']:
+            if change['to_seq'] > since:
+                yield from iter_catalog_file(os.path.join(directory, change['file']))
+    return manifest['seq'], entries()
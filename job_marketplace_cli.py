@@ -0,0 +1,472 @@
+import argparse
+import getpass
+import json
+import os
+import sys
+import time
+
+from job_marketplace_catalog import (CATALOG_COMPACT_RATIO, CATALOG_SHARDS, iter_catalog, iter_catalog_changes,
+                                     publish_catalog)
+from job_marketplace_db import (APPLICATION_SORTS, ATTACHMENT_GC_GRACE, JOB_SORTS, PASSWORD_HASH_BATCH, SESSION_LIFETIME,
+                                VACUUM_STEP_PAGES, DatabaseManager)
+from job_marketplace_shards import open_sharded
+
+# Headless command line over DatabaseManager for scripted and bulk work. It never
+# imports PyQt5. Query output is one JSON object per line, written as rows are
+# read, so large result sets can be piped straight into other tools.
+
+# Rows per UPDATE when statuses are read from stdin
+STATUS_BATCH_SIZE = 10000
+
+
+def write_rows(cursor):
+    names = [column[0] for column in cursor.description]
+    write = sys.stdout.write
+    for row in cursor:
+        write(json.dumps(dict(zip(names, row)), separators=(',', ':')) + "\n")
+
+
+def write_json(value):
+    sys.stdout.write(json.dumps(value, separators=(',', ':')) + "\n")
+
+
+def read_job_file(path):
+    # jobs_database.json shape (UUID-keyed objects), or one job object per line
+    # for .jsonl files and stdin
+    if path == '-':
+        return (json.loads(line) for line in sys.stdin if line.strip())
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as job_file:
+            return [json.loads(line) for line in job_file if line.strip()]
+    with open(path, encoding='utf-8') as job_file:
+        return list(json.load(job_file).values())
+
+
+def read_ids(values):
+    # Ids from the command line, or from stdin when given "-": one per line,
+    # either bare or as JSON objects with an "id" (as printed by `applications`)
+    for value in values:
+        if value != '-':
+            yield int(value)
+            continue
+        for line in sys.stdin:
+            line = line.strip()
+            if line:
+                yield int(json.loads(line)['id']) if line.startswith('{') else int(line)
+
+
+def command_jobs(db_manager, args):
+    if bool(args.near) != bool(args.within_km):
+        sys.exit("--near and --within-km go together")
+    filters = {
+        'title': args.title,
+        'company': args.company,
+        'job_type': args.job_type,
+        'category': args.category,
+        'location': args.location,
+        'remote': args.remote,
+        'near': args.near,
+        'within_km': args.within_km,
+        'include_remote': args.include_remote,
+        'min_salary': args.min_salary,
+        'max_salary': args.max_salary,
+        'provider_id': args.provider_id,
+        'posted_after': args.posted_after,
+        'include_archived': args.include_archived,
+        'include_duplicates': args.include_duplicates,
+    }
+    try:
+        write_rows(db_manager.iter_jobs(filters, args.sort, not args.ascending))
+    except ValueError as error:
+        sys.exit(str(error))
+
+
+def command_applications(db_manager, args):
+    filters = {
+        'job_id': args.job_id,
+        'seeker_id': args.seeker_id,
+        'provider_id': args.provider_id,
+        'status': args.status,
+        'include_archived': args.include_archived,
+    }
+    write_rows(db_manager.iter_applications(filters, args.sort, not args.ascending))
+
+
+def command_post_jobs(db_manager, args):
+    for path in args.files:
+        posted = db_manager.import_jobs(read_job_file(path), args.provider_id, args.duplicates)
+        write_json({'file': path, 'posted': posted})
+
+
+def command_update_status(db_manager, args):
+    updated = 0
+    batch = []
+    for application_id in read_ids(args.ids):
+        batch.append(application_id)
+        if len(batch) == STATUS_BATCH_SIZE:
+            updated += db_manager.update_application_statuses(batch, args.status)
+            batch = []
+    if batch:
+        updated += db_manager.update_application_statuses(batch, args.status)
+    write_json({'status': args.status, 'updated': updated})
+
+
+def command_stats(db_manager, args):
+    stats = db_manager.get_dashboard_stats(args.user_id, args.user_type)
+    write_json(dict(stats, user_id=args.user_id, user_type=args.user_type))
+
+
+def command_funnel(db_manager, args):
+    funnel = db_manager.get_application_funnel(args.provider_id, args.job_id)
+    for stage, (reached, seconds) in funnel.items():
+        write_json({'stage': stage, 'reached': reached, 'average_seconds': seconds})
+
+
+def command_activity(db_manager, args):
+    start = int(time.time()) - (args.days - 1) * 86400
+    for day, counts in db_manager.get_application_activity(args.provider_id, start, job_id=args.job_id):
+        write_json(dict(counts, day=time.strftime("%Y-%m-%d", time.gmtime(day))))
+
+
+def command_compress(db_manager, args):
+    size_before = db_manager.database_sizes()
+    dictionary_id = None
+    if args.retrain or not db_manager.load_compression_dictionaries():
+        dictionary_id = db_manager.train_compression_dictionary()
+    compressed = db_manager.compress_text_columns(args.chunk_size)
+    if args.vacuum:
+        # Compressing frees pages but does not shrink the files
+        db_manager.vacuum()
+    write_json({'compressed': compressed, 'dictionary': dictionary_id,
+                'size_before': size_before, 'size_after': db_manager.database_sizes()})
+
+
+def command_dedupe(db_manager, args):
+    flagged, deleted = db_manager.dedupe_jobs(args.chunk_size, args.merge)
+    write_json({'flagged': flagged, 'deleted': deleted})
+
+
+def parse_weight(text):
+    name, _, value = text.partition('=')
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected signal=weight, got '{text}'")
+
+
+def command_score(db_manager, args):
+    # Scores every application to each job, printed best first
+    weights = dict(args.weight or [])
+    for job_id in args.job_ids:
+        try:
+            scores = db_manager.score_applications(job_id, weights)
+        except ValueError as error:
+            sys.exit(str(error))
+        for application_id, score in sorted(scores.items(), key=lambda item: -item[1]):
+            write_json({'job_id': job_id, 'application_id': application_id, 'score': score})
+
+
+def command_save_search(db_manager, args):
+    if bool(args.near) != bool(args.within_km):
+        sys.exit("--near and --within-km go together")
+    filters = {
+        'title': args.title,
+        'company': args.company,
+        'job_type': args.job_type,
+        'category': args.category,
+        'location': args.location,
+        'remote': args.remote,
+        'near': args.near,
+        'within_km': args.within_km,
+        'include_remote': args.include_remote,
+        'min_salary': args.min_salary,
+        'max_salary': args.max_salary,
+    }
+    try:
+        search_id = db_manager.save_search(args.seeker_id, args.name, filters)
+    except ValueError as error:
+        sys.exit(str(error))
+    write_json({'id': search_id})
+
+
+def command_notifications(db_manager, args):
+    names = ['id', 'job_id', 'title', 'company', 'search', 'created_date', 'read']
+    for notification in db_manager.get_notifications(args.seeker_id, args.unread, args.limit):
+        write_json(dict(zip(names, notification)))
+    if args.mark_read:
+        db_manager.mark_notifications_read(args.seeker_id)
+
+
+def read_secret(value, prompt):
+    # A password or token from the command line, else from the terminal or the
+    # first line of stdin, so it need not appear in the process list
+    if value:
+        return value
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt)
+    return sys.stdin.readline().rstrip("\n")
+
+
+def command_login(db_manager, args):
+    # Verifies the password once and prints a session token; later calls pass
+    # the token to `session` instead of the password
+    user = db_manager.authenticate_user(args.username, read_secret(None, "Password: "))
+    if user is None:
+        sys.exit("Invalid username or password")
+    token = db_manager.create_session(user['id'], args.lifetime)
+    write_json({'token': token, 'expires_date': int(time.time()) + args.lifetime, 'user': user})
+
+
+def command_session(db_manager, args):
+    # The user of a session token; exits with status 1 if it is unknown or expired
+    user = db_manager.authenticate_session(read_secret(args.token, "Token: "))
+    if user is None:
+        sys.exit("Invalid or expired session")
+    write_json(user)
+
+
+def command_logout(db_manager, args):
+    write_json({'ended': db_manager.end_session(read_secret(args.token, "Token: "))})
+
+
+def command_maintenance(db_manager, args):
+    # Prints one line per round; --until-done repeats bounded rounds until no
+    # free pages are left, so other writers get the lock in between
+    if args.convert:
+        write_json({'converted': db_manager.convert_auto_vacuum()})
+    while True:
+        result = db_manager.run_maintenance(args.vacuum_pages, args.analyze, args.fragmentation)
+        write_json(result)
+        if not (args.until_done and result['pending'] and sum(result['vacuumed'].values())):
+            break
+        args.analyze = False
+
+
+def command_gc_attachments(db_manager, args):
+    write_json({'removed': db_manager.gc_attachments(args.grace)})
+
+
+def command_hash_passwords(db_manager, args):
+    # Batches of PASSWORD_HASH_BATCH, so logins get the lock in between
+    hashed = 0
+    while True:
+        batch = db_manager.hash_plaintext_passwords()
+        hashed += batch
+        if batch < PASSWORD_HASH_BATCH:
+            break
+    write_json({'hashed': hashed})
+
+
+def command_publish_catalog(db_manager, args):
+    write_json(publish_catalog(db_manager, args.directory, args.shards, args.compact_ratio))
+
+
+def command_catalog(args):
+    # Reads the published files, so no database is opened (see main). With
+    # --since, removed jobs are printed as {"id": ..., "removed": true}.
+    if args.since is None:
+        entries = iter_catalog(args.directory)
+    else:
+        _, entries = iter_catalog_changes(args.directory, args.since)
+        if entries is None:
+            sys.exit(f"The catalog was rebuilt after sequence number {args.since}; read it in full")
+    for key, job in entries:
+        write_json(job if job is not None else {'id': key, 'removed': True})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Job Marketplace command line")
+    parser.add_argument('--db', default='job_marketplace.db', help="database file")
+    parser.add_argument('--archive', default='job_marketplace_archive.db', help="archive database file")
+    parser.add_argument('--attachments', default='job_marketplace_attachments', help="attachment store directory")
+    parser.add_argument('--shard-map', help="JSON file splitting jobs and applications across regional shards "
+                                            "(see job_marketplace_shards)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    jobs = subparsers.add_parser('jobs', help="query jobs (JSON lines)")
+    jobs.add_argument('--title')
+    jobs.add_argument('--company')
+    jobs.add_argument('--job-type')
+    jobs.add_argument('--category')
+    jobs.add_argument('--location', help="normalized, e.g. Bengaluru matches \"Bangalore, India\"")
+    jobs.add_argument('--remote', action='store_true', default=None, help="remote jobs only")
+    jobs.add_argument('--on-site', dest='remote', action='store_false', help="non-remote jobs only")
+    jobs.add_argument('--near', help="place name for --within-km")
+    jobs.add_argument('--within-km', type=float, help="jobs within this distance of --near")
+    jobs.add_argument('--include-remote', action='store_true', help="with --near, also remote jobs")
+    jobs.add_argument('--min-salary', type=float)
+    jobs.add_argument('--max-salary', type=float)
+    jobs.add_argument('--provider-id', type=int)
+    jobs.add_argument('--posted-after', help="YYYY-MM-DD[ HH:MM:SS] local time")
+    jobs.add_argument('--include-archived', action='store_true')
+    jobs.add_argument('--include-duplicates', action='store_true', help="include postings flagged as duplicates")
+    jobs.add_argument('--sort', choices=list(JOB_SORTS), default='posted_date')
+    jobs.add_argument('--ascending', action='store_true', help="sort ascending (default: descending)")
+    jobs.set_defaults(handler=command_jobs)
+
+    applications = subparsers.add_parser('applications', help="query applications (JSON lines)")
+    applications.add_argument('--job-id', type=int)
+    applications.add_argument('--seeker-id', type=int)
+    applications.add_argument('--provider-id', type=int)
+    applications.add_argument('--status')
+    applications.add_argument('--include-archived', action='store_true')
+    applications.add_argument('--sort', choices=list(APPLICATION_SORTS), default='date',
+                              help="score sorts by cached score (see `score`)")
+    applications.add_argument('--ascending', action='store_true', help="sort ascending (default: descending)")
+    applications.set_defaults(handler=command_applications)
+
+    post_jobs = subparsers.add_parser(
+        'post-jobs', help="post jobs from jobs_database.json-shaped or .jsonl files ('-' for stdin)")
+    post_jobs.add_argument('files', nargs='+')
+    post_jobs.add_argument('--provider-id', type=int, required=True)
+    post_jobs.add_argument('--duplicates', choices=['flag', 'merge', 'allow'], default='flag',
+                           help="near-duplicates of existing jobs: post flagged (default), skip, or post as is")
+    post_jobs.set_defaults(handler=command_post_jobs)
+
+    update_status = subparsers.add_parser(
+        'update-status', help="set the status of many applications ('-' reads ids from stdin)")
+    update_status.add_argument('status')
+    update_status.add_argument('ids', nargs='+')
+    update_status.set_defaults(handler=command_update_status)
+
+    stats = subparsers.add_parser('stats', help="print dashboard stats for a user")
+    stats.add_argument('--user-id', type=int, required=True)
+    stats.add_argument('--user-type', choices=['provider', 'seeker'], required=True)
+    stats.set_defaults(handler=command_stats)
+
+    funnel = subparsers.add_parser('funnel', help="applications reaching each hiring stage (JSON lines)")
+    funnel.add_argument('--provider-id', type=int, required=True)
+    funnel.add_argument('--job-id', type=int, help="one job instead of all the provider's jobs")
+    funnel.set_defaults(handler=command_funnel)
+
+    activity = subparsers.add_parser('activity', help="daily hiring funnel activity, UTC days (JSON lines)")
+    activity.add_argument('--provider-id', type=int, required=True)
+    activity.add_argument('--job-id', type=int, help="one job instead of all the provider's jobs")
+    activity.add_argument('--days', type=int, default=30)
+    activity.set_defaults(handler=command_activity)
+
+    compress = subparsers.add_parser('compress', help="compress stored descriptions and cover letters")
+    compress.add_argument('--chunk-size', type=int, default=500)
+    compress.add_argument('--retrain', action='store_true', help="train a new shared dictionary first")
+    compress.add_argument('--vacuum', action='store_true', help="shrink the database files afterwards")
+    compress.set_defaults(handler=command_compress)
+
+    dedupe = subparsers.add_parser('dedupe', help="flag near-duplicate jobs already in the database")
+    dedupe.add_argument('--chunk-size', type=int, default=500)
+    dedupe.add_argument('--merge', action='store_true',
+                        help="delete flagged jobs, moving their applications to the original")
+    dedupe.set_defaults(handler=command_dedupe)
+
+    score = subparsers.add_parser('score', help="score and rank the applications to jobs (JSON lines)")
+    score.add_argument('job_ids', type=int, nargs='+')
+    score.add_argument('--weight', type=parse_weight, action='append',
+                       help="signal=weight, overriding a default weight (relevance, resume, length)")
+    score.set_defaults(handler=command_score)
+
+    save_search = subparsers.add_parser('save-search', help="save a job search to be alerted about new matches")
+    save_search.add_argument('--seeker-id', type=int, required=True)
+    save_search.add_argument('--name', required=True)
+    save_search.add_argument('--title')
+    save_search.add_argument('--company')
+    save_search.add_argument('--job-type')
+    save_search.add_argument('--category')
+    save_search.add_argument('--location')
+    save_search.add_argument('--remote', action='store_true', default=None, help="remote jobs only")
+    save_search.add_argument('--on-site', dest='remote', action='store_false', help="non-remote jobs only")
+    save_search.add_argument('--near', help="place name for --within-km")
+    save_search.add_argument('--within-km', type=float, help="jobs within this distance of --near")
+    save_search.add_argument('--include-remote', action='store_true', help="with --near, also remote jobs")
+    save_search.add_argument('--min-salary', type=float)
+    save_search.add_argument('--max-salary', type=float)
+    save_search.set_defaults(handler=command_save_search)
+
+    notifications = subparsers.add_parser('notifications', help="saved search alerts for a seeker (JSON lines)")
+    notifications.add_argument('--seeker-id', type=int, required=True)
+    notifications.add_argument('--unread', action='store_true', help="only alerts not yet marked read")
+    notifications.add_argument('--limit', type=int, default=50)
+    notifications.add_argument('--mark-read', action='store_true', help="mark the seeker's alerts read afterwards")
+    notifications.set_defaults(handler=command_notifications)
+
+    login = subparsers.add_parser('login', help="check a password (read from stdin) and print a session token")
+    login.add_argument('--username', required=True)
+    login.add_argument('--lifetime', type=int, default=SESSION_LIFETIME,
+                       help="seconds the token stays valid (default %(default)s)")
+    login.set_defaults(handler=command_login)
+
+    session = subparsers.add_parser('session', help="print the user of a session token")
+    session.add_argument('--token', help="default: read from stdin")
+    session.set_defaults(handler=command_session)
+
+    logout = subparsers.add_parser('logout', help="end a session")
+    logout.add_argument('--token', help="default: read from stdin")
+    logout.set_defaults(handler=command_logout)
+
+    maintenance = subparsers.add_parser(
+        'maintenance', help="ANALYZE/optimize, incremental vacuum and WAL checkpoint, with page reports")
+    maintenance.add_argument('--vacuum-pages', type=int, default=VACUUM_STEP_PAGES,
+                             help="free pages returned per round (default %(default)s)")
+    maintenance.add_argument('--until-done', action='store_true', help="repeat rounds until no free pages remain")
+    maintenance.add_argument('--analyze', action='store_true', help="ANALYZE regardless of change volume")
+    maintenance.add_argument('--fragmentation', action='store_true',
+                             help="also report fragmentation (reads every page)")
+    maintenance.add_argument('--convert', action='store_true',
+                             help="first switch older files to incremental auto_vacuum (full VACUUM)")
+    maintenance.set_defaults(handler=command_maintenance)
+
+    gc_attachments = subparsers.add_parser('gc-attachments', help="delete attachments no application refers to")
+    gc_attachments.add_argument('--grace', type=int, default=ATTACHMENT_GC_GRACE,
+                                help="seconds an unreferenced attachment is kept (default %(default)s)")
+    gc_attachments.set_defaults(handler=command_gc_attachments)
+
+    hash_passwords = subparsers.add_parser(
+        'hash-passwords', help="hash the plaintext passwords left by clients from before hashing")
+    hash_passwords.set_defaults(handler=command_hash_passwords)
+
+    publish = subparsers.add_parser(
+        'publish-catalog', help="publish the jobs changed since the last publish as sharded, gzip'd JSON")
+    publish.add_argument('directory')
+    publish.add_argument('--shards', type=int, default=CATALOG_SHARDS,
+                         help="files the catalog is split into (default %(default)s)")
+    publish.add_argument('--compact-ratio', type=float, default=CATALOG_COMPACT_RATIO,
+                         help="rebuild once the change files reach this share of the catalog (default %(default)s)")
+    publish.set_defaults(handler=command_publish_catalog)
+
+    catalog = subparsers.add_parser('catalog', help="read a published catalog (JSON lines)")
+    catalog.add_argument('directory')
+    catalog.add_argument('--since', type=int,
+                         help="only the changes after this sequence number (the seq of manifest.json)")
+    catalog.set_defaults(handler=command_catalog, uses_database=False)
+
+    return parser
+
+
+def run_command(handler, *args):
+    try:
+        handler(*args)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into `head`); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Commands that only read published files do not open (or create) the
+    # database, whose migrations would write to it
+    if not getattr(args, 'uses_database', True):
+        run_command(args.handler, args)
+        return
+    if args.shard_map:
+        db_manager = open_sharded(args.db, args.shard_map, args.archive, attachments_path=args.attachments)
+    else:
+        db_manager = DatabaseManager(args.db, args.archive, attachments_path=args.attachments)
+    try:
+        run_command(args.handler, db_manager, args)
+    finally:
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2500 @@
+import os
+import re
+import json
+import math
+import time
+import struct
+import hashlib
+import sqlite3
+import zlib
+from collections import Counter
+from datetime import datetime
+
+from job_marketplace_attachments import AttachmentStore
+from job_marketplace_auth import (check_password, hash_password, is_hash_shaped, new_session_token, parse_password_hash,
+                                  token_digest)
+from job_marketplace_locations import bounding_boxes, distance_km, location_name, parse_location
+
+
+# Salaries are stored as annual amounts in this currency
+CANONICAL_CURRENCY = 'USD'
+
+# Fixed conversion rates into the canonical currency
+CURRENCY_RATES = {
+    'USD': 1.0,
+    'INR': 1 / 83.0,
+    'EUR': 1.08,
+    'GBP': 1.27,
+}
+
+CURRENCY_SYMBOLS = {'$': 'USD', '\u20b9': 'INR', '\u20ac': 'EUR', '\u00a3': 'GBP'}
+
+# Amount scales; lakh/crore imply rupees
+SALARY_SCALES = {
+    'K': (1000, None),
+    'L': (100000, 'INR'),
+    'LAKH': (100000, 'INR'),
+    'LAKHS': (100000, 'INR'),
+    'LPA': (100000, 'INR'),
+    'CR': (10000000, 'INR'),
+    'CRORE': (10000000, 'INR'),
+}
+
+# Pay periods and how many of them make a year
+SALARY_PERIODS = {
+    'HR': 2080,
+    'HOUR': 2080,
+    'HOURLY': 2080,
+    'WEEK': 52,
+    'WEEKLY': 52,
+    'MO': 12,
+    'MONTH': 12,
+    'MONTHLY': 12,
+    'PM': 12,
+}
+
+
+def parse_salary(salary):
+    # Normalize a salary into an annual (min, max) range in CANONICAL_CURRENCY.
+    # Accepts a number, a (min, max) pair, or feed text such as "15-20 LPA",
+    # "$80k-100k" or "1,500 EUR/month".
+    if salary is None or salary == "":
+        return None, None
+    if isinstance(salary, (int, float)):
+        return float(salary), float(salary)
+    if isinstance(salary, (tuple, list)):
+        low, high = salary
+        high = low if high is None else high
+        return float(min(low, high)), float(max(low, high))
+
+    text = str(salary).upper().replace(',', '')
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', text)][:2]
+    if not numbers:
+        return None, None
+    words = set(re.findall(r'[A-Z]+', text))
+
+    currency = None
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            currency = code
+    for word in words:
+        if word in CURRENCY_RATES:
+            currency = word
+        elif word in ('RS', 'INR'):
+            currency = 'INR'
+
+    multiplier = 1
+    for word in words:
+        if word in SALARY_SCALES:
+            scale, implied_currency = SALARY_SCALES[word]
+            multiplier *= scale
+            currency = currency or implied_currency
+            break
+    for word in words:
+        if word in SALARY_PERIODS:
+            multiplier *= SALARY_PERIODS[word]
+            break
+
+    rate = CURRENCY_RATES[currency or CANONICAL_CURRENCY]
+    return (round(min(numbers) * multiplier * rate, 2),
+            round(max(numbers) * multiplier * rate, 2))
+
+
+# Upper bounds (exclusive) of the salary facet buckets, by range midpoint
+SALARY_BUCKETS = [
+    (25000, "Under $25k"),
+    (50000, "$25k - $50k"),
+    (100000, "$50k - $100k"),
+    (200000, "$100k - $200k"),
+    (None, "$200k+"),
+]
+
+# Timestamp column of each table, stored as INTEGER epoch seconds (UTC)
+TIMESTAMP_COLUMNS = {
+    'users': 'registration_date',
+    'jobs': 'posted_date',
+    'applications': 'application_date',
+}
+
+# Seconds a snapshot-mode read may lag behind writes from other processes
+SNAPSHOT_MAX_STALENESS = 5
+
+# Large text columns, stored zlib-compressed when that saves space (see
+# compress_text). Shorter values are not worth compressing and stay TEXT.
+COMPRESSED_COLUMNS = {'jobs': 'description', 'applications': 'cover_letter'}
+COMPRESSION_MIN_BYTES = 64
+COMPRESSION_LEVEL = 9
+COMPRESSION_DICTIONARY_SIZE = 16 * 1024
+
+# Attachments not referenced by any application are deleted by gc_attachments
+# once they are this old, which leaves time for the upload that stored one to
+# be attached
+ATTACHMENT_GC_GRACE = 60 * 60
+
+# How long a login stays valid without entering the password again
+SESSION_LIFETIME = 30 * 24 * 60 * 60
+
+# Plaintext passwords hashed per hash_plaintext_passwords call; each hash takes
+# as long as a login, so a batch holds the write lock for a few seconds at most
+PASSWORD_HASH_BATCH = 20
+
+# Keys of the user dicts returned by authenticate_user / authenticate_session
+USER_FIELDS = ('id', 'user_type', 'name', 'email')
+
+# Change log entries kept by prune_change_log; a reader further behind than this
+# reloads everything
+CHANGE_LOG_RETENTION = 10000
+
+# run_maintenance: statistics are rebuilt once the jobs and applications
+# written since the last ANALYZE reach ANALYZE_CHANGE_RATIO of the rows it saw
+# (and at least ANALYZE_MIN_CHANGES), sampling ANALYSIS_LIMIT rows per index
+# so it stays quick on large tables. Free pages are returned to the file
+# system at most VACUUM_STEP_PAGES per step.
+ANALYZE_MIN_CHANGES = 1000
+ANALYZE_CHANGE_RATIO = 0.1
+ANALYSIS_LIMIT = 1000
+VACUUM_STEP_PAGES = 1000
+
+# Near-duplicate postings: one-permutation MinHash signatures over word
+# shingles of title, company and description, banded into an LSH index. Bands
+# of 4 values make jobs with a Jaccard similarity above ~0.6 likely to share a
+# bucket; candidates then need DUPLICATE_THRESHOLD of their signatures to agree.
+SHINGLE_SIZE = 3
+MINHASH_SIZE = 32
+MINHASH_BAND_ROWS = 4
+DUPLICATE_THRESHOLD = 0.8
+
+# Facetable job fields and their column index in get_jobs rows
+JOB_FACETS = {'job_type': 4, 'category': 12, 'location': 13}
+
+# Server-side sort keys for get_jobs_page / get_applications_page: the sorted
+# column, its index in the rows, whether it can be NULL, and the collation of
+# the index that serves it. Ties are broken by id.
+JOB_SORTS = {
+    'title': ('j.title', 1, False, 'NOCASE'),
+    'company': ('j.company', 2, False, 'NOCASE'),
+    'salary': ('j.salary_min', 10, True, None),
+    'applications': ('j.application_count', 9, False, None),
+    'posted_date': ('j.posted_date', 6, True, None),
+}
+# Scores are per job (see score_applications) and only sorted within one job
+APPLICATION_SORTS = {
+    'date': ('a.application_date', 6, True, None),
+    'status': ('a.status', 7, True, None),
+    'score': ('s.score', 11, True, None),
+}
+PAGE_SIZE = 200
+NOCASE_FOLD = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Filters a saved search keeps. Title and company are substring matches, as in
+# jobs_query, and are indexed by one of their SEARCH_GRAM_SIZE-character grams.
+# A `near` place is kept as its coordinates.
+SAVED_SEARCH_FIELDS = ('title', 'company', 'job_type', 'category', 'location', 'min_salary', 'max_salary', 'remote',
+                       'near_latitude', 'near_longitude', 'within_km', 'include_remote')
+SEARCH_GRAM_SIZE = 3
+# Open salary bounds of saved searches in the R*Tree
+SALARY_UNBOUNDED = 1e12
+
+# Applicant ranking (score_applications): weight of each signal in a 0-100
+# score. relevance is the cosine similarity of the cover letter to the job's
+# title and description, resume whether one is attached, and length how far
+# the cover letter is towards SCORE_FULL_LENGTH words.
+APPLICATION_SCORE_WEIGHTS = {'relevance': 0.8, 'resume': 0.1, 'length': 0.1}
+SCORE_FULL_LENGTH = 150
+# Title words count this many times over description words
+SCORE_TITLE_WEIGHT = 3
+# Application statuses in workflow order, and the stages of the hiring funnel:
+# 'Applied' is the application itself, the rest are statuses it first reached
+APPLICATION_STATUSES = ['Pending', 'Reviewing', 'Interview', 'Accepted', 'Rejected']
+FUNNEL_STAGES = ['Applied', 'Reviewing', 'Interview', 'Accepted', 'Rejected']
+# application_rollups rows for all of a provider's jobs, and for all time
+ROLLUP_ALL_JOBS = 0
+ROLLUP_ALL_TIME = -1
+
+SCORE_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have i in is it its my of on or our so that the their this "
+    "to was we will with you your".split()
+)
+
+
+def job_shingles(title, company, description):
+    words = re.findall(r'\w+', f"{title} {company} {description}".lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles):
+    # One-permutation MinHash: a single 64-bit hash per shingle, whose top bits
+    # pick one of MINHASH_SIZE bins and whose low 32 bits compete for that bin's
+    # minimum. Empty bins borrow from the next filled one so that signatures of
+    # short texts still line up. Returns None for no shingles.
+    if not shingles:
+        return None
+    signature = [None] * MINHASH_SIZE
+    shift = 64 - (MINHASH_SIZE - 1).bit_length()
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        position = value >> shift
+        value &= 0xFFFFFFFF
+        if signature[position] is None or value < signature[position]:
+            signature[position] = value
+    filled = list(signature)
+    for position in range(MINHASH_SIZE):
+        distance = 1
+        while signature[position] is None:
+            borrowed = filled[(position + distance) % MINHASH_SIZE]
+            if borrowed is not None:
+                signature[position] = (borrowed + distance * 0x9E3779B1) & 0xFFFFFFFF
+            distance += 1
+    return signature
+
+
+def pack_signature(signature):
+    return struct.pack(f'<{MINHASH_SIZE}I', *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(f'<{MINHASH_SIZE}I', data)
+
+
+def lsh_buckets(signature):
+    # (band, bucket) pairs under which a signature is indexed
+    for band in range(MINHASH_SIZE // MINHASH_BAND_ROWS):
+        rows = signature[band * MINHASH_BAND_ROWS:(band + 1) * MINHASH_BAND_ROWS]
+        yield band, zlib.crc32(struct.pack(f'<{MINHASH_BAND_ROWS}I', *rows))
+
+
+def term_vector(text):
+    # Sublinear term weights (1 + log tf) of the text's words, stopwords left out
+    counts = Counter(word for word in re.findall(r'[a-z0-9+#]+', text.lower())
+                     if len(word) > 1 and word not in SCORE_STOPWORDS)
+    return {term: 1 + math.log(count) for term, count in counts.items()}
+
+
+def vector_norm(vector):
+    return math.sqrt(sum(weight * weight for weight in vector.values()))
+
+
+def score_fingerprint(*parts):
+    # Signed 64-bit digest of a score's inputs, stored to tell when it is stale
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return int.from_bytes(digest.digest(), 'little', signed=True)
+
+
+def saved_search_filters(filters):
+    # The stored form of a search: only the fields alerts can match, unset ones
+    # dropped, the location normalized as on jobs, and `near` (a place name or
+    # (latitude, longitude)) as near_latitude and near_longitude
+    stored = {field: filters[field] for field in SAVED_SEARCH_FIELDS
+              if filters.get(field) and filters[field] != "All"}
+    if 'location' in stored:
+        stored['location'] = location_name(stored['location'])
+    # False (on-site jobs only) and coordinates of 0 are filters too
+    if filters.get('remote') is not None:
+        stored['remote'] = int(bool(filters['remote']))
+    for field in ('near_latitude', 'near_longitude'):
+        if filters.get(field) is not None:
+            stored[field] = filters[field]
+    if filters.get('near') and filters.get('within_km'):
+        near = filters['near']
+        if isinstance(near, str):
+            location = parse_location(near)
+            if location is None or location[3] is None:
+                raise ValueError(f"Unknown place: {near}")
+            near = location[3], location[4]
+        stored['near_latitude'], stored['near_longitude'] = near
+    if 'near_latitude' in stored and 'near_longitude' in stored and stored.get('within_km'):
+        stored['include_remote'] = int(bool(filters.get('include_remote')))
+    else:
+        for field in ('near_latitude', 'near_longitude', 'within_km', 'include_remote'):
+            stored.pop(field, None)
+    return stored
+
+
+def saved_search_term(filters):
+    # The one index term a saved search is filed under, from its most selective
+    # filter: a gram of a keyword, an exact location or category, or (with no
+    # radius or salary band either) its remote flag or job_type bucket, or '*'
+    # for searches matching everything. Radius and salary searches return None
+    # and go in an R*Tree (see save_search).
+    for field in ('title', 'company'):
+        if field in filters:
+            return f"{field}:{filters[field].lower()[:SEARCH_GRAM_SIZE]}"
+    for field in ('location', 'category'):
+        if field in filters:
+            return f"{field}={filters[field]}"
+    if 'within_km' in filters or 'min_salary' in filters or 'max_salary' in filters:
+        return None
+    if 'remote' in filters:
+        return f"remote={filters['remote']}"
+    if 'job_type' in filters:
+        return f"job_type={filters['job_type']}"
+    return '*'
+
+
+def job_search_terms(title, company, job_type, category, location, remote):
+    # Every term a saved search matching this job could be filed under: all
+    # grams of up to SEARCH_GRAM_SIZE characters of the keywords (shorter
+    # keywords are filed whole), and the exact field values. `remote` is None
+    # for jobs without a location, which match neither remote filter.
+    terms = {'*', f"job_type={job_type}"}
+    if remote is not None:
+        terms.add(f"remote={remote}")
+    for field, value in (('title', title), ('company', company)):
+        value = (value or "").lower()
+        for size in range(1, SEARCH_GRAM_SIZE + 1):
+            terms.update(f"{field}:{value[i:i + size]}" for i in range(len(value) - size + 1))
+    for field, value in (('location', location), ('category', category)):
+        if value:
+            terms.add(f"{field}={value}")
+    return terms
+
+
+def sql_distance_km(latitude1, longitude1, latitude2, longitude2):
+    # distance_km as an SQL function: NULL when either place has no coordinates
+    if None in (latitude1, longitude1, latitude2, longitude2):
+        return None
+    return distance_km(latitude1, longitude1, latitude2, longitude2)
+
+
+def sort_order(sorts, sort, descending, id_column):
+    # ORDER BY for a sort key of JOB_SORTS / APPLICATION_SORTS, through its index.
+    # NULLs come first ascending and last descending.
+    if sort not in sorts:
+        raise ValueError(f"Unknown sort key: {sort}")
+    column, _, _, collation = sorts[sort]
+    direction = "DESC" if descending else "ASC"
+    collate = f" COLLATE {collation}" if collation else ""
+    return f"{column}{collate} {direction}, {id_column} {direction}"
+
+
+def row_sort_key(sorts, sort, row):
+    # A row's place in sort_order as a comparable Python value: NULLs before any
+    # value, NOCASE text folded as SQLite folds it (ASCII only), ties broken by id
+    _, index, _, collation = sorts[sort]
+    value = row[index]
+    if value is None:
+        return (False, 0, row[0])
+    return (True, value.translate(NOCASE_FOLD) if collation else value, row[0])
+
+
+def to_epoch(value):
+    # Epoch seconds (UTC) from an epoch or a local "YYYY-MM-DD[ HH:MM:SS]" string
+    if value is None or isinstance(value, (int, float)):
+        return value
+    fmt = "%Y-%m-%d %H:%M:%S" if len(value) > 10 else "%Y-%m-%d"
+    return int(datetime.strptime(value, fmt).timestamp())
+
+
+def format_timestamp(epoch, fmt="%Y-%m-%d %H:%M"):
+    # Timestamps are stored as UTC epochs and shown in local time
+    if epoch is None:
+        return ""
+    return datetime.fromtimestamp(epoch).strftime(fmt)
+
+
+def format_salary(salary_min, salary_max):
+    if salary_min is None:
+        return ""
+    if salary_max is None or salary_max == salary_min:
+        return f"${salary_min:,.2f}"
+    return f"${salary_min:,.0f} - ${salary_max:,.0f}"
+
+
+class DatabaseManager:
+    def __init__(self, db_path='job_marketplace.db', archive_path='job_marketplace_archive.db', snapshot=False,
+                 max_staleness=SNAPSHOT_MAX_STALENESS, attachments_path='job_marketplace_attachments',
+                 check_same_thread=True):
+        # check_same_thread=False lets another thread use the connections, one
+        # thread at a time (see job_marketplace_shards.ShardedDatabaseManager)
+        self.paths = db_path, archive_path, attachments_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        # For the radius filters of saved searches (notify_saved_searches)
+        self.conn.create_function('distance_km', 4, sql_distance_km, deterministic=True)
+        # Read queries return descriptions and cover letters through this, so
+        # callers always get text (see compress_text)
+        self.conn.create_function('decompress_text', 1, self.decompress_text, deterministic=True)
+        # Resume files live on disk, outside the database; see store_attachment
+        self.attachments = AttachmentStore(attachments_path)
+        self.cursor = self.conn.cursor()
+        # Expired jobs and their applications are moved here by sweep_expired_jobs
+        self.cursor.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        # Lets run_maintenance free pages in small steps. Takes effect on new
+        # files, and on existing ones at their next VACUUM.
+        for schema in ('main', 'archive'):
+            self.cursor.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+        self.create_tables()
+        # Enabled only after create_tables: its table rebuilds drop tables, which
+        # would otherwise cascade
+        self.cursor.execute("PRAGMA foreign_keys = ON")
+
+        # {id: dictionary}, loaded on first use by compress_text/decompress_text
+        self.compression_dictionaries = None
+
+        # Last PRAGMA data_version / total_changes seen by changes_pending
+        self.change_version = None
+        self.change_total = None
+
+        # Snapshot mode: reads are served from an in-memory copy of the database,
+        # writes still go to the file
+        self.snapshot = None
+        self.max_staleness = max_staleness
+        if snapshot:
+            self.snapshot = sqlite3.connect(':memory:', check_same_thread=check_same_thread)
+            self.snapshot.create_function('decompress_text', 1, self.decompress_text, deterministic=True)
+            self.snapshot_cursor = self.snapshot.cursor()
+            # Archived rows are cold, so "include archived" reads use the file
+            self.snapshot_cursor.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+            self.refresh_snapshot(force=True)
+            self.create_archive_views(self.snapshot_cursor)
+
+    def reopen(self):
+        # Another manager on the same files, with connections of its own, e.g.
+        # for a worker thread. Reads go to the files.
+        db_path, archive_path, attachments_path = self.paths
+        return DatabaseManager(db_path, archive_path, attachments_path=attachments_path)
+
+    def create_tables(self):
+        # Create users table
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            user_type TEXT NOT NULL,
+            name TEXT,
+            email TEXT,
+            registration_date INTEGER
+        )
+        ''')
+
+        # Login sessions, by SHA-256 digest of their token (see create_session)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash BLOB PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            created_date INTEGER NOT NULL,
+            expires_date INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''')
+
+        # Create jobs table
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            provider_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            salary REAL,
+            job_type TEXT NOT NULL,
+            description TEXT,
+            posted_date INTEGER,
+            FOREIGN KEY (provider_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''')
+
+        # Create applications table
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            seeker_id INTEGER NOT NULL,
+            application_date INTEGER,
+            status TEXT DEFAULT 'Pending',
+            cover_letter TEXT,
+            FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+            FOREIGN KEY (seeker_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''')
+
+        # Shared zlib dictionaries for compressed text; ids fit the one-byte
+        # header of a compressed value
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS compression_dictionaries (
+            id INTEGER PRIMARY KEY CHECK (id BETWEEN 1 AND 255),
+            dictionary BLOB NOT NULL,
+            created_date INTEGER
+        )
+        ''')
+
+        # Salary ranges (annual, canonical currency); older databases only have `salary`
+        if self.add_missing_columns('jobs', [('salary_min', 'REAL'), ('salary_max', 'REAL')]):
+            self.cursor.execute("UPDATE jobs SET salary_min = salary, salary_max = salary")
+
+        self.add_missing_columns('jobs', [('location', 'TEXT'), ('category', 'TEXT')])
+
+        # Normalized location: an id in `locations` (see create_locations), whose
+        # name `location` holds
+        self.create_locations()
+        if self.add_missing_columns('jobs', [('location_id', 'INTEGER')]):
+            self.backfill_locations('main')
+
+        # Application deadline as "YYYY-MM-DD"; NULL means the listing never expires
+        self.add_missing_columns('jobs', [('deadline', 'TEXT')])
+
+        # Set on postings found to be near-duplicates of an earlier job, which
+        # are then left out of job searches
+        self.add_missing_columns('jobs', [('duplicate_of', 'INTEGER')])
+
+        # Number of applications, kept by triggers (create_application_counts) so
+        # listings can sort by it through an index
+        if self.add_missing_columns('jobs', [('application_count', 'INTEGER NOT NULL DEFAULT 0')]):
+            self.cursor.execute(
+                "UPDATE jobs SET application_count = (SELECT COUNT(*) FROM applications WHERE job_id = jobs.id)")
+
+        # Attached resume: hash of the file in the attachment store, and its name
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS attachments (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            created_date INTEGER
+        )
+        ''')
+        self.add_missing_columns('applications', [('resume_hash', 'TEXT'), ('resume_name', 'TEXT')])
+
+        # Older databases store timestamps as "%Y-%m-%d %H:%M:%S" TEXT
+        self.conn.commit()
+        self.migrate_timestamp_columns()
+        self.migrate_foreign_keys()
+
+        # Foreign key columns are indexed so cascading deletes never scan
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_provider ON jobs(provider_id)")
+        self.create_application_unique_index()
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_seeker ON applications(seeker_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_deadline ON jobs(deadline)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_posted_date ON jobs(posted_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location_id)")
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_applications_date ON applications(application_date)")
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_applications_resume ON applications(resume_hash) "
+            "WHERE resume_hash IS NOT NULL")
+
+        # One index per server-side sort key (see JOB_SORTS, APPLICATION_SORTS)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_title ON jobs(title COLLATE NOCASE)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company COLLATE NOCASE)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_salary_min ON jobs(salary_min)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_application_count ON jobs(application_count)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_status ON applications(status)")
+
+        self.create_application_counts()
+        self.create_salary_index()
+        self.create_duplicate_index()
+        self.create_change_log()
+        self.create_saved_searches()
+
+        # Cached applicant scores; see score_applications
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS application_scores (
+            application_id INTEGER PRIMARY KEY REFERENCES applications(id) ON DELETE CASCADE,
+            score REAL NOT NULL,
+            inputs INTEGER NOT NULL
+        )
+        ''')
+
+        self.create_application_events()
+        self.create_archive_tables()
+        self.renormalize_locations()
+
+        # State of run_maintenance, e.g. the change sequence at the last ANALYZE
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance (
+            name TEXT PRIMARY KEY,
+            value INTEGER
+        )
+        ''')
+
+        self.conn.commit()
+
+    def create_application_unique_index(self):
+        # One application per seeker and job. It also serves job_id lookups and
+        # cascades. Duplicates left by older versions keep their earliest row.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_applications_job_seeker'")
+        if self.cursor.fetchone():
+            return
+        self.cursor.execute("""
+        DELETE FROM applications WHERE id NOT IN (
+            SELECT MIN(id) FROM applications GROUP BY job_id, seeker_id
+        )
+        """)
+        self.cursor.execute(
+            "CREATE UNIQUE INDEX idx_applications_job_seeker ON applications(job_id, seeker_id)")
+
+    def add_missing_columns(self, table, columns, schema='main'):
+        self.cursor.execute(f"PRAGMA {schema}.table_info({table})")
+        existing = {row[1] for row in self.cursor.fetchall()}
+        added = False
+        for name, definition in columns:
+            if name not in existing:
+                self.cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {name} {definition}")
+                added = True
+        return added
+
+    def table_columns(self, table, schema='main'):
+        self.cursor.execute(f"PRAGMA {schema}.table_info({table})")
+        return [(row[1], row[2]) for row in self.cursor.fetchall()]
+
+    def table_sql(self, table, schema='main'):
+        self.cursor.execute(f"SELECT sql FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return self.cursor.fetchone()[0]
+
+    def rebuild_table(self, table, create_sql, select_list=None, schema='main', chunk_size=5000):
+        # SQLite cannot change a column's type or constraints in place, so the table
+        # is copied into one created from `create_sql` in rowid chunks, one
+        # transaction per chunk, and then swapped in. An interrupted rebuild resumes
+        # from the last copied chunk. `select_list` can transform the copied values.
+        columns = [name for name, _ in self.table_columns(table, schema)]
+        column_list = ", ".join(columns)
+        select_list = select_list or column_list
+
+        self.cursor.execute(f"DROP VIEW IF EXISTS temp.all_{table}")
+        self.cursor.execute(re.sub(r'^CREATE TABLE\s+"?\w+"?',
+                                   f'CREATE TABLE IF NOT EXISTS {schema}.{table}_migrating', create_sql))
+        while True:
+            self.cursor.execute(f"""
+            INSERT INTO {schema}.{table}_migrating (rowid, {column_list})
+            SELECT rowid, {select_list} FROM {schema}.{table}
+            WHERE rowid > (SELECT COALESCE(MAX(rowid), 0) FROM {schema}.{table}_migrating)
+            ORDER BY rowid LIMIT ?
+            """, (chunk_size,))
+            copied = self.cursor.rowcount
+            self.conn.commit()
+            if copied < chunk_size:
+                break
+
+        # Swap the tables, keeping the AUTOINCREMENT high-water mark so ids
+        # of deleted or archived rows are never reused
+        self.cursor.execute("BEGIN")
+        self.cursor.execute(f"SELECT name FROM {schema}.sqlite_master WHERE name = 'sqlite_sequence'")
+        sequence = None
+        if self.cursor.fetchone():
+            self.cursor.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = ?", (table,))
+            row = self.cursor.fetchone()
+            sequence = row[0] if row else None
+        self.cursor.execute(f"DROP TABLE {schema}.{table}")
+        self.cursor.execute(f"ALTER TABLE {schema}.{table}_migrating RENAME TO {table}")
+        if sequence is not None:
+            self.cursor.execute(
+                f"UPDATE {schema}.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence, table))
+        self.conn.commit()
+
+    def migrate_timestamp_columns(self, schema='main', tables=tuple(TIMESTAMP_COLUMNS)):
+        # Convert TEXT timestamp columns to INTEGER epoch seconds (UTC)
+        for table in tables:
+            column = TIMESTAMP_COLUMNS[table]
+            column_types = dict(self.table_columns(table, schema))
+            if column not in column_types or 'INT' in column_types[column].upper():
+                continue
+
+            create_sql = re.sub(rf'\b{column}\s+TEXT\b', f'{column} INTEGER',
+                                self.table_sql(table, schema), flags=re.IGNORECASE)
+            # Old values came from datetime.now(), i.e. local time
+            select_list = ", ".join(
+                f"CASE WHEN typeof({name}) = 'text' "
+                f"THEN CAST(strftime('%s', {name}, 'utc') AS INTEGER) ELSE {name} END"
+                if name == column else name
+                for name in column_types
+            )
+            self.rebuild_table(table, create_sql, select_list, schema)
+
+            if schema == 'main' and table == 'jobs':
+                # Rebuilt from the new epoch values by create_salary_index
+                self.cursor.execute("DROP TABLE IF EXISTS jobs_salary_rtree")
+
+    def migrate_foreign_keys(self):
+        # Older databases declare their foreign keys without ON DELETE CASCADE
+        for table in ('jobs', 'applications'):
+            self.cursor.execute(f"PRAGMA foreign_key_list({table})")
+            if all(row[6] == 'CASCADE' for row in self.cursor.fetchall()):
+                continue
+            create_sql = re.sub(r'(REFERENCES\s+\w+\s*\(\w+\))(?!\s+ON DELETE)', r'\1 ON DELETE CASCADE',
+                                self.table_sql(table))
+            self.rebuild_table(table, create_sql)
+
+    def create_archive_tables(self):
+        # The archive mirrors the columns of the hot tables (without their constraints),
+        # picking up any columns added to the hot tables since it was created
+        archived_columns = dict(self.table_columns('jobs', 'archive'))
+        for table in ('jobs', 'applications'):
+            columns = self.table_columns(table)
+            self.cursor.execute(f"DROP VIEW IF EXISTS temp.all_{table}")
+            self.cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+            self.conn.commit()
+            self.migrate_timestamp_columns(schema='archive', tables=(table,))
+            self.add_missing_columns(table, columns, schema='archive')
+
+        # Jobs archived before application_count or location_id existed; archived
+        # rows never change
+        if 'application_count' not in archived_columns:
+            self.cursor.execute("UPDATE archive.jobs SET application_count = "
+                                "(SELECT COUNT(*) FROM archive.applications WHERE job_id = jobs.id)")
+        if 'location_id' not in archived_columns:
+            self.backfill_locations('archive')
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_applications_job ON applications(job_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_applications_seeker ON applications(seeker_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_applications_resume "
+                            "ON applications(resume_hash) WHERE resume_hash IS NOT NULL")
+        self.create_archive_views(self.cursor)
+
+    def create_archive_views(self, cursor):
+        # Hot + archived rows, for "include archived" queries
+        for table in ('jobs', 'applications'):
+            column_list = ", ".join(name for name, _ in self.table_columns(table))
+            cursor.execute(f"DROP VIEW IF EXISTS temp.all_{table}")
+            cursor.execute(f'''
+            CREATE TEMP VIEW all_{table} AS
+            SELECT {column_list} FROM main.{table}
+            UNION ALL
+            SELECT {column_list} FROM archive.{table}
+            ''')
+
+    def reader(self):
+        # Cursor for read queries: the file itself, or the in-memory snapshot
+        if self.snapshot is None:
+            return self.cursor
+        self.refresh_snapshot()
+        return self.snapshot_cursor
+
+    def refresh_snapshot(self, force=False):
+        # Re-copy the file into the snapshot when it has changed. Our own writes
+        # (total_changes) are picked up on the next read; writes by other
+        # connections (data_version) at most max_staleness seconds later.
+        now = time.monotonic()
+        if not force:
+            if self.conn.total_changes == self.snapshot_changes:
+                if now - self.snapshot_checked < self.max_staleness:
+                    return False
+                self.snapshot_checked = now
+                self.cursor.execute("PRAGMA data_version")
+                if self.cursor.fetchone()[0] == self.snapshot_version:
+                    return False
+
+        self.cursor.execute("PRAGMA data_version")
+        self.snapshot_version = self.cursor.fetchone()[0]
+        self.snapshot_changes = self.conn.total_changes
+        self.snapshot_checked = now
+        self.conn.backup(self.snapshot)
+        return True
+
+    def sweep_expired_jobs(self, chunk_size=200, max_chunks=None, today=None):
+        # Move jobs past their deadline, with their applications, into the archive
+        # database. Each chunk is its own short transaction so a sweep never holds
+        # the write lock for long; returns the number of jobs moved.
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        job_columns = ", ".join(name for name, _ in self.table_columns('jobs'))
+        application_columns = ", ".join(name for name, _ in self.table_columns('applications'))
+
+        moved = 0
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            self.cursor.execute(
+                "SELECT id FROM main.jobs WHERE deadline < ? ORDER BY deadline LIMIT ?",
+                (today, chunk_size)
+            )
+            job_ids = [row[0] for row in self.cursor.fetchall()]
+            if not job_ids:
+                break
+
+            placeholders = ", ".join("?" * len(job_ids))
+            try:
+                self.cursor.execute(
+                    f"INSERT INTO archive.applications ({application_columns}) "
+                    f"SELECT {application_columns} FROM main.applications WHERE job_id IN ({placeholders})",
+                    job_ids
+                )
+                self.cursor.execute(
+                    f"INSERT INTO archive.jobs ({job_columns}) "
+                    f"SELECT {job_columns} FROM main.jobs WHERE id IN ({placeholders})",
+                    job_ids
+                )
+                # Cascades to the applications
+                self.cursor.execute(f"DELETE FROM main.jobs WHERE id IN ({placeholders})", job_ids)
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+
+            moved += len(job_ids)
+            chunks += 1
+
+        return moved
+
+    def create_application_counts(self):
+        # Keep jobs.application_count in step with the applications table
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_application_count_insert AFTER INSERT ON applications
+        BEGIN
+            UPDATE jobs SET application_count = application_count + 1 WHERE id = new.job_id;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_application_count_delete AFTER DELETE ON applications
+        BEGIN
+            UPDATE jobs SET application_count = application_count - 1 WHERE id = old.job_id;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_application_count_update AFTER UPDATE OF job_id ON applications
+        WHEN new.job_id IS NOT old.job_id
+        BEGIN
+            UPDATE jobs SET application_count = application_count - 1 WHERE id = old.job_id;
+            UPDATE jobs SET application_count = application_count + 1 WHERE id = new.job_id;
+        END
+        ''')
+
+    def create_salary_index(self):
+        # R*Tree over salary range x posted date so band searches never scan `jobs`.
+        # Kept in sync by triggers; the R*Tree stores 32-bit floats, so queries
+        # re-check the exact bounds on `jobs` afterwards.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_salary_rtree'")
+        exists = self.cursor.fetchone() is not None
+
+        self.cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_salary_rtree USING rtree(
+            id, salary_min, salary_max, posted_min, posted_max
+        )
+        ''')
+
+        posted = "new.posted_date"
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS jobs_salary_rtree_insert AFTER INSERT ON jobs
+        WHEN new.salary_min IS NOT NULL
+        BEGIN
+            INSERT INTO jobs_salary_rtree VALUES (
+                new.id, new.salary_min, COALESCE(new.salary_max, new.salary_min), {posted}, {posted});
+        END
+        ''')
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS jobs_salary_rtree_update
+        AFTER UPDATE OF salary_min, salary_max, posted_date ON jobs
+        BEGIN
+            DELETE FROM jobs_salary_rtree WHERE id = old.id;
+            INSERT INTO jobs_salary_rtree
+            SELECT new.id, new.salary_min, COALESCE(new.salary_max, new.salary_min), {posted}, {posted}
+            WHERE new.salary_min IS NOT NULL;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_salary_rtree_delete AFTER DELETE ON jobs
+        BEGIN
+            DELETE FROM jobs_salary_rtree WHERE id = old.id;
+        END
+        ''')
+
+        if not exists:
+            self.cursor.execute('''
+            INSERT INTO jobs_salary_rtree
+            SELECT id, salary_min, COALESCE(salary_max, salary_min), posted_date, posted_date
+            FROM jobs WHERE salary_min IS NOT NULL
+            ''')
+
+    def create_locations(self):
+        # Location dimension: one row per normalized location (parse_location),
+        # shared by hot and archived jobs and only deleted by
+        # renormalize_locations. Geocoded locations are also in an R*Tree of
+        # their coordinates for radius searches.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS locations (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            city TEXT,
+            country TEXT,
+            latitude REAL,
+            longitude REAL,
+            remote INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS locations_rtree USING rtree(
+            id, min_latitude, max_latitude, min_longitude, max_longitude
+        )
+        ''')
+
+    def location_id(self, text):
+        # (id, name) of the normalized location for free text, added to the
+        # dimension if new; (None, None) for no location
+        location = parse_location(text)
+        if location is None:
+            return None, None
+        name, city, country, latitude, longitude, remote = location
+        self.cursor.execute("SELECT id FROM locations WHERE name = ?", (name,))
+        row = self.cursor.fetchone()
+        if row:
+            return row[0], name
+        self.cursor.execute(
+            "INSERT INTO locations (name, city, country, latitude, longitude, remote) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, city, country, latitude, longitude, remote))
+        new_id = self.cursor.lastrowid
+        if latitude is not None:
+            self.cursor.execute("INSERT INTO locations_rtree VALUES (?, ?, ?, ?, ?)",
+                                (new_id, latitude, latitude, longitude, longitude))
+        return new_id, name
+
+    def backfill_locations(self, schema):
+        # Normalize the free-text locations of jobs stored before location_id
+        self.cursor.execute(f"SELECT DISTINCT location FROM {schema}.jobs WHERE location IS NOT NULL")
+        for text, in self.cursor.fetchall():
+            new_id, name = self.location_id(text)
+            self.cursor.execute(f"UPDATE {schema}.jobs SET location_id = ?, location = ? WHERE location = ?",
+                                (new_id, name, text))
+
+    def renormalize_locations(self):
+        # Move jobs and saved searches off locations that parse_location now
+        # names differently, e.g. "Austin, TX" from before states resolved to
+        # their city. The old rows go, so each is only moved once.
+        self.cursor.execute("SELECT id, name FROM locations")
+        for old_id, old_name in self.cursor.fetchall():
+            new_id, new_name = self.location_id(old_name)
+            if new_id == old_id:
+                continue
+            for schema in ('main', 'archive'):
+                self.cursor.execute(f"UPDATE {schema}.jobs SET location_id = ?, location = ? WHERE location_id = ?",
+                                    (new_id, new_name, old_id))
+            # Searches filed under their location are filed under the new name
+            self.cursor.execute(
+                "UPDATE saved_searches SET term = CASE WHEN term = 'location=' || location "
+                "THEN 'location=' || :new ELSE term END, location = :new WHERE location = :old",
+                {'new': new_name, 'old': old_name})
+            self.cursor.execute("DELETE FROM locations_rtree WHERE id = ?", (old_id,))
+            self.cursor.execute("DELETE FROM locations WHERE id = ?", (old_id,))
+
+    def locations_within(self, near, radius_km):
+        # Ids of the geocoded locations within radius_km of `near`, a place name
+        # or a (latitude, longitude) pair. The R*Tree finds the locations in the
+        # circle's bounding box; the exact distance is then checked on those.
+        if isinstance(near, str):
+            location = parse_location(near)
+            if location is None or location[3] is None:
+                raise ValueError(f"Unknown place: {near}")
+            latitude, longitude = location[3], location[4]
+        else:
+            latitude, longitude = near
+        cursor = self.reader()
+        ids = []
+        for min_latitude, max_latitude, min_longitude, max_longitude in bounding_boxes(latitude, longitude,
+                                                                                       radius_km):
+            cursor.execute('''
+            SELECT l.id, l.latitude, l.longitude FROM locations_rtree r JOIN locations l ON l.id = r.id
+            WHERE r.max_latitude >= ? AND r.min_latitude <= ? AND r.max_longitude >= ? AND r.min_longitude <= ?
+            ''', (min_latitude, max_latitude, min_longitude, max_longitude))
+            ids.extend(location_id for location_id, location_latitude, location_longitude in cursor.fetchall()
+                       if distance_km(latitude, longitude, location_latitude, location_longitude) <= radius_km)
+        return ids
+
+    def create_duplicate_index(self):
+        # MinHash signature per job, and its LSH buckets. Both go with the job
+        # via ON DELETE CASCADE.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs_minhash (
+            job_id INTEGER PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+            signature BLOB NOT NULL
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs_lsh (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+            PRIMARY KEY (band, bucket, job_id)
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lsh_job ON jobs_lsh(job_id)")
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_duplicate_of ON jobs(duplicate_of) WHERE duplicate_of IS NOT NULL")
+
+        # When an original posting goes, its oldest duplicate takes its place
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_duplicate_promote AFTER DELETE ON jobs
+        BEGIN
+            UPDATE jobs SET duplicate_of = (SELECT MIN(id) FROM jobs WHERE duplicate_of = old.id)
+            WHERE duplicate_of = old.id AND id != (SELECT MIN(id) FROM jobs WHERE duplicate_of = old.id);
+            UPDATE jobs SET duplicate_of = NULL WHERE duplicate_of = old.id;
+        END
+        ''')
+
+    def find_duplicate_job(self, title, company, description):
+        # (job_id, similarity) of the posting this one would duplicate, or None
+        signature = minhash_signature(job_shingles(title, company, description))
+        return self.find_similar_job(signature) if signature else None
+
+    def find_similar_job(self, signature):
+        # Jobs sharing an LSH bucket with `signature` are the candidates; the best
+        # one whose signature agrees in at least DUPLICATE_THRESHOLD of positions
+        # wins. Duplicates resolve to their original.
+        buckets = list(lsh_buckets(signature))
+        # OR'ed pairs rather than a row-value IN, which SQLite would answer by scan
+        bucket_clauses = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        self.cursor.execute(f"""
+        SELECT COALESCE(j.duplicate_of, j.id), m.signature
+        FROM jobs_minhash m
+        JOIN jobs j ON j.id = m.job_id
+        WHERE m.job_id IN (SELECT job_id FROM jobs_lsh WHERE {bucket_clauses})
+        """, [value for bucket in buckets for value in bucket])
+
+        best = None
+        for job_id, candidate in self.cursor.fetchall():
+            matches = sum(a == b for a, b in zip(signature, unpack_signature(candidate)))
+            similarity = matches / MINHASH_SIZE
+            if similarity >= DUPLICATE_THRESHOLD and (best is None or similarity > best[1]):
+                best = (job_id, similarity)
+        return best
+
+    def index_job_signature(self, job_id, signature):
+        self.cursor.execute("INSERT OR REPLACE INTO jobs_minhash (job_id, signature) VALUES (?, ?)",
+                            (job_id, pack_signature(signature)))
+        self.cursor.executemany("INSERT OR IGNORE INTO jobs_lsh (band, bucket, job_id) VALUES (?, ?, ?)",
+                                [(band, bucket, job_id) for band, bucket in lsh_buckets(signature)])
+
+    def dedupe_jobs(self, chunk_size=500, merge=False):
+        # Batch job for existing databases: sign every job without a signature,
+        # oldest first, flagging each as a duplicate of any earlier posting it
+        # matches. One transaction per chunk. With `merge`, flagged jobs are then
+        # deleted and their applications moved to the original (unless the seeker
+        # already applied there). Returns (flagged, deleted).
+        flagged = 0
+        while True:
+            self.cursor.execute("""
+            SELECT id, title, company, description FROM jobs j
+            WHERE NOT EXISTS (SELECT 1 FROM jobs_minhash WHERE job_id = j.id)
+            ORDER BY posted_date, id LIMIT ?
+            """, (chunk_size,))
+            rows = self.cursor.fetchall()
+            if not rows:
+                break
+            for job_id, title, company, description in rows:
+                signature = minhash_signature(job_shingles(title, company, self.decompress_text(description) or ""))
+                if signature is None:
+                    # Nothing to compare; an all-zero signature keeps it out of later chunks
+                    self.cursor.execute("INSERT INTO jobs_minhash (job_id, signature) VALUES (?, ?)",
+                                        (job_id, pack_signature([0] * MINHASH_SIZE)))
+                    continue
+                duplicate = self.find_similar_job(signature)
+                if duplicate:
+                    self.cursor.execute("UPDATE jobs SET duplicate_of = ? WHERE id = ?", (duplicate[0], job_id))
+                    flagged += 1
+                self.index_job_signature(job_id, signature)
+            self.conn.commit()
+
+        deleted = 0
+        if merge:
+            try:
+                self.cursor.execute("""
+                UPDATE OR IGNORE applications
+                SET job_id = (SELECT duplicate_of FROM jobs WHERE id = applications.job_id)
+                WHERE job_id IN (SELECT id FROM jobs WHERE duplicate_of IS NOT NULL)
+                """)
+                # Applications left behind were duplicates too and cascade away
+                self.cursor.execute("DELETE FROM jobs WHERE duplicate_of IS NOT NULL")
+                deleted = self.cursor.rowcount
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        return flagged, deleted
+
+    def create_change_log(self):
+        # Every write to jobs and applications, from any connection, appends
+        # (table, row id, job id) here, so open windows can fetch just the rows
+        # that changed since the last sequence number they saw
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL
+        )
+        ''')
+        for table, job_column in (('jobs', 'id'), ('applications', 'job_id')):
+            for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+                self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_id, job_id)
+                    VALUES ('{table}', {row}.id, {row}.{job_column});
+                END
+                ''')
+
+    def latest_change(self):
+        # Highest change sequence number ever assigned (0 for none)
+        self.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
+
+    def changes_pending(self):
+        # Cheap check, without touching any table, for writes since the last call:
+        # data_version moves on commits by other connections, total_changes on ours
+        self.cursor.execute("PRAGMA data_version")
+        version = self.cursor.fetchone()[0]
+        if version == self.change_version and self.conn.total_changes == self.change_total:
+            return False
+        self.change_version = version
+        self.change_total = self.conn.total_changes
+        return True
+
+    def changes_since(self, seq):
+        # Returns (latest_seq, changed) where changed maps 'jobs' to the ids of jobs
+        # written (directly, or through their applications) and 'applications' to
+        # the ids of applications written after `seq`. changed is None when the
+        # log has been pruned past `seq` and the caller has to reload everything.
+        latest, entries = self.change_log_since(seq)
+        if entries is None:
+            return latest, None
+
+        changed = {'jobs': set(), 'applications': set()}
+        for table_name, row_id, job_id in entries:
+            changed['jobs'].add(job_id)
+            if table_name == 'applications':
+                changed['applications'].add(row_id)
+        return latest, changed
+
+    def job_changes_since(self, seq):
+        # (latest_seq, ids of the jobs inserted, updated or deleted after `seq`),
+        # leaving out writes to applications; the ids are None when the log has
+        # been pruned past `seq`. See publish_catalog.
+        latest, entries = self.change_log_since(seq)
+        if entries is None:
+            return latest, None
+        return latest, {row_id for table_name, row_id, job_id in entries if table_name == 'jobs'}
+
+    def change_log_since(self, seq):
+        # (latest_seq, (table_name, row_id, job_id) entries after `seq`), with
+        # None for the entries once the log has been pruned past `seq`
+        latest = self.latest_change()
+        self.cursor.execute("SELECT MIN(seq) FROM change_log")
+        oldest = self.cursor.fetchone()[0]
+        if latest > seq and (oldest is None or oldest > seq + 1):
+            return latest, None
+        self.cursor.execute("SELECT table_name, row_id, job_id FROM change_log WHERE seq > ? AND seq <= ?",
+                            (seq, latest))
+        entries = self.cursor.fetchall()
+        # Deltas are read through reader(), which must not be behind the log
+        if latest > seq and self.snapshot is not None:
+            self.refresh_snapshot(force=True)
+        return latest, entries
+
+    def prune_change_log(self, keep=CHANGE_LOG_RETENTION):
+        self.cursor.execute("DELETE FROM change_log WHERE seq <= ?", (self.latest_change() - keep,))
+        pruned = self.cursor.rowcount
+        self.conn.commit()
+        return pruned
+
+    def storage_report(self, schema='main', fragmentation=False):
+        # Page usage of the main or archive file. Fragmentation is the share of
+        # b-tree pages that do not directly follow the previous page of their
+        # table or index, i.e. the seeks a full scan makes; it reads every page
+        # (through dbstat), so it is only computed on request.
+        report = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum', 'journal_mode'):
+            self.cursor.execute(f"PRAGMA {schema}.{pragma}")
+            report[pragma] = self.cursor.fetchone()[0]
+        report['auto_vacuum'] = ['none', 'full', 'incremental'][report['auto_vacuum']]
+        report['free_ratio'] = report['freelist_count'] / report['page_count'] if report['page_count'] else 0.0
+        if fragmentation:
+            previous = {}
+            pages = jumps = 0
+            for name, page in self.cursor.execute("SELECT name, pageno FROM dbstat(?)", (schema,)).fetchall():
+                if name in previous:
+                    pages += 1
+                    jumps += page != previous[name] + 1
+                previous[name] = page
+            report['fragmentation'] = jumps / pages if pages else 0.0
+        return report
+
+    def run_maintenance(self, vacuum_pages=VACUUM_STEP_PAGES, analyze=False, fragmentation=False):
+        # One bounded round of housekeeping on both database files:
+        # - ANALYZE when enough rows changed since the last one (see
+        #   ANALYZE_CHANGE_RATIO) or `analyze` is set, PRAGMA optimize otherwise
+        # - incremental vacuum of up to `vacuum_pages` free pages per file
+        # - a WAL checkpoint, for files in WAL mode
+        # Returns what was done, with storage_report before and after. Pending
+        # transactions are committed first.
+        self.conn.commit()
+        schemas = ('main', 'archive')
+        result = {'before': {schema: self.storage_report(schema, fragmentation) for schema in schemas}}
+
+        self.cursor.execute("SELECT name, value FROM maintenance WHERE name IN ('analyzed_seq', 'analyzed_rows')")
+        state = dict(self.cursor.fetchall())
+        latest = self.latest_change()
+        changes = latest - state.get('analyzed_seq', 0)
+        threshold = max(ANALYZE_MIN_CHANGES, ANALYZE_CHANGE_RATIO * state.get('analyzed_rows', 0))
+        result['changes'] = changes
+        result['analyzed'] = bool(analyze or 'analyzed_seq' not in state or changes >= threshold)
+        # Also bounds any ANALYZE that PRAGMA optimize decides to run
+        self.cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        if result['analyzed']:
+            self.cursor.execute("ANALYZE")
+            # Row counts as the statistics saw them: the first field of `stat`
+            self.cursor.execute("""
+            SELECT COALESCE(SUM(row_count), 0) FROM (
+                SELECT MAX(CAST(stat AS INTEGER)) AS row_count FROM main.sqlite_stat1
+                WHERE tbl IN ('jobs', 'applications') GROUP BY tbl
+            )
+            """)
+            rows = self.cursor.fetchone()[0]
+            self.cursor.executemany("INSERT OR REPLACE INTO maintenance (name, value) VALUES (?, ?)",
+                                    [('analyzed_seq', latest), ('analyzed_rows', rows),
+                                     ('analyzed_date', int(time.time()))])
+        else:
+            self.cursor.execute("PRAGMA optimize")
+        self.conn.commit()
+
+        result['vacuumed'] = {}
+        result['checkpoint'] = {}
+        for schema in schemas:
+            before = result['before'][schema]
+            if before['auto_vacuum'] == 'incremental' and before['freelist_count'] and vacuum_pages:
+                # execute() would only run the first step, freeing one page
+                self.conn.executescript(f"PRAGMA {schema}.incremental_vacuum({int(vacuum_pages)})")
+                self.cursor.execute(f"PRAGMA {schema}.freelist_count")
+                result['vacuumed'][schema] = before['freelist_count'] - self.cursor.fetchone()[0]
+            if before['journal_mode'] == 'wal':
+                self.cursor.execute(f"PRAGMA {schema}.wal_checkpoint(TRUNCATE)")
+                busy, log_pages, checkpointed = self.cursor.fetchone()
+                result['checkpoint'][schema] = {'busy': bool(busy), 'log_pages': log_pages,
+                                                'checkpointed': checkpointed}
+
+        result['after'] = {schema: self.storage_report(schema, fragmentation) for schema in schemas}
+        # Free pages left for later steps
+        result['pending'] = sum(report['freelist_count'] for report in result['after'].values()
+                                if report['auto_vacuum'] == 'incremental')
+        return result
+
+    def convert_auto_vacuum(self):
+        # Files created before auto_vacuum was set only switch to incremental on
+        # a full VACUUM, which rewrites the file and locks it while it runs.
+        # Returns the schemas converted.
+        converted = []
+        for schema in ('main', 'archive'):
+            self.cursor.execute(f"PRAGMA {schema}.auto_vacuum")
+            if self.cursor.fetchone()[0] != 2:
+                self.cursor.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+                self.cursor.execute(f"VACUUM {schema}")
+                converted.append(schema)
+        return converted
+
+    def database_sizes(self):
+        # Bytes in use by each file, free pages included
+        sizes = {}
+        for schema in ('main', 'archive'):
+            page_count = self.cursor.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+            page_size = self.cursor.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+            sizes[schema] = page_count * page_size
+        return sizes
+
+    def vacuum(self):
+        # Rewrite both files to return their free pages to the file system
+        self.conn.commit()
+        for schema in ('main', 'archive'):
+            self.cursor.execute(f"VACUUM {schema}")
+
+    def create_saved_searches(self):
+        # Saved searches form a reverse index over their filters, so a new job
+        # is matched against only the searches it could satisfy: each search is
+        # filed under one term (see saved_search_term), indexed, or its salary
+        # band goes in an R*Tree. Candidates are then checked against all their
+        # filters in SQL. Unset filters are NULL.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seeker_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            title TEXT,
+            company TEXT,
+            job_type TEXT,
+            category TEXT,
+            location TEXT,
+            min_salary REAL,
+            max_salary REAL,
+            term TEXT,
+            created_date INTEGER
+        )
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_saved_searches_term ON saved_searches(term)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_saved_searches_seeker ON saved_searches(seeker_id)")
+        self.cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS saved_searches_salary_rtree USING rtree(id, salary_min, salary_max)
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS saved_searches_salary_rtree_delete AFTER DELETE ON saved_searches
+        BEGIN
+            DELETE FROM saved_searches_salary_rtree WHERE id = old.id;
+        END
+        ''')
+
+        # Remote and radius filters (see saved_search_filters). A radius search
+        # with no keyword, location or category is filed in this R*Tree under
+        # the bounding boxes of its circle (bounding_boxes), as id * 2 + box.
+        self.add_missing_columns('saved_searches', [
+            ('remote', 'INTEGER'), ('near_latitude', 'REAL'), ('near_longitude', 'REAL'), ('within_km', 'REAL'),
+            ('include_remote', 'INTEGER')])
+        self.cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS saved_searches_area_rtree
+        USING rtree(id, min_latitude, max_latitude, min_longitude, max_longitude)
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS saved_searches_area_rtree_delete AFTER DELETE ON saved_searches
+        BEGIN
+            DELETE FROM saved_searches_area_rtree WHERE id IN (old.id * 2, old.id * 2 + 1);
+        END
+        ''')
+        # Those that also want remote jobs, which have no coordinates
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_saved_searches_include_remote ON saved_searches(id)
+        WHERE term IS NULL AND include_remote = 1
+        ''')
+
+        # One row per (saved search, matching job), shown on the seeker's dashboard
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seeker_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            search_id INTEGER NOT NULL REFERENCES saved_searches(id) ON DELETE CASCADE,
+            job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+            created_date INTEGER,
+            read INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (search_id, job_id)
+        )
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_seeker ON notifications(seeker_id, read)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_job ON notifications(job_id)")
+
+    def create_application_events(self):
+        # Append-only log of application status transitions, written by triggers
+        # in the same transaction as the change. Rows keep the job's provider so
+        # they outlive deleted and archived jobs.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'application_events'")
+        exists = self.cursor.fetchone() is not None
+
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS application_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            application_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            provider_id INTEGER,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            applied_date INTEGER,
+            event_date INTEGER NOT NULL
+        )
+        ''')
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_application_events_application ON application_events(application_id)")
+        for event in ('UPDATE', 'DELETE'):
+            self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS application_events_no_{event.lower()} BEFORE {event} ON application_events
+            BEGIN
+                SELECT RAISE(ABORT, 'application_events is append-only');
+            END
+            ''')
+
+        now = "CAST(strftime('%s', 'now') AS INTEGER)"
+        provider = "(SELECT provider_id FROM jobs WHERE id = new.job_id)"
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS application_events_insert AFTER INSERT ON applications
+        BEGIN
+            INSERT INTO application_events
+                (application_id, job_id, provider_id, from_status, to_status, applied_date, event_date)
+            VALUES (new.id, new.job_id, {provider}, NULL, COALESCE(new.status, 'Pending'), new.application_date,
+                    COALESCE(new.application_date, {now}));
+        END
+        ''')
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS application_events_status AFTER UPDATE OF status ON applications
+        WHEN old.status IS NOT new.status
+        BEGIN
+            INSERT INTO application_events
+                (application_id, job_id, provider_id, from_status, to_status, applied_date, event_date)
+            VALUES (new.id, new.job_id, {provider}, old.status, new.status, new.application_date, {now});
+        END
+        ''')
+
+        # Funnel rollups, kept current by a trigger on the log: per provider, job
+        # and UTC day, how many applications first reached each stage, and the
+        # seconds they took from applying. Each event also counts towards the
+        # provider's all-jobs (ROLLUP_ALL_JOBS) and all-time (ROLLUP_ALL_TIME) rows,
+        # so totals are a handful of primary key lookups.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS application_rollups (
+            provider_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            reached INTEGER NOT NULL,
+            seconds INTEGER NOT NULL,
+            PRIMARY KEY (provider_id, job_id, day, stage)
+        ) WITHOUT ROWID
+        ''')
+        stage = "CASE WHEN new.from_status IS NULL THEN 'Applied' ELSE new.to_status END"
+        self.cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS application_events_rollup AFTER INSERT ON application_events
+        WHEN new.provider_id IS NOT NULL AND (new.from_status IS NULL OR NOT EXISTS (
+            SELECT 1 FROM application_events
+            WHERE application_id = new.application_id AND to_status = new.to_status
+              AND from_status IS NOT NULL AND id < new.id
+        ))
+        BEGIN
+            INSERT INTO application_rollups (provider_id, job_id, day, stage, reached, seconds)
+            SELECT new.provider_id, jobs.job_id, days.day, {stage}, 1,
+                   MAX(0, new.event_date - COALESCE(new.applied_date, new.event_date))
+            FROM (SELECT new.job_id AS job_id UNION ALL SELECT {ROLLUP_ALL_JOBS}) jobs,
+                 (SELECT new.event_date / 86400 AS day UNION ALL SELECT {ROLLUP_ALL_TIME}) days
+            WHERE true
+            ON CONFLICT (provider_id, job_id, day, stage)
+            DO UPDATE SET reached = reached + 1, seconds = seconds + excluded.seconds;
+        END
+        ''')
+
+        if not exists:
+            # Applications from before the log: their current status is dated
+            # at the time they were made, as nothing better is known
+            self.cursor.execute(f"""
+            INSERT INTO application_events
+                (application_id, job_id, provider_id, from_status, to_status, applied_date, event_date)
+            SELECT a.id, a.job_id, j.provider_id, NULL, 'Pending', a.application_date,
+                   COALESCE(a.application_date, {now})
+            FROM applications a JOIN jobs j ON j.id = a.job_id
+            ORDER BY a.id
+            """)
+            self.cursor.execute(f"""
+            INSERT INTO application_events
+                (application_id, job_id, provider_id, from_status, to_status, applied_date, event_date)
+            SELECT a.id, a.job_id, j.provider_id, 'Pending', a.status, a.application_date,
+                   COALESCE(a.application_date, {now})
+            FROM applications a JOIN jobs j ON j.id = a.job_id
+            WHERE a.status IS NOT NULL AND a.status != 'Pending'
+            ORDER BY a.id
+            """)
+
+    def get_application_events(self, application_id):
+        # Status history of one application, oldest first: (from, to, date)
+        cursor = self.reader()
+        cursor.execute(
+            "SELECT from_status, to_status, event_date FROM application_events WHERE application_id = ? ORDER BY id",
+            (application_id,)
+        )
+        return cursor.fetchall()
+
+    def get_application_funnel(self, provider_id, job_id=None):
+        # {stage: (applications that reached it, average seconds from applying)}
+        # over all time, for one job or all of the provider's jobs, read from the
+        # all-time rollup rows
+        cursor = self.reader()
+        cursor.execute(
+            "SELECT stage, reached, seconds FROM application_rollups WHERE provider_id = ? AND job_id = ? AND day = ?",
+            (provider_id, job_id or ROLLUP_ALL_JOBS, ROLLUP_ALL_TIME)
+        )
+        funnel = {stage: (0, None) for stage in FUNNEL_STAGES}
+        for stage, reached, seconds in cursor.fetchall():
+            if stage in funnel:
+                funnel[stage] = (reached, seconds / reached if reached else None)
+        return funnel
+
+    def get_application_activity(self, provider_id, start, end=None, job_id=None):
+        # Daily funnel activity between two epochs: [(day start epoch, {stage:
+        # applications that first reached it that day})], oldest first, for days
+        # with any activity
+        cursor = self.reader()
+        end = end if end is not None else int(time.time())
+        cursor.execute("""
+        SELECT day, stage, reached FROM application_rollups
+        WHERE provider_id = ? AND job_id = ? AND day BETWEEN ? AND ?
+        ORDER BY day
+        """, (provider_id, job_id or ROLLUP_ALL_JOBS, start // 86400, end // 86400))
+        activity = {}
+        for day, stage, reached in cursor.fetchall():
+            activity.setdefault(day * 86400, {})[stage] = reached
+        return list(activity.items())
+
+    def save_search(self, seeker_id, name, filters, search_id=None):
+        # `search_id` stores the search under a given id, as the shard copies of
+        # ShardedDatabaseManager are. Returns the id.
+        filters = saved_search_filters(filters)
+        term = saved_search_term(filters)
+        try:
+            self.cursor.execute(
+                f"INSERT INTO saved_searches (id, seeker_id, name, {', '.join(SAVED_SEARCH_FIELDS)}, term, "
+                f"created_date) VALUES (?, ?, ?, {', '.join('?' * len(SAVED_SEARCH_FIELDS))}, ?, ?)",
+                [search_id, seeker_id, name] + [filters.get(field) for field in SAVED_SEARCH_FIELDS]
+                + [term, int(time.time())]
+            )
+            search_id = self.cursor.lastrowid
+            if term is None and 'within_km' in filters:
+                boxes = bounding_boxes(filters['near_latitude'], filters['near_longitude'], filters['within_km'])
+                for box, bounds in enumerate(boxes):
+                    self.cursor.execute("INSERT INTO saved_searches_area_rtree VALUES (?, ?, ?, ?, ?)",
+                                        (search_id * 2 + box,) + bounds)
+            elif term is None:
+                # An inverted band (min above max) is stored the right way round;
+                # the box still covers every job that could match it
+                band = sorted((filters.get('min_salary', -SALARY_UNBOUNDED),
+                               filters.get('max_salary', SALARY_UNBOUNDED)))
+                self.cursor.execute("INSERT INTO saved_searches_salary_rtree VALUES (?, ?, ?)", [search_id] + band)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return search_id
+
+    def delete_saved_search(self, search_id, seeker_id):
+        # Its notifications go with it
+        self.cursor.execute("DELETE FROM saved_searches WHERE id = ? AND seeker_id = ?", (search_id, seeker_id))
+        deleted = self.cursor.rowcount == 1
+        self.conn.commit()
+        return deleted
+
+    def get_saved_searches(self, seeker_id):
+        # (id, name, filters, created_date) of the seeker's searches
+        cursor = self.reader()
+        cursor.execute(f"""
+        SELECT id, name, created_date, {', '.join(SAVED_SEARCH_FIELDS)} FROM saved_searches
+        WHERE seeker_id = ? ORDER BY id
+        """, (seeker_id,))
+        return [(row[0], row[1], saved_search_filters(dict(zip(SAVED_SEARCH_FIELDS, row[3:]))), row[2])
+                for row in cursor.fetchall()]
+
+    def notify_saved_searches(self, job_id, title, company, job_type, category, location, salary_min, salary_max,
+                              created_date):
+        # Record a notification for every saved search the new job matches, in
+        # the caller's transaction. The filters are applied as in jobs_query.
+        # Returns the number of notifications.
+        latitude = longitude = remote = None
+        if location:
+            self.cursor.execute("SELECT latitude, longitude, remote FROM locations WHERE name = ?", (location,))
+            latitude, longitude, remote = self.cursor.fetchone() or (None, None, None)
+        terms = sorted(job_search_terms(title, company, job_type, category, location, remote))
+        self.cursor.execute("""
+        INSERT OR IGNORE INTO notifications (seeker_id, search_id, job_id, created_date)
+        SELECT s.seeker_id, s.id, :job_id, :created_date
+        FROM (
+            SELECT id FROM saved_searches WHERE term IN (SELECT value FROM json_each(:terms))
+            UNION ALL
+            SELECT id FROM saved_searches_salary_rtree WHERE salary_min <= :salary_max AND salary_max >= :salary_min
+            UNION ALL
+            SELECT id / 2 FROM saved_searches_area_rtree
+            WHERE min_latitude <= :latitude AND max_latitude >= :latitude
+              AND min_longitude <= :longitude AND max_longitude >= :longitude
+            UNION ALL
+            SELECT id FROM saved_searches WHERE term IS NULL AND include_remote = 1 AND :remote = 1
+        ) c
+        JOIN saved_searches s ON s.id = c.id
+        WHERE (s.title IS NULL OR :title LIKE '%' || s.title || '%')
+          AND (s.company IS NULL OR :company LIKE '%' || s.company || '%')
+          AND (s.job_type IS NULL OR s.job_type = :job_type)
+          AND (s.category IS NULL OR s.category = :category)
+          AND (s.location IS NULL OR s.location = :location)
+          AND (s.min_salary IS NULL OR :salary_max >= s.min_salary)
+          AND (s.max_salary IS NULL OR :salary_min <= s.max_salary)
+          AND (s.remote IS NULL OR s.remote = :remote)
+          AND (s.within_km IS NULL OR (s.include_remote = 1 AND :remote = 1)
+               OR distance_km(s.near_latitude, s.near_longitude, :latitude, :longitude) <= s.within_km)
+        """, {
+            'terms': json.dumps(terms), 'job_id': job_id, 'created_date': created_date,
+            'title': title, 'company': company, 'job_type': job_type, 'category': category,
+            'location': location, 'salary_min': salary_min, 'salary_max': salary_max,
+            'latitude': latitude, 'longitude': longitude, 'remote': remote,
+        })
+        return self.cursor.rowcount
+
+    def get_notifications(self, seeker_id, unread_only=False, limit=50):
+        # Newest first: (id, job_id, job title, company, search name, date, read)
+        cursor = self.reader()
+        cursor.execute(f"""
+        SELECT n.id, n.job_id, j.title, j.company, s.name, n.created_date, n.read
+        FROM notifications n
+        JOIN jobs j ON j.id = n.job_id
+        JOIN saved_searches s ON s.id = n.search_id
+        WHERE n.seeker_id = ? {"AND n.read = 0" if unread_only else ""}
+        ORDER BY n.id DESC LIMIT ?
+        """, (seeker_id, limit))
+        return cursor.fetchall()
+
+    def mark_notifications_read(self, seeker_id):
+        self.cursor.execute("UPDATE notifications SET read = 1 WHERE seeker_id = ? AND read = 0", (seeker_id,))
+        marked = self.cursor.rowcount
+        self.conn.commit()
+        return marked
+
+    def load_compression_dictionaries(self, reload=False):
+        if self.compression_dictionaries is None or reload:
+            self.compression_dictionaries = dict(
+                self.conn.execute("SELECT id, dictionary FROM compression_dictionaries").fetchall())
+        return self.compression_dictionaries
+
+    def compress_text(self, text):
+        # Value to store for a description or cover letter. Values under
+        # COMPRESSION_MIN_BYTES, or that compression would not shrink, stay TEXT;
+        # the rest become a BLOB: one byte naming the shared dictionary used (0 for
+        # none) followed by a raw deflate stream.
+        if not text:
+            return text
+        data = text.encode('utf-8')
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return text
+
+        dictionaries = self.load_compression_dictionaries()
+        dictionary_id = max(dictionaries, default=0)
+        if dictionary_id:
+            compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15,
+                                          zdict=dictionaries[dictionary_id])
+        else:
+            compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+        compressed = bytes([dictionary_id]) + compressor.compress(data) + compressor.flush()
+        return compressed if len(compressed) < len(data) else text
+
+    def decompress_text(self, value):
+        # Inverse of compress_text; also the decompress_text() of SQL queries
+        if not isinstance(value, bytes):
+            return value
+        dictionary_id = value[0]
+        if dictionary_id:
+            dictionaries = self.load_compression_dictionaries()
+            if dictionary_id not in dictionaries:
+                # Trained by another connection since we loaded ours
+                dictionaries = self.load_compression_dictionaries(reload=True)
+            decompressor = zlib.decompressobj(-15, zdict=dictionaries[dictionary_id])
+        else:
+            decompressor = zlib.decompressobj(-15)
+        return (decompressor.decompress(value[1:]) + decompressor.flush()).decode('utf-8')
+
+    def train_compression_dictionary(self, sample_size=500, size=COMPRESSION_DICTIONARY_SIZE):
+        # Build a zlib preset dictionary from runs of 1-4 words that recur across
+        # a sample of the stored texts, so that short texts, which have little
+        # repetition of their own, still compress. Returns the new dictionary id,
+        # or None when there is not enough text to learn from.
+        counts = Counter()
+        for table, column in COMPRESSED_COLUMNS.items():
+            rows = self.conn.execute(
+                f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY random() LIMIT ?",
+                (sample_size,)
+            ).fetchall()
+            for (value,) in rows:
+                words = re.findall(r'\S+\s*', self.decompress_text(value))
+                counts.update({"".join(words[i:i + n]) for n in range(1, 5) for i in range(len(words) - n + 1)})
+
+        # Score by the bytes a segment would save across the sample
+        segments = sorted((segment for segment, count in counts.items() if count > 1 and len(segment) > 3),
+                          key=lambda segment: (counts[segment] - 1) * len(segment), reverse=True)
+        chosen = []
+        chosen_text = ""
+        for segment in segments:
+            if len(chosen_text) + len(segment) > size:
+                break
+            if segment not in chosen_text:
+                chosen.append(segment)
+                chosen_text += segment
+        if not chosen:
+            return None
+
+        # zlib reaches the end of the dictionary most cheaply: most useful last
+        dictionary = "".join(reversed(chosen)).encode('utf-8')[-size:]
+        self.cursor.execute(
+            "INSERT INTO compression_dictionaries (id, dictionary, created_date) "
+            "SELECT COALESCE(MAX(id), 0) + 1, ?, ? FROM compression_dictionaries",
+            (dictionary, int(time.time()))
+        )
+        self.conn.commit()
+        self.load_compression_dictionaries(reload=True)
+        return max(self.compression_dictionaries)
+
+    def compress_text_columns(self, chunk_size=500, schemas=('main', 'archive')):
+        # Compress the TEXT values stored before compression existed, one short
+        # transaction per chunk of rows. Rows already compressed are skipped, so an
+        # interrupted run just resumes. Returns the number of values compressed.
+        compressed = 0
+        for schema in schemas:
+            for table, column in COMPRESSED_COLUMNS.items():
+                last_rowid = 0
+                while True:
+                    self.cursor.execute(f"""
+                    SELECT rowid, {column} FROM {schema}.{table}
+                    WHERE rowid > ? AND typeof({column}) = 'text' AND length(CAST({column} AS BLOB)) >= ?
+                    ORDER BY rowid LIMIT ?
+                    """, (last_rowid, COMPRESSION_MIN_BYTES, chunk_size))
+                    rows = self.cursor.fetchall()
+                    if not rows:
+                        break
+                    last_rowid = rows[-1][0]
+
+                    updates = []
+                    for rowid, text in rows:
+                        value = self.compress_text(text)
+                        if isinstance(value, bytes):
+                            updates.append((value, rowid))
+                    self.cursor.executemany(f"UPDATE {schema}.{table} SET {column} = ? WHERE rowid = ?", updates)
+                    self.conn.commit()
+                    compressed += len(updates)
+        return compressed
+
+    def store_attachment(self, source):
+        # Store a file (binary file object) in the attachment store and return its
+        # hash, for apply_for_job. Identical files are stored once. The file is
+        # moved into place under the write lock so a concurrent gc_attachments
+        # cannot remove it between the two steps.
+        digest, size, temp_path = self.attachments.stage(source)
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.attachments.publish(temp_path, digest)
+            # A re-upload restarts the grace period of an unreferenced file
+            self.cursor.execute(
+                "INSERT INTO attachments (hash, size, created_date) VALUES (?, ?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET created_date = excluded.created_date",
+                (digest, size, int(time.time()))
+            )
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest
+
+    def open_attachment(self, digest):
+        # Context manager yielding a read-only memory map of the file
+        return self.attachments.open(digest)
+
+    def resume_hashes(self):
+        # Attachments the applications (hot or archived) refer to
+        self.cursor.execute("""
+        SELECT resume_hash FROM main.applications WHERE resume_hash IS NOT NULL
+        UNION
+        SELECT resume_hash FROM archive.applications WHERE resume_hash IS NOT NULL
+        """)
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def gc_attachments(self, grace=ATTACHMENT_GC_GRACE, referenced=()):
+        # Delete attachments no application (hot or archived) refers to, and files
+        # the database does not know about. Returns the number of files removed.
+        # The store is listed before the write lock is taken, so writers only
+        # wait for the deletions; files stored after the listing are left alone.
+        # `referenced` are hashes in use by the applications of other databases
+        # (the shards of a ShardedDatabaseManager).
+        cutoff = int(time.time()) - grace
+        old_files = [digest for digest, modified in self.attachments.digests() if modified < cutoff]
+        self.cursor.execute("BEGIN IMMEDIATE")
+        try:
+            self.cursor.execute("""
+            DELETE FROM attachments
+            WHERE created_date < ?
+              AND NOT EXISTS (SELECT 1 FROM main.applications WHERE resume_hash = attachments.hash)
+              AND NOT EXISTS (SELECT 1 FROM archive.applications WHERE resume_hash = attachments.hash)
+              AND hash NOT IN (SELECT value FROM json_each(?))
+            RETURNING hash
+            """, (cutoff, json.dumps(sorted(referenced))))
+            removed = {row[0] for row in self.cursor.fetchall()}
+            self.cursor.execute("SELECT hash FROM attachments")
+            known = {row[0] for row in self.cursor.fetchall()}
+            removed.update(digest for digest in old_files if digest not in known)
+            for digest in removed:
+                self.attachments.remove(digest)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.attachments.remove_stale_temp_files(grace)
+        return len(removed)
+
+    def register_user(self, username, password, user_type, name, email):
+        return self.add_user(username, hash_password(password), user_type, name, email)
+
+    def add_user(self, username, password_hash, user_type, name, email):
+        # register_user with the password already hashed (hash_password), for
+        # callers that hash off the UI thread
+        try:
+            registration_date = int(time.time())
+            self.cursor.execute(
+                "INSERT INTO users (username, password, user_type, name, email, registration_date) VALUES (?, ?, ?, ?, ?, ?)",
+                (username, password_hash, user_type, name, email, registration_date)
+            )
+            self.conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def hash_plaintext_passwords(self, limit=PASSWORD_HASH_BATCH):
+        # Replace up to `limit` plaintext passwords, left by clients from before
+        # hashing, with hashes; returns how many, so that callers repeat while
+        # a full batch was hashed. Run by housekeeping rather than at startup, as
+        # each hash takes as long as a login. Empty passwords (the user copies
+        # of shards) and malformed hashes are left alone, as they never match.
+        # The update only applies if the password is unchanged, in case a login
+        # upgraded it meanwhile.
+        self.cursor.execute("SELECT id, password FROM users WHERE password != ''")
+        plaintext = [(user_id, password) for user_id, password in self.cursor.fetchall()
+                     if parse_password_hash(password) is None and not is_hash_shaped(password)][:limit]
+        for user_id, password in plaintext:
+            self.cursor.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                                (hash_password(password), user_id, password))
+        self.conn.commit()
+        return len(plaintext)
+
+    def get_login(self, username):
+        # (user_data, password_hash) for a username, or (None, None). The hash
+        # goes to check_password, which is slow; see authenticate_user.
+        self.cursor.execute(
+            "SELECT id, user_type, name, email, password FROM users WHERE username = ?", (username,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return None, None
+        return dict(zip(USER_FIELDS, row)), row[4]
+
+    def set_password_hash(self, user_id, password_hash):
+        self.cursor.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+        self.conn.commit()
+
+    def authenticate_user(self, username, password):
+        # Checks the password in this thread; LoginDialog does the same steps
+        # with check_password on a worker thread. Passwords hashed with older
+        # parameters, or left in plaintext by older clients, are rehashed on a
+        # successful login.
+        user_data, password_hash = self.get_login(username)
+        matches, new_hash = check_password(password, password_hash)
+        if not matches:
+            return None
+        if new_hash:
+            self.set_password_hash(user_data['id'], new_hash)
+        return user_data
+
+    def create_session(self, user_id, lifetime=SESSION_LIFETIME):
+        # A new session token for a user who has just authenticated. Only the
+        # token's digest is stored, so the table does not hold usable tokens.
+        token = new_session_token()
+        now = int(time.time())
+        self.cursor.execute(
+            "INSERT INTO sessions (token_hash, user_id, created_date, expires_date) VALUES (?, ?, ?, ?)",
+            (token_digest(token), user_id, now, now + lifetime))
+        self.conn.commit()
+        return token
+
+    def authenticate_session(self, token):
+        # The user of an unexpired session token, or None: one primary key
+        # lookup, always on the file so ended sessions stop working at once
+        if not token:
+            return None
+        self.cursor.execute('''
+        SELECT u.id, u.user_type, u.name, u.email FROM sessions s JOIN users u ON u.id = s.user_id
+        WHERE s.token_hash = ? AND s.expires_date > ?
+        ''', (token_digest(token), int(time.time())))
+        row = self.cursor.fetchone()
+        return dict(zip(USER_FIELDS, row)) if row else None
+
+    def end_session(self, token):
+        self.cursor.execute("DELETE FROM sessions WHERE token_hash = ?", (token_digest(token),))
+        self.conn.commit()
+        return self.cursor.rowcount == 1
+
+    def prune_sessions(self):
+        self.cursor.execute("DELETE FROM sessions WHERE expires_date <= ?", (int(time.time()),))
+        pruned = self.cursor.rowcount
+        self.conn.commit()
+        return pruned
+
+    def post_job(self, provider_id, title, company, salary, job_type, description, location=None, category=None,
+                 deadline=None, duplicates='flag'):
+        # `salary` may be a number, a (min, max) pair or feed text like "15-20 LPA".
+        # See insert_job for `duplicates`. Returns the job id.
+        try:
+            job_id, _ = self.insert_job(provider_id, title, company, salary, job_type, description,
+                                        int(time.time()), location, category, deadline, duplicates)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return job_id
+
+    def insert_job(self, provider_id, title, company, salary, job_type, description, posted_date, location,
+                   category, deadline, duplicates='flag'):
+        # A near-duplicate of an existing posting is inserted with duplicate_of set
+        # ('flag'), not inserted at all ('merge'), or inserted as is ('allow').
+        # Returns (job_id, inserted); job_id is the original's when merged.
+        salary_min, salary_max = parse_salary(salary)
+        signature = minhash_signature(job_shingles(title, company, description or ""))
+        duplicate = self.find_similar_job(signature) if signature and duplicates != 'allow' else None
+        if duplicate and duplicates == 'merge':
+            return duplicate[0], False
+
+        location_id, location = self.location_id(location)
+        self.cursor.execute(
+            "INSERT INTO jobs (provider_id, title, company, salary, salary_min, salary_max, job_type, description, posted_date, location, location_id, category, deadline, duplicate_of) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (provider_id, title, company, salary_min, salary_min, salary_max, job_type,
+             self.compress_text(description), posted_date, location, location_id, category or None, deadline,
+             duplicate[0] if duplicate else None)
+        )
+        job_id = self.cursor.lastrowid
+        if signature:
+            self.index_job_signature(job_id, signature)
+        # Duplicates are hidden from searches, so they raise no alerts either
+        if not duplicate:
+            self.notify_saved_searches(job_id, title, company, job_type, category or None, location,
+                                       salary_min, salary_max, posted_date)
+        return job_id, True
+
+    def import_jobs_feed(self, feed_path, provider_id):
+        # Import a feed in the jobs_database.json shape (UUID-keyed job objects)
+        with open(feed_path, encoding='utf-8') as feed_file:
+            feed = json.load(feed_file)
+        return self.import_jobs(feed.values(), provider_id)
+
+    def import_jobs(self, jobs, provider_id, duplicates='flag'):
+        # Insert job objects (feed field names) in one transaction. `jobs` may be
+        # any iterable, so large inputs are streamed rather than held in memory.
+        # Near-duplicates, also of earlier jobs in the same feed, are handled as
+        # in insert_job. Returns the number of jobs inserted.
+        inserted = 0
+        try:
+            for job in jobs:
+                posted_date = to_epoch(job.get('posted_date')) or int(time.time())
+                _, was_inserted = self.insert_job(
+                    provider_id, job['title'], job['company'], job.get('salary'), job.get('type', 'Full-time'),
+                    job.get('description', ''), posted_date, job.get('location'), job.get('category'),
+                    job.get('deadline'), duplicates)
+                inserted += was_inserted
+            self.conn.commit()
+        except (sqlite3.Error, KeyError, ValueError):
+            self.conn.rollback()
+            raise
+        return inserted
+
+    def get_jobs(self, filters=None, sort='posted_date', descending=True):
+        cursor = self.reader()
+        cursor.execute(*self.jobs_query(filters, order=sort_order(JOB_SORTS, sort, descending, 'j.id')))
+        return cursor.fetchall()
+
+    def iter_jobs(self, filters=None, sort='posted_date', descending=True):
+        # Like get_jobs, but returns a cursor that streams the rows
+        return self.reader().connection.cursor().execute(
+            *self.jobs_query(filters, order=sort_order(JOB_SORTS, sort, descending, 'j.id')))
+
+    def iter_catalog_jobs(self, job_ids=None):
+        # Streams (id, title, company, location, description, salary_min,
+        # salary_max, posted_date, deadline, job_type, category) of the listed
+        # jobs: all current ones that are not flagged as duplicates, or those
+        # among `job_ids`
+        query = '''
+        SELECT id, title, company, location, decompress_text(description) AS description, salary_min, salary_max,
+               posted_date, deadline, job_type, category
+        FROM jobs WHERE duplicate_of IS NULL
+        '''
+        params = ()
+        if job_ids is not None:
+            query += " AND id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(sorted(job_ids)),)
+        return self.reader().connection.cursor().execute(query + " ORDER BY id", params)
+
+    def get_jobs_page(self, filters=None, sort='posted_date', descending=True, after=None, limit=PAGE_SIZE):
+        # One page of get_jobs rows; see fetch_page
+        return self.fetch_page(self.jobs_query, JOB_SORTS, 'j.id', filters, sort, descending, after, limit)
+
+    def fetch_page(self, build_query, sorts, id_column, filters, sort, descending, after, limit):
+        # Keyset pagination: returns (rows, after) where `after` is the (sort value,
+        # id) of the last row, to be passed back for the next page, or None after
+        # the last page. Each page seeks into the sort key's index instead of
+        # skipping the rows before it, so a page deep into a million-row listing
+        # costs the same as the first. A comparison never matches NULL, so rows
+        # with a NULL sort value are read as a separate segment ordered by id,
+        # first when ascending and last when descending as in sort_order.
+        sorted_order = sort_order(sorts, sort, descending, id_column)
+        column, row_index, nullable, collation = sorts[sort]
+        direction = "DESC" if descending else "ASC"
+        compare = "<" if descending else ">"
+        collate = f" COLLATE {collation}" if collation else ""
+
+        segments = [False]
+        if nullable:
+            segments = [False, True] if descending else [True, False]
+        if after is not None:
+            segments = segments[segments.index(after[0] is None):]
+
+        cursor = self.reader()
+        rows = []
+        for null_segment in segments:
+            if null_segment:
+                where = [(f"{column} IS NULL", [])]
+                order = f"{id_column} {direction}"
+                if after is not None and after[0] is None:
+                    where.append((f"{id_column} {compare} ?", [after[1]]))
+            else:
+                where = [(f"{column} IS NOT NULL", [])] if nullable else []
+                order = sorted_order
+                if after is not None and after[0] is not None:
+                    where.append((f"({column}, {id_column}) {compare} (?{collate}, ?)", list(after)))
+            cursor.execute(*build_query(filters, where, order, limit - len(rows)))
+            rows.extend(cursor.fetchall())
+            if len(rows) == limit:
+                break
+            after = None
+
+        if len(rows) < limit:
+            return rows, None
+        return rows, (rows[-1][row_index], rows[-1][0])
+
+    def jobs_query(self, filters=None, where=(), order=None, limit=None):
+        # Default queries only touch the hot tables; `include_archived` reads both.
+        # `where` adds (clause, params) pairs to the filters; `order` is an ORDER BY list.
+        include_archived = bool(filters and filters.get('include_archived'))
+        jobs_table = 'all_jobs' if include_archived else 'jobs'
+
+        query = f"""
+        SELECT j.id, j.title, j.company, j.salary, j.job_type, decompress_text(j.description) AS description,
+               j.posted_date, u.name as provider_name, u.email as provider_email,
+               j.application_count, j.salary_min, j.salary_max, j.category, j.location
+        FROM {jobs_table} j
+        JOIN users u ON j.provider_id = u.id
+        """
+
+        where_clauses = []
+        params = []
+
+        if filters:
+            if filters.get('title'):
+                where_clauses.append("j.title LIKE ?")
+                params.append(f"%{filters['title']}%")
+
+            if filters.get('company'):
+                where_clauses.append("j.company LIKE ?")
+                params.append(f"%{filters['company']}%")
+
+            if filters.get('job_type') and filters['job_type'] != "All":
+                where_clauses.append("j.job_type = ?")
+                params.append(filters['job_type'])
+
+            if filters.get('category') and filters['category'] != "All":
+                where_clauses.append("j.category = ?")
+                params.append(filters['category'])
+
+            # Locations match in normalized form, through the location_id index
+            if filters.get('location') and filters['location'] != "All":
+                where_clauses.append("j.location_id = (SELECT id FROM locations WHERE name = ?)")
+                params.append(location_name(filters['location']))
+
+            # `remote`: True for remote jobs only, False for on-site jobs only
+            if filters.get('remote') is not None:
+                where_clauses.append("j.location_id IN (SELECT id FROM locations WHERE remote = ?)")
+                params.append(int(bool(filters['remote'])))
+
+            # `near` (a place name or (latitude, longitude)) with `within_km`: jobs
+            # at locations in that radius, and remote jobs with `include_remote`.
+            # The ids are bound one by one so the planner can weigh the
+            # location_id index against a sort index.
+            if filters.get('near') and filters.get('within_km'):
+                nearby_ids = self.locations_within(filters['near'], filters['within_km'])
+                nearby = f"j.location_id IN ({', '.join('?' * len(nearby_ids))})"
+                params.extend(nearby_ids)
+                if filters.get('include_remote'):
+                    nearby = f"({nearby} OR j.location_id IN (SELECT id FROM locations WHERE remote = 1))"
+                where_clauses.append(nearby)
+
+            # Salary filters select jobs whose salary range overlaps the requested band.
+            # The R*Tree narrows candidates; the exact bounds are re-checked on `jobs`.
+            rtree_clauses = []
+            rtree_params = []
+
+            if filters.get('min_salary'):
+                rtree_clauses.append("salary_max >= ?")
+                rtree_params.append(filters['min_salary'])
+                where_clauses.append("j.salary_max >= ?")
+                params.append(filters['min_salary'])
+
+            if filters.get('max_salary'):
+                rtree_clauses.append("salary_min <= ?")
+                rtree_params.append(filters['max_salary'])
+                where_clauses.append("j.salary_min <= ?")
+                params.append(filters['max_salary'])
+
+            if filters.get('posted_after'):
+                posted_after = to_epoch(filters['posted_after'])
+                if rtree_clauses:
+                    rtree_clauses.append("posted_max >= ?")
+                    rtree_params.append(posted_after)
+                where_clauses.append("j.posted_date >= ?")
+                params.append(posted_after)
+
+            # The R*Tree only indexes hot jobs
+            if rtree_clauses and not include_archived:
+                where_clauses.append(
+                    "j.id IN (SELECT id FROM jobs_salary_rtree WHERE " + " AND ".join(rtree_clauses) + ")")
+                params.extend(rtree_params)
+
+            if filters.get('provider_id'):
+                where_clauses.append("j.provider_id = ?")
+                params.append(filters['provider_id'])
+
+            # Restrict to these job ids, e.g. the ones named by the change log
+            if filters.get('ids') is not None:
+                where_clauses.append("j.id IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(sorted(filters['ids'])))
+
+        # Near-duplicate postings only clutter searches
+        if not (filters and filters.get('include_duplicates')):
+            where_clauses.append("j.duplicate_of IS NULL")
+
+        for clause, clause_params in where:
+            where_clauses.append(clause)
+            params.extend(clause_params)
+
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+
+        if order:
+            query += " ORDER BY " + order
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return query, params
+
+    def search_jobs(self, filters=None, sort='posted_date', descending=True, limit=PAGE_SIZE):
+        # Returns (jobs, after, facets): the first page of matching jobs and its
+        # cursor as from get_jobs_page, and facet counts. For each facet (job_type,
+        # category, location) they are the counts the user would get by changing
+        # only that facet; salary buckets count the matching jobs. All of them
+        # come from one GROUP BY over the jobs matching the other filters, keyed by
+        # the facet values and salary bucket; the facet filters are then applied
+        # to its few rows in Python.
+        jobs, after = self.get_jobs_page(filters, sort, descending, limit=limit)
+        filters = filters or {}
+        facet_filters = {field: filters[field] for field in JOB_FACETS
+                         if filters.get(field) and filters[field] != "All"}
+        if 'location' in facet_filters:
+            facet_filters['location'] = location_name(facet_filters['location'])
+
+        # SALARY_BUCKETS, by salary range midpoint; NULL without a salary
+        midpoint = "(salary_min + COALESCE(salary_max, salary_min)) / 2"
+        cases = " ".join(f"WHEN {midpoint} < {upper} THEN ?" for upper, _ in SALARY_BUCKETS if upper is not None)
+        labels = [label for _, label in SALARY_BUCKETS]
+        query, params = self.jobs_query({key: value for key, value in filters.items() if key not in JOB_FACETS})
+        cursor = self.reader()
+        cursor.execute(f"""
+        SELECT {', '.join(JOB_FACETS)}, CASE WHEN salary_min IS NULL THEN NULL {cases} ELSE ? END AS bucket,
+               COUNT(*)
+        FROM ({query}) GROUP BY {', '.join(JOB_FACETS)}, bucket
+        """, labels + params)
+
+        facets = {field: Counter() for field in JOB_FACETS}
+        facets['salary'] = Counter()
+        for row in cursor.fetchall():
+            values = dict(zip(JOB_FACETS, row))
+            bucket, count = row[-2:]
+            misses = {field for field, value in facet_filters.items() if values[field] != value}
+            for field in JOB_FACETS:
+                if values[field] is not None and misses <= {field}:
+                    facets[field][values[field]] += count
+            if bucket is not None and not misses:
+                facets['salary'][bucket] += count
+        return jobs, after, facets
+
+    def get_job_by_id(self, job_id, include_archived=False):
+        return self.get_jobs_by_ids([job_id], include_archived).get(job_id)
+
+    def get_jobs_by_ids(self, job_ids, include_archived=False):
+        # Full records of the jobs among `job_ids`, by id, read in one query
+        cursor = self.reader()
+        jobs_table = 'all_jobs' if include_archived else 'jobs'
+        cursor.execute(f"""
+        SELECT j.id, j.title, j.company, j.salary, j.job_type, decompress_text(j.description) AS description,
+               j.posted_date, u.name as provider_name, u.email as provider_email,
+               j.salary_min, j.salary_max, j.category, j.location
+        FROM {jobs_table} j
+        JOIN users u ON j.provider_id = u.id
+        WHERE j.id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(sorted(job_ids)),))
+        return {job[0]: job for job in cursor.fetchall()}
+
+    def delete_job(self, job_id, provider_id):
+        return self.delete_jobs([job_id], provider_id) == 1
+
+    def delete_jobs(self, job_ids, provider_id):
+        # Delete the provider's jobs among `job_ids` in one statement; their
+        # applications go with them via ON DELETE CASCADE. Jobs owned by someone
+        # else are left alone. Returns the number of jobs deleted.
+        self.cursor.execute(
+            "DELETE FROM jobs WHERE provider_id = ? AND id IN (SELECT value FROM json_each(?))",
+            (provider_id, json.dumps([int(job_id) for job_id in job_ids]))
+        )
+        deleted = self.cursor.rowcount
+        self.conn.commit()
+        return deleted
+
+    def apply_for_job(self, job_id, seeker_id, cover_letter, resume_hash=None, resume_name=None):
+        # The unique (job_id, seeker_id) index makes the duplicate check part of the
+        # INSERT itself: RETURNING yields no row when the seeker already applied
+        application_date = int(time.time())
+        try:
+            self.cursor.execute(
+                "INSERT INTO applications (job_id, seeker_id, application_date, cover_letter, resume_hash, resume_name) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (job_id, seeker_id) DO NOTHING RETURNING id",
+                (job_id, seeker_id, application_date, self.compress_text(cover_letter), resume_hash, resume_name)
+            )
+            inserted = self.cursor.fetchone()
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            # The job no longer exists
+            self.conn.rollback()
+            return False, "This job is no longer available"
+
+        if not inserted:
+            return False, "You have already applied for this job"
+        return True, "Application submitted successfully"
+
+    def apply_for_jobs(self, job_ids, seeker_id, cover_letter, resume_hash=None, resume_name=None):
+        # Submit one cover letter to many jobs in a single transaction. Returns
+        # {job_id: (success, message)} for every requested job.
+        job_ids = [int(job_id) for job_id in job_ids]
+        ids_json = json.dumps(job_ids)
+        application_date = int(time.time())
+
+        try:
+            self.cursor.execute("SELECT id FROM jobs WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+            existing = {row[0] for row in self.cursor.fetchall()}
+
+            # "WHERE" is required before ON CONFLICT in an INSERT ... SELECT
+            self.cursor.execute("""
+            INSERT INTO applications (job_id, seeker_id, application_date, cover_letter, resume_hash, resume_name)
+            SELECT id, ?, ?, ?, ?, ? FROM jobs WHERE id IN (SELECT value FROM json_each(?))
+            ON CONFLICT (job_id, seeker_id) DO NOTHING
+            RETURNING job_id
+            """, (seeker_id, application_date, self.compress_text(cover_letter), resume_hash, resume_name,
+                  ids_json))
+            applied = {row[0] for row in self.cursor.fetchall()}
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+
+        results = {}
+        for job_id in job_ids:
+            if job_id in applied:
+                results[job_id] = (True, "Application submitted successfully")
+            elif job_id in existing:
+                results[job_id] = (False, "You have already applied for this job")
+            else:
+                results[job_id] = (False, "This job is no longer available")
+        return results
+
+    def score_applications(self, job_id, weights=None):
+        # Rank all applications to a job in one batch: the job's term vector is
+        # built once and every cover letter is scored against it. Scores are
+        # cached with a fingerprint of their inputs (job text, cover letter,
+        # resume, weights), so only new or changed applications are scored
+        # again. `weights` overrides APPLICATION_SCORE_WEIGHTS. Returns
+        # {application_id: score}.
+        weights = dict(APPLICATION_SCORE_WEIGHTS, **(weights or {}))
+        unknown = set(weights) - set(APPLICATION_SCORE_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown score signals: {', '.join(sorted(unknown))}")
+        self.cursor.execute("SELECT title, description FROM jobs WHERE id = ?", (job_id,))
+        job = self.cursor.fetchone()
+        if job is None:
+            return {}
+        title, description = job
+        job_key = score_fingerprint(title, description or "", json.dumps(weights, sort_keys=True))
+
+        self.cursor.execute("""
+        SELECT a.id, a.cover_letter, a.resume_hash, s.score, s.inputs
+        FROM applications a
+        LEFT JOIN application_scores s ON s.application_id = a.id
+        WHERE a.job_id = ?
+        """, (job_id,))
+        scores = {}
+        stale = []
+        for application_id, cover_letter, resume_hash, score, inputs in self.cursor.fetchall():
+            fingerprint = score_fingerprint(job_key, cover_letter or "", resume_hash or "")
+            if inputs == fingerprint:
+                scores[application_id] = score
+            else:
+                stale.append((application_id, cover_letter, resume_hash, fingerprint))
+        if not stale:
+            return scores
+
+        # The title stands in for the job's requirements and is weighted up
+        job_text = " ".join([title] * SCORE_TITLE_WEIGHT) + " " + (self.decompress_text(description) or "")
+        job_vector = term_vector(job_text)
+        job_norm = vector_norm(job_vector)
+        total_weight = sum(weights.values()) or 1
+        updates = []
+        for application_id, cover_letter, resume_hash, fingerprint in stale:
+            letter = self.decompress_text(cover_letter) or ""
+            vector = term_vector(letter)
+            norm = vector_norm(vector)
+            relevance = 0.0
+            if norm and job_norm:
+                relevance = sum(weight * job_vector.get(term, 0) for term, weight in vector.items()) / (norm * job_norm)
+            signals = {
+                'relevance': relevance,
+                'resume': 1.0 if resume_hash else 0.0,
+                'length': min(1.0, len(letter.split()) / SCORE_FULL_LENGTH),
+            }
+            score = round(100 * sum(weights[name] * signals[name] for name in weights) / total_weight, 2)
+            scores[application_id] = score
+            updates.append((application_id, score, fingerprint))
+
+        try:
+            self.cursor.executemany("""
+            INSERT INTO application_scores (application_id, score, inputs) VALUES (?, ?, ?)
+            ON CONFLICT (application_id) DO UPDATE SET score = excluded.score, inputs = excluded.inputs
+            """, updates)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return scores
+
+    def get_applications(self, filters=None, sort='date', descending=True):
+        cursor = self.reader()
+        cursor.execute(*self.applications_query(
+            filters, order=sort_order(APPLICATION_SORTS, sort, descending, 'a.id')))
+        return cursor.fetchall()
+
+    def iter_applications(self, filters=None, sort='date', descending=True):
+        # Like get_applications, but returns a cursor that streams the rows
+        return self.reader().connection.cursor().execute(*self.applications_query(
+            filters, order=sort_order(APPLICATION_SORTS, sort, descending, 'a.id')))
+
+    def get_applications_page(self, filters=None, sort='date', descending=True, after=None, limit=PAGE_SIZE):
+        # One page of get_applications rows; see fetch_page
+        return self.fetch_page(self.applications_query, APPLICATION_SORTS, 'a.id',
+                               filters, sort, descending, after, limit)
+
+    def applications_query(self, filters=None, where=(), order=None, limit=None):
+        # Default queries only touch the hot tables; `include_archived` reads both.
+        # `where` adds (clause, params) pairs to the filters; `order` is an ORDER BY list.
+        include_archived = bool(filters and filters.get('include_archived'))
+        jobs_table = 'all_jobs' if include_archived else 'jobs'
+        applications_table = 'all_applications' if include_archived else 'applications'
+
+        query = f"""
+        SELECT a.id, a.job_id, j.title, j.company, u.name as applicant_name, 
+               u.email as applicant_email, a.application_date, a.status,
+               decompress_text(a.cover_letter) AS cover_letter,
+               a.resume_hash, a.resume_name, s.score
+        FROM {applications_table} a
+        JOIN {jobs_table} j ON a.job_id = j.id
+        JOIN users u ON a.seeker_id = u.id
+        LEFT JOIN application_scores s ON s.application_id = a.id
+        """
+
+        where_clauses = []
+        params = []
+
+        if filters:
+            if filters.get('job_id'):
+                where_clauses.append("a.job_id = ?")
+                params.append(filters['job_id'])
+
+            if filters.get('seeker_id'):
+                where_clauses.append("a.seeker_id = ?")
+                params.append(filters['seeker_id'])
+
+            if filters.get('provider_id'):
+                where_clauses.append("j.provider_id = ?")
+                params.append(filters['provider_id'])
+
+            if filters.get('status'):
+                where_clauses.append("a.status = ?")
+                params.append(filters['status'])
+
+            if filters.get('ids') is not None:
+                where_clauses.append("a.id IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(sorted(filters['ids'])))
+
+        for clause, clause_params in where:
+            where_clauses.append(clause)
+            params.extend(clause_params)
+
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+
+        if order:
+            query += " ORDER BY " + order
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return query, params
+
+    def update_application_status(self, application_id, new_status):
+        self.cursor.execute(
+            "UPDATE applications SET status = ? WHERE id = ?",
+            (new_status, application_id)
+        )
+        self.conn.commit()
+        return True
+
+    def update_application_statuses(self, application_ids, new_status):
+        # Set the status of many applications in one statement; returns the number updated
+        self.cursor.execute(
+            "UPDATE applications SET status = ? WHERE id IN (SELECT value FROM json_each(?))",
+            (new_status, json.dumps([int(application_id) for application_id in application_ids]))
+        )
+        updated = self.cursor.rowcount
+        self.conn.commit()
+        return updated
+
+    def get_user_applications(self, user_id):
+        cursor = self.reader()
+        cursor.execute("""
+        SELECT a.id, j.title, j.company, a.application_date, a.status
+        FROM applications a
+        JOIN jobs j ON a.job_id = j.id
+        WHERE a.seeker_id = ?
+        ORDER BY a.application_date DESC
+        """, (user_id,))
+        return cursor.fetchall()
+
+    def get_dashboard_stats(self, user_id, user_type):
+        cursor = self.reader()
+        stats = {}
+
+        if user_type == 'provider':
+            # Total jobs posted
+            cursor.execute("SELECT COUNT(*) FROM jobs WHERE provider_id = ?", (user_id,))
+            stats['total_jobs'] = cursor.fetchone()[0]
+
+            # Total applications received
+            cursor.execute("""
+            SELECT COUNT(*) FROM applications a
+            JOIN jobs j ON a.job_id = j.id
+            WHERE j.provider_id = ?
+            """, (user_id,))
+            stats['total_applications'] = cursor.fetchone()[0]
+
+            # Applications by status
+            cursor.execute("""
+            SELECT a.status, COUNT(*) FROM applications a
+            JOIN jobs j ON a.job_id = j.id
+            WHERE j.provider_id = ?
+            GROUP BY a.status
+            """, (user_id,))
+            status_counts = cursor.fetchall()
+            stats['status_counts'] = {status: count for status, count in status_counts}
+
+        elif user_type == 'seeker':
+            # Total applications sent
+            cursor.execute("SELECT COUNT(*) FROM applications WHERE seeker_id = ?", (user_id,))
+            stats['total_applications'] = cursor.fetchone()[0]
+
+            # Applications by status
+            cursor.execute("""
+            SELECT status, COUNT(*) FROM applications
+            WHERE seeker_id = ?
+            GROUP BY status
+            """, (user_id,))
+            status_counts = cursor.fetchall()
+            stats['status_counts'] = {status: count for status, count in status_counts}
+
+            # Saved search alerts not yet seen
+            cursor.execute("SELECT COUNT(*) FROM notifications WHERE seeker_id = ? AND read = 0", (user_id,))
+            stats['unread_notifications'] = cursor.fetchone()[0]
+
+        return stats
+
+    def close(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.conn.close()
@@ -0,0 +1,261 @@
+import math
+import re
+
+# Offline gazetteer for normalizing job locations: city, country and coordinates
+# (decimal degrees) of the cities postings usually name, so no geocoding
+# service is needed. Where a city name occurs in several countries the larger
+# city comes first and is used when a location names no country.
+GAZETTEER = [
+    # India
+    ("Bangalore", "India", 12.9716, 77.5946),
+    ("Mumbai", "India", 19.0760, 72.8777),
+    ("Delhi", "India", 28.7041, 77.1025),
+    ("New Delhi", "India", 28.6139, 77.2090),
+    ("Hyderabad", "India", 17.3850, 78.4867),
+    ("Chennai", "India", 13.0827, 80.2707),
+    ("Kolkata", "India", 22.5726, 88.3639),
+    ("Pune", "India", 18.5204, 73.8567),
+    ("Ahmedabad", "India", 23.0225, 72.5714),
+    ("Gurgaon", "India", 28.4595, 77.0266),
+    ("Noida", "India", 28.5355, 77.3910),
+    ("Jaipur", "India", 26.9124, 75.7873),
+    ("Kochi", "India", 9.9312, 76.2673),
+    ("Thiruvananthapuram", "India", 8.5241, 76.9366),
+    ("Coimbatore", "India", 11.0168, 76.9558),
+    ("Mysore", "India", 12.2958, 76.6394),
+    ("Mangalore", "India", 12.9141, 74.8560),
+    ("Chandigarh", "India", 30.7333, 76.7794),
+    ("Indore", "India", 22.7196, 75.8577),
+    ("Bhopal", "India", 23.2599, 77.4126),
+    ("Lucknow", "India", 26.8467, 80.9462),
+    ("Nagpur", "India", 21.1458, 79.0882),
+    ("Surat", "India", 21.1702, 72.8311),
+    ("Vadodara", "India", 22.3072, 73.1812),
+    ("Visakhapatnam", "India", 17.6868, 83.2185),
+    ("Vijayawada", "India", 16.5062, 80.6480),
+    ("Bhubaneswar", "India", 20.2961, 85.8245),
+    ("Guwahati", "India", 26.1445, 91.7362),
+    ("Patna", "India", 25.5941, 85.1376),
+    ("Goa", "India", 15.2993, 74.1240),
+    ("Navi Mumbai", "India", 19.0330, 73.0297),
+    ("Thane", "India", 19.2183, 72.9781),
+    ("Madurai", "India", 9.9252, 78.1198),
+    ("Trichy", "India", 10.7905, 78.7047),
+    ("Dehradun", "India", 30.3165, 78.0322),
+    ("Kanpur", "India", 26.4499, 80.3319),
+    ("Nashik", "India", 19.9975, 73.7898),
+    ("Ludhiana", "India", 30.9010, 75.8573),
+    ("Ranchi", "India", 23.3441, 85.3096),
+    ("Raipur", "India", 21.2514, 81.6296),
+    # Rest of Asia and Oceania
+    ("Singapore", "Singapore", 1.3521, 103.8198),
+    ("Dubai", "United Arab Emirates", 25.2048, 55.2708),
+    ("Abu Dhabi", "United Arab Emirates", 24.4539, 54.3773),
+    ("Doha", "Qatar", 25.2854, 51.5310),
+    ("Riyadh", "Saudi Arabia", 24.7136, 46.6753),
+    ("Karachi", "Pakistan", 24.8607, 67.0011),
+    ("Lahore", "Pakistan", 31.5204, 74.3587),
+    ("Dhaka", "Bangladesh", 23.8103, 90.4125),
+    ("Colombo", "Sri Lanka", 6.9271, 79.8612),
+    ("Kathmandu", "Nepal", 27.7172, 85.3240),
+    ("Kuala Lumpur", "Malaysia", 3.1390, 101.6869),
+    ("Bangkok", "Thailand", 13.7563, 100.5018),
+    ("Jakarta", "Indonesia", -6.2088, 106.8456),
+    ("Manila", "Philippines", 14.5995, 120.9842),
+    ("Ho Chi Minh City", "Vietnam", 10.8231, 106.6297),
+    ("Hanoi", "Vietnam", 21.0278, 105.8342),
+    ("Hong Kong", "Hong Kong", 22.3193, 114.1694),
+    ("Shanghai", "China", 31.2304, 121.4737),
+    ("Beijing", "China", 39.9042, 116.4074),
+    ("Shenzhen", "China", 22.5431, 114.0579),
+    ("Taipei", "Taiwan", 25.0330, 121.5654),
+    ("Seoul", "South Korea", 37.5665, 126.9780),
+    ("Tokyo", "Japan", 35.6762, 139.6503),
+    ("Osaka", "Japan", 34.6937, 135.5023),
+    ("Sydney", "Australia", -33.8688, 151.2093),
+    ("Melbourne", "Australia", -37.8136, 144.9631),
+    ("Brisbane", "Australia", -27.4698, 153.0251),
+    ("Perth", "Australia", -31.9505, 115.8605),
+    ("Auckland", "New Zealand", -36.8485, 174.7633),
+    # Europe
+    ("London", "United Kingdom", 51.5074, -0.1278),
+    ("Manchester", "United Kingdom", 53.4808, -2.2426),
+    ("Edinburgh", "United Kingdom", 55.9533, -3.1883),
+    ("Dublin", "Ireland", 53.3498, -6.2603),
+    ("Paris", "France", 48.8566, 2.3522),
+    ("Berlin", "Germany", 52.5200, 13.4050),
+    ("Munich", "Germany", 48.1351, 11.5820),
+    ("Hamburg", "Germany", 53.5511, 9.9937),
+    ("Frankfurt", "Germany", 50.1109, 8.6821),
+    ("Amsterdam", "Netherlands", 52.3676, 4.9041),
+    ("Brussels", "Belgium", 50.8503, 4.3517),
+    ("Zurich", "Switzerland", 47.3769, 8.5417),
+    ("Geneva", "Switzerland", 46.2044, 6.1432),
+    ("Vienna", "Austria", 48.2082, 16.3738),
+    ("Madrid", "Spain", 40.4168, -3.7038),
+    ("Barcelona", "Spain", 41.3851, 2.1734),
+    ("Lisbon", "Portugal", 38.7223, -9.1393),
+    ("Milan", "Italy", 45.4642, 9.1900),
+    ("Rome", "Italy", 41.9028, 12.4964),
+    ("Stockholm", "Sweden", 59.3293, 18.0686),
+    ("Copenhagen", "Denmark", 55.6761, 12.5683),
+    ("Oslo", "Norway", 59.9139, 10.7522),
+    ("Helsinki", "Finland", 60.1699, 24.9384),
+    ("Warsaw", "Poland", 52.2297, 21.0122),
+    ("Krakow", "Poland", 50.0647, 19.9450),
+    ("Prague", "Czech Republic", 50.0755, 14.4378),
+    ("Budapest", "Hungary", 47.4979, 19.0402),
+    ("Bucharest", "Romania", 44.4268, 26.1025),
+    ("Athens", "Greece", 37.9838, 23.7275),
+    ("Istanbul", "Turkey", 41.0082, 28.9784),
+    ("Tel Aviv", "Israel", 32.0853, 34.7818),
+    # Africa
+    ("Cairo", "Egypt", 30.0444, 31.2357),
+    ("Lagos", "Nigeria", 6.5244, 3.3792),
+    ("Nairobi", "Kenya", -1.2921, 36.8219),
+    ("Johannesburg", "South Africa", -26.2041, 28.0473),
+    ("Cape Town", "South Africa", -33.9249, 18.4241),
+    # Americas
+    ("New York", "United States", 40.7128, -74.0060),
+    ("San Francisco", "United States", 37.7749, -122.4194),
+    ("San Jose", "United States", 37.3382, -121.8863),
+    ("Seattle", "United States", 47.6062, -122.3321),
+    ("Los Angeles", "United States", 34.0522, -118.2437),
+    ("Chicago", "United States", 41.8781, -87.6298),
+    ("Boston", "United States", 42.3601, -71.0589),
+    ("Austin", "United States", 30.2672, -97.7431),
+    ("Dallas", "United States", 32.7767, -96.7970),
+    ("Houston", "United States", 29.7604, -95.3698),
+    ("Denver", "United States", 39.7392, -104.9903),
+    ("Atlanta", "United States", 33.7490, -84.3880),
+    ("Miami", "United States", 25.7617, -80.1918),
+    ("Washington", "United States", 38.9072, -77.0369),
+    ("Philadelphia", "United States", 39.9526, -75.1652),
+    ("Toronto", "Canada", 43.6532, -79.3832),
+    ("Vancouver", "Canada", 49.2827, -123.1207),
+    ("Montreal", "Canada", 45.5017, -73.5673),
+    ("Mexico City", "Mexico", 19.4326, -99.1332),
+    ("Sao Paulo", "Brazil", -23.5505, -46.6333),
+    ("Buenos Aires", "Argentina", -34.6037, -58.3816),
+    ("Bogota", "Colombia", 4.7110, -74.0721),
+    ("Santiago", "Chile", -33.4489, -70.6693),
+    ("San Jose", "Costa Rica", 9.9281, -84.0907),
+]
+
+# Other spellings of gazetteer cities and countries, lowercased
+CITY_ALIASES = {
+    'bengaluru': "Bangalore", 'bombay': "Mumbai", 'madras': "Chennai", 'calcutta': "Kolkata",
+    'gurugram': "Gurgaon", 'cochin': "Kochi", 'trivandrum': "Thiruvananthapuram", 'mysuru': "Mysore",
+    'mangaluru': "Mangalore", 'vizag': "Visakhapatnam", 'tiruchirappalli': "Trichy", 'panaji': "Goa",
+    'ncr': "Delhi", 'delhi ncr': "Delhi", 'nyc': "New York", 'new york city': "New York", 'sf': "San Francisco",
+    'bay area': "San Francisco", 'la': "Los Angeles", 'washington dc': "Washington", 'washington d.c.': "Washington",
+    'saigon': "Ho Chi Minh City", 'münchen': "Munich", 'muenchen': "Munich", 'zürich': "Zurich",
+    'são paulo': "Sao Paulo", 'bogotá': "Bogota", 'kraków': "Krakow",
+}
+COUNTRY_ALIASES = {
+    'in': "India", 'ind': "India", 'us': "United States", 'usa': "United States", 'u.s.': "United States",
+    'u.s.a.': "United States", 'united states of america': "United States", 'america': "United States",
+    'uk': "United Kingdom", 'u.k.': "United Kingdom", 'england': "United Kingdom", 'scotland': "United Kingdom",
+    'great britain': "United Kingdom", 'uae': "United Arab Emirates", 'ksa': "Saudi Arabia",
+    'korea': "South Korea", 'the netherlands': "Netherlands", 'holland': "Netherlands",
+    'czechia': "Czech Republic", 'türkiye': "Turkey",
+}
+
+# Locations meaning the job can be done from anywhere (possibly within a country)
+REMOTE_PATTERN = re.compile(r'\b(?:remote|anywhere|work from home|wfh|worldwide)\b', re.IGNORECASE)
+
+# Mean Earth radius, and km per degree of latitude
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GAZETTEER_CITIES = {}
+for _entry in GAZETTEER:
+    GAZETTEER_CITIES.setdefault(_entry[0].lower(), []).append(_entry)
+GAZETTEER_COUNTRIES = {country.lower(): country for _, country, _, _ in GAZETTEER}
+
+
+def split_location(text):
+    return [part.strip(" -") for part in re.split(r'[,()/|]', text) if part.strip(" -")]
+
+
+def canonical_country(text):
+    key = text.lower()
+    return COUNTRY_ALIASES.get(key) or GAZETTEER_COUNTRIES.get(key) or text
+
+
+def parse_location(text):
+    # (name, city, country, latitude, longitude, remote) for free-text location
+    # like "Bengaluru, India", "Mumbai" or "Remote (US)", or None when empty.
+    # `name` is the normalized form, e.g. "Bangalore, India" or "Remote, United
+    # States"; places not in the gazetteer keep their own spelling and have no
+    # coordinates.
+    text = re.sub(r'\s+', ' ', (text or "")).strip(" ,")
+    if not text:
+        return None
+
+    if REMOTE_PATTERN.search(text):
+        # "Remote", "Remote (US)", "India - Remote", "Bangalore / Remote"
+        others = split_location(REMOTE_PATTERN.sub(',', text))
+        country = None
+        if others:
+            country = canonical_country(others[-1])
+            cities = GAZETTEER_CITIES.get(CITY_ALIASES.get(others[-1].lower(), others[-1]).lower())
+            if country.lower() not in GAZETTEER_COUNTRIES and cities:
+                country = cities[0][1]
+        return (f"Remote, {country}" if country else "Remote"), None, country, None, None, True
+
+    parts = split_location(text)
+    city = CITY_ALIASES.get(parts[0].lower(), parts[0])
+    country = canonical_country(parts[-1]) if len(parts) > 1 else None
+    candidates = GAZETTEER_CITIES.get(city.lower(), [])
+    if country and country.lower() not in GAZETTEER_COUNTRIES and candidates:
+        # Not a country but a state or province ("Austin, TX", "Bangalore,
+        # Karnataka"): the city's first entry, as for a city on its own
+        country = None
+    for entry_city, entry_country, latitude, longitude in candidates:
+        if country is None or entry_country == country:
+            return f"{entry_city}, {entry_country}", entry_city, entry_country, latitude, longitude, False
+    if country is None and city.lower() in GAZETTEER_COUNTRIES:
+        # A country on its own
+        country = GAZETTEER_COUNTRIES[city.lower()]
+        return country, None, country, None, None, False
+    name = f"{city}, {country}" if country else city
+    return name, city, country, None, None, False
+
+
+def location_name(text):
+    # Normalized form of a location, or None
+    location = parse_location(text)
+    return location[0] if location else None
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    # Great-circle (haversine) distance
+    latitude1, longitude1, latitude2, longitude2 = map(math.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = (math.sin((latitude2 - latitude1) / 2) ** 2
+         + math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    # (min_latitude, max_latitude, min_longitude, max_longitude) boxes that
+    # together cover every point within radius_km; two when the circle crosses
+    # the antimeridian
+    latitude_delta = radius_km / KM_PER_DEGREE
+    min_latitude, max_latitude = latitude - latitude_delta, latitude + latitude_delta
+    if min_latitude <= -90 or max_latitude >= 90:
+        # Reaches a pole: every longitude
+        return [(max(min_latitude, -90), min(max_latitude, 90), -180, 180)]
+    # Widest at the latitude furthest from the equator
+    widest = max(abs(min_latitude), abs(max_latitude))
+    longitude_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+    if longitude_delta >= 180:
+        return [(min_latitude, max_latitude, -180, 180)]
+    min_longitude, max_longitude = longitude - longitude_delta, longitude + longitude_delta
+    if min_longitude < -180:
+        return [(min_latitude, max_latitude, min_longitude + 360, 180),
+                (min_latitude, max_latitude, -180, max_longitude)]
+    if max_longitude > 180:
+        return [(min_latitude, max_latitude, min_longitude, 180),
+                (min_latitude, max_latitude, -180, max_longitude - 360)]
+    return [(min_latitude, max_latitude, min_longitude, max_longitude)]
@@ -0,0 +1,142 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Profiling of UI handlers, saved as a Chrome trace (chrome://tracing, Perfetto,
+# speedscope). Each handler call is a span. Calls into the database, into Qt
+# and into modal dialogs made while spans are open are timed per category, so
+# every span's args split its wall time into SQL, Qt population, time spent
+# waiting on a modal dialog, and the Python around them. Database calls also
+# appear as spans of their own. Optionally, cProfile runs during handlers and
+# tracemalloc reports what they allocate.
+
+PROFILE_CATEGORIES = ('sql', 'qt', 'modal')
+
+# Allocation sites listed in the trace when tracemalloc is on
+TRACEMALLOC_TOP = 25
+
+
+class Profiler:
+    def __init__(self, path, use_cprofile=False, use_tracemalloc=False):
+        self.path = path
+        self.pid = os.getpid()
+        # Only the UI thread is traced; calls on worker threads pass through
+        self.thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': "Job Marketplace"}}]
+        # Category totals of the open spans, innermost last
+        self.stack = []
+        # Set while a measured call runs, so calls it makes are not counted twice
+        self.measuring = False
+        # Spans below this index were open before the running measured call
+        # (e.g. a timer handler running inside a modal dialog) and already count it
+        self.floor = 0
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.use_tracemalloc = use_tracemalloc
+        if use_tracemalloc:
+            tracemalloc.start()
+
+    def now(self):
+        # Trace timestamps are microseconds
+        return (time.perf_counter() - self.started) * 1e6
+
+    def add_event(self, name, category, start, duration, args=None):
+        self.events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': duration,
+                            'pid': self.pid, 'tid': threading.get_ident(), 'args': args or {}})
+
+    @contextmanager
+    def span(self, name, category='ui'):
+        outermost = not self.stack
+        if outermost:
+            if self.cprofile:
+                self.cprofile.enable()
+            if self.use_tracemalloc:
+                tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0] if self.use_tracemalloc else 0
+        saved = self.measuring, self.floor
+        self.measuring, self.floor = False, len(self.stack)
+        totals = dict.fromkeys(PROFILE_CATEGORIES, 0.0)
+        self.stack.append(totals)
+        start = self.now()
+        try:
+            yield
+        finally:
+            duration = self.now() - start
+            self.stack.pop()
+            self.measuring, self.floor = saved
+            args = {f"{key}_ms": round(totals[key] / 1000, 3) for key in PROFILE_CATEGORIES}
+            args['python_ms'] = round((duration - sum(totals.values())) / 1000, 3)
+            if self.use_tracemalloc:
+                current, peak = tracemalloc.get_traced_memory()
+                args['allocated_kb'] = round((current - memory) / 1024, 1)
+                if outermost:
+                    args['peak_kb'] = round(peak / 1024, 1)
+            if outermost and self.cprofile:
+                self.cprofile.disable()
+            self.add_event(name, category, start, duration, args)
+
+    def measured(self, function, category, name=None):
+        # `function`, charging its time to `category` in the open spans; with a
+        # name each call is also recorded as a span. Qt calls go through here
+        # thousands of times per refresh, so this stays a plain function.
+        now = time.perf_counter
+        get_ident = threading.get_ident
+
+        @functools.wraps(function)
+        def measured_call(*args, **kwargs):
+            if self.measuring or not self.stack or get_ident() != self.thread:
+                return function(*args, **kwargs)
+            self.measuring = True
+            start = now()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = (now() - start) * 1e6
+                self.measuring = False
+                for totals in self.stack[self.floor:]:
+                    totals[category] += duration
+                if name:
+                    self.add_event(name, category, (start - self.started) * 1e6, duration)
+        return measured_call
+
+    def handler(self, function, name):
+        # `function`, with every call recorded as a span. Qt calls slots with as
+        # many of the signal's arguments as they accept, so the wrapper passes on
+        # no more than `function` takes.
+        parameters = inspect.signature(function).parameters.values()
+        accepts = None if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters) \
+            else len(parameters)
+
+        @functools.wraps(function)
+        def handler_call(*args, **kwargs):
+            with self.span(name):
+                return function(*args[:accepts], **kwargs)
+        return handler_call
+
+    def instrument(self, cls, names, category, spans=False):
+        # Time calls to these methods of `cls` (see measured)
+        for name in names:
+            setattr(cls, name, self.measured(getattr(cls, name), category,
+                                             f"{cls.__name__}.{name}" if spans else None))
+
+    def instrument_handlers(self, cls, names):
+        # Record every call to these methods of `cls` as a span
+        for name in names:
+            setattr(cls, name, self.handler(getattr(cls, name), f"{cls.__name__}.{name}"))
+
+    def save(self):
+        other = {'categories': list(PROFILE_CATEGORIES)}
+        if self.cprofile:
+            other['cprofile'] = self.path + '.pstats'
+            self.cprofile.dump_stats(other['cprofile'])
+        if self.use_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            other['tracemalloc_top'] = [str(stat) for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]]
+        with open(self.path, 'w', encoding='utf-8') as trace_file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'otherData': other}, trace_file)
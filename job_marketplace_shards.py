@@ -0,0 +1,759 @@
+import heapq
+import json
+import os
+import sqlite3
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from job_marketplace_db import (APPLICATION_SORTS, ATTACHMENT_GC_GRACE, CHANGE_LOG_RETENTION,
+                                COMPRESSION_DICTIONARY_SIZE, FUNNEL_STAGES, JOB_SORTS, PAGE_SIZE, PASSWORD_HASH_BATCH,
+                                ROLLUP_ALL_JOBS, SAVED_SEARCH_FIELDS, SESSION_LIFETIME, VACUUM_STEP_PAGES,
+                                DatabaseManager, row_sort_key, saved_search_filters)
+from job_marketplace_locations import location_name
+
+# Regional sharding: jobs and their applications are split across SQLite files
+# by the job's location, so writers in different regions take different write
+# locks and no one file holds the whole marketplace. Users stay global in the
+# main database, which is also shard 0 for locations not mapped to a region;
+# each shard keeps copies of the user rows (without passwords) that its
+# foreign keys point at, and of the saved searches, under their ids in the
+# main database, so alerts fire in the shard a job is posted to. Sessions and
+# resume attachments are kept in the main database; attachment GC spares the
+# files any shard's applications refer to. Compression dictionaries are copied
+# to every shard, so any of them can decompress any shard's text. Duplicate
+# detection, scores and funnel rollups work within one shard.
+#
+# When a map is applied, or its regions change, jobs already stored (in shard 0
+# before there was a map, or in the shard an older map named) are moved to the
+# shard their location now maps to; see rebalance.
+#
+# A shard map is a JSON file naming the shard files and the locations each
+# shard takes, with paths relative to the map:
+#
+#   {"shards": {"1": {"db": "eu.db", "archive": "eu_archive.db"}, ...},
+#    "regions": {"London": 1, "Berlin": 1, ...}}
+
+# Job and application ids of shard n start at n << SHARD_ID_SHIFT, so an id
+# alone names its shard
+SHARD_ID_SHIFT = 40
+
+# A change sequence number of the sharded database holds the one of shard n in
+# bits n * SHARD_SEQ_BITS and up. It only grows as the shards' numbers grow, so
+# callers (poll_changes, publish_catalog) compare it as they would one file's.
+SHARD_SEQ_BITS = 40
+
+# Jobs moved per transaction by rebalance
+REBALANCE_CHUNK = 500
+
+
+def shard_of(row_id):
+    return int(row_id) >> SHARD_ID_SHIFT
+
+
+def load_shard_map(path):
+    # (shards, regions) for ShardedDatabaseManager from a shard map file
+    with open(path, encoding='utf-8') as map_file:
+        shard_map = json.load(map_file)
+    directory = os.path.dirname(os.path.abspath(path))
+    shards = {int(number): (os.path.join(directory, files['db']), os.path.join(directory, files['archive']))
+              for number, files in shard_map['shards'].items()}
+    return shards, shard_map.get('regions', {})
+
+
+def open_sharded(db_path, shard_map_path, archive_path='job_marketplace_archive.db', **options):
+    shards, regions = load_shard_map(shard_map_path)
+    return ShardedDatabaseManager(db_path, shards, regions, archive_path, **options)
+
+
+class MergedRows:
+    # Rows of several cursors merged in sort order, read as they are merged.
+    # Keeps their column description, so callers can treat it as one cursor.
+    def __init__(self, cursors, key, reverse=False):
+        self.description = cursors[0].description if cursors else ()
+        self.rows = heapq.merge(*cursors, key=key, reverse=reverse)
+
+    def __iter__(self):
+        return self.rows
+
+
+class ShardedDatabaseManager:
+    # Stands in for DatabaseManager, with the same methods and signatures
+    def __init__(self, db_path, shards, regions, archive_path='job_marketplace_archive.db', **options):
+        # `shards` maps shard numbers (1 and up) to (db_path, archive_path) and
+        # `regions` maps job locations (in any spelling parse_location knows) to
+        # shard numbers. Other options are passed on to each shard's DatabaseManager.
+        self.config = db_path, dict(shards), dict(regions), archive_path, options
+        self.regions = {location_name(location): number for location, number in regions.items()}
+        self.main = DatabaseManager(db_path, archive_path, check_same_thread=False, **options)
+        self.shards = {0: self.main}
+        self.synced_users = {}
+        self.synced_searches = {}
+        for number, (shard_path, shard_archive_path) in sorted(shards.items()):
+            if number < 1:
+                raise ValueError("Shard numbers start at 1; shard 0 is the main database")
+            shard = DatabaseManager(shard_path, shard_archive_path, check_same_thread=False, **options)
+            self.seed_ids(shard, number)
+            shard.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+            self.synced_users[number] = shard.cursor.fetchone()[0]
+            shard.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM saved_searches")
+            self.synced_searches[number] = shard.cursor.fetchone()[0]
+            self.shards[number] = shard
+        for location, number in regions.items():
+            if number not in self.shards:
+                raise ValueError(f"Region {location!r} maps to unknown shard {number}")
+        for number in self.shards:
+            self.sync_saved_searches(number)
+        self.sync_compression_dictionaries(self.main)
+
+        # One worker per shard, and every fan-out gives each shard one task, so a
+        # connection is never used by two threads at once
+        self.pool = ThreadPoolExecutor(max_workers=len(self.shards))
+
+        # The regions last rebalanced for are kept in the main database, so a
+        # reopen with the same map does not scan the shards again
+        self.map_digest = zlib.crc32(json.dumps(sorted(self.regions.items())).encode('utf-8'))
+        self.main.cursor.execute("SELECT value FROM maintenance WHERE name = 'shard_map'")
+        if self.main.cursor.fetchone() != (self.map_digest,):
+            self.rebalance()
+
+    def reopen(self):
+        # Another manager on the same files, with connections of its own, e.g.
+        # for a worker thread. Reads go to the files.
+        db_path, shards, regions, archive_path, options = self.config
+        options = {name: value for name, value in options.items() if name not in ('snapshot', 'max_staleness')}
+        return ShardedDatabaseManager(db_path, shards, regions, archive_path, **options)
+
+    def seed_ids(self, shard, number):
+        # AUTOINCREMENT continues from sqlite_sequence, so raising it to the
+        # shard's base makes every new id carry the shard number
+        base = number << SHARD_ID_SHIFT
+        for table in ('jobs', 'applications', 'notifications'):
+            shard.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+            row = shard.cursor.fetchone()
+            if row is None:
+                shard.cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base))
+            elif row[0] < base:
+                shard.cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (base, table))
+        shard.conn.commit()
+
+    def sync_users(self, number):
+        # Copy users registered since the last sync into a shard before writing
+        # rows that reference them
+        if number == 0:
+            return
+        # Passwords stay in the main database
+        self.main.cursor.execute(
+            "SELECT id, username, '', user_type, name, email, registration_date FROM users WHERE id > ? ORDER BY id",
+            (self.synced_users[number],))
+        users = self.main.cursor.fetchall()
+        if not users:
+            return
+        shard = self.shards[number]
+        shard.cursor.executemany(
+            "INSERT OR IGNORE INTO users (id, username, password, user_type, name, email, registration_date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", users)
+        shard.conn.commit()
+        self.synced_users[number] = users[-1][0]
+
+    def sync_saved_searches(self, number):
+        # Copy saved searches made since the last sync into a shard, under the
+        # same ids. Deletions are made in every shard by delete_saved_search.
+        if number == 0:
+            return
+        self.main.cursor.execute(
+            f"SELECT id, seeker_id, name, {', '.join(SAVED_SEARCH_FIELDS)} FROM saved_searches "
+            f"WHERE id > ? ORDER BY id",
+            (self.synced_searches[number],))
+        searches = self.main.cursor.fetchall()
+        if not searches:
+            return
+        self.sync_users(number)
+        shard = self.shards[number]
+        for search_id, seeker_id, name, *values in searches:
+            shard.save_search(seeker_id, name, saved_search_filters(dict(zip(SAVED_SEARCH_FIELDS, values))),
+                              search_id=search_id)
+        self.synced_searches[number] = searches[-1][0]
+
+    def sync_compression_dictionaries(self, source):
+        # Copy the dictionaries of one shard into all the others. Every shard
+        # trains through train_compression_dictionary, so the ids agree.
+        dictionaries = source.conn.execute(
+            "SELECT id, dictionary, created_date FROM compression_dictionaries").fetchall()
+        for shard in self.shards.values():
+            if shard is source:
+                continue
+            shard.cursor.executemany(
+                "INSERT OR IGNORE INTO compression_dictionaries (id, dictionary, created_date) VALUES (?, ?, ?)",
+                dictionaries)
+            shard.conn.commit()
+            shard.load_compression_dictionaries(reload=True)
+
+    def rebalance(self, chunk_size=REBALANCE_CHUNK):
+        # Move the jobs, hot and archived, whose location maps to another shard
+        # than the one they are in into that shard. Returns the number moved.
+        moved = 0
+        for number, shard in self.shards.items():
+            for schema in ('main', 'archive'):
+                shard.cursor.execute(f"SELECT id, location FROM {schema}.jobs ORDER BY id")
+                targets = defaultdict(list)
+                for job_id, location in shard.cursor.fetchall():
+                    target = self.job_shard(location)
+                    if target != number:
+                        targets[target].append(job_id)
+                for target, job_ids in sorted(targets.items()):
+                    moved += self.move_jobs(number, target, schema, job_ids, chunk_size)
+        self.main.cursor.execute("INSERT OR REPLACE INTO maintenance (name, value) VALUES ('shard_map', ?)",
+                                 (self.map_digest,))
+        self.main.conn.commit()
+        return moved
+
+    def move_jobs(self, number, target, schema, job_ids, chunk_size=REBALANCE_CHUNK):
+        # Move jobs of shard `number`'s hot or archive schema into the same
+        # schema of shard `target`, with their applications, the applications'
+        # scores and status history (funnel rollups follow) and the alerts they
+        # raised. Moved rows get ids of the target shard, as any row there has.
+        # Each chunk is one transaction of the target's connection, with the
+        # source files attached, so a job is never in both shards or neither.
+        source = self.shards[number].paths
+        destination = self.shards[target]
+        cursor = destination.cursor
+        self.sync_users(target)
+        self.sync_saved_searches(target)
+        src = 'source' if schema == 'main' else 'source_archive'
+        cursor.execute("ATTACH DATABASE ? AS source", (source[0],))
+        cursor.execute("ATTACH DATABASE ? AS source_archive", (source[1],))
+        # Old ids to new ones for all the jobs up front, with the originals they
+        # duplicate: deleting an original from the source promotes a duplicate
+        # in its place, so later chunks would no longer see the link
+        cursor.execute("CREATE TEMP TABLE moved_jobs (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL, "
+                       "duplicate_of INTEGER)")
+        cursor.execute("CREATE TEMP TABLE moved_applications (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+        try:
+            try:
+                cursor.executemany("INSERT INTO temp.moved_jobs (old_id, new_id) VALUES (?, ?)",
+                                   zip(job_ids, self.allocate_ids(destination, 'jobs', len(job_ids))))
+                cursor.execute(f"UPDATE temp.moved_jobs SET duplicate_of = "
+                               f"(SELECT duplicate_of FROM {src}.jobs WHERE id = moved_jobs.old_id)")
+                destination.conn.commit()
+                for start in range(0, len(job_ids), chunk_size):
+                    self.move_chunk(destination, src, schema, json.dumps(job_ids[start:start + chunk_size]))
+                    destination.conn.commit()
+            except sqlite3.Error:
+                destination.conn.rollback()
+                raise
+        finally:
+            cursor.execute("DROP TABLE temp.moved_jobs")
+            cursor.execute("DROP TABLE temp.moved_applications")
+            cursor.execute("DETACH DATABASE source")
+            cursor.execute("DETACH DATABASE source_archive")
+        return len(job_ids)
+
+    def move_chunk(self, destination, src, schema, ids):
+        # One transaction of move_jobs; `ids` is a JSON list of the jobs
+        cursor = destination.cursor
+        # Location ids are per shard: the target's rows for the jobs' locations
+        cursor.execute(f"SELECT DISTINCT location FROM {src}.jobs "
+                       f"WHERE id IN (SELECT value FROM json_each(?)) AND location IS NOT NULL", (ids,))
+        for location, in cursor.fetchall():
+            destination.location_id(location)
+        cursor.execute(f"SELECT id FROM {src}.applications WHERE job_id IN (SELECT value FROM json_each(?)) "
+                       f"ORDER BY id", (ids,))
+        application_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany("INSERT INTO temp.moved_applications (old_id, new_id) VALUES (?, ?)",
+                           zip(application_ids, self.allocate_ids(destination, 'applications', len(application_ids))))
+
+        # Duplicates of an original left behind are no longer flagged, as
+        # duplicate detection works within a shard
+        replaced = {'id': 'moved.new_id', 'location_id': 'locations.id',
+                    'duplicate_of': '(SELECT new_id FROM temp.moved_jobs WHERE old_id = moved.duplicate_of)'}
+        if schema == 'main':
+            # Counted again by the trigger as the applications are copied
+            replaced['application_count'] = '0'
+        columns = [name for name, _ in destination.table_columns('jobs', schema)]
+        cursor.execute(f'''
+        INSERT INTO {schema}.jobs ({", ".join(columns)})
+        SELECT {", ".join(replaced.get(name, f"j.{name}") for name in columns)}
+        FROM {src}.jobs j
+        JOIN temp.moved_jobs moved ON moved.old_id = j.id
+        LEFT JOIN main.locations locations ON locations.name = j.location
+        WHERE j.id IN (SELECT value FROM json_each(?))
+        ORDER BY j.id
+        ''', (ids,))
+
+        columns = [name for name, _ in destination.table_columns('applications', schema)]
+        replaced = {'id': 'moved.new_id', 'job_id': 'jobs.new_id'}
+        if schema == 'main':
+            # The status history is copied below, so the trigger's "applied"
+            # events for the copies are skipped
+            cursor.execute("CREATE TEMP TRIGGER moved_application_events BEFORE INSERT ON main.application_events "
+                           "BEGIN SELECT RAISE(IGNORE); END")
+        cursor.execute(f'''
+        INSERT INTO {schema}.applications ({", ".join(columns)})
+        SELECT {", ".join(replaced.get(name, f"a.{name}") for name in columns)}
+        FROM {src}.applications a
+        JOIN temp.moved_applications moved ON moved.old_id = a.id
+        JOIN temp.moved_jobs jobs ON jobs.old_id = a.job_id
+        WHERE a.job_id IN (SELECT value FROM json_each(?))
+        ORDER BY a.id
+        ''', (ids,))
+
+        if schema == 'main':
+            cursor.execute("DROP TRIGGER temp.moved_application_events")
+            cursor.execute('''
+            INSERT INTO main.application_scores (application_id, score, inputs)
+            SELECT moved.new_id, s.score, s.inputs
+            FROM source.application_scores s JOIN temp.moved_applications moved ON moved.old_id = s.application_id
+            ''')
+            for table in ('jobs_minhash', 'jobs_lsh'):
+                columns = [name for name, _ in destination.table_columns(table)]
+                cursor.execute(f'''
+                INSERT INTO main.{table} ({", ".join(columns)})
+                SELECT {", ".join("moved.new_id" if name == 'job_id' else f"t.{name}" for name in columns)}
+                FROM source.{table} t JOIN temp.moved_jobs moved ON moved.old_id = t.job_id
+                WHERE t.job_id IN (SELECT value FROM json_each(?))
+                ''', (ids,))
+            # Alerts of searches deleted meanwhile are dropped
+            cursor.execute('''
+            INSERT OR IGNORE INTO main.notifications (seeker_id, search_id, job_id, created_date, read)
+            SELECT n.seeker_id, n.search_id, moved.new_id, n.created_date, n.read
+            FROM source.notifications n JOIN temp.moved_jobs moved ON moved.old_id = n.job_id
+            WHERE n.job_id IN (SELECT value FROM json_each(?)) AND n.search_id IN (SELECT id FROM main.saved_searches)
+            ORDER BY n.id
+            ''', (ids,))
+
+        # The history of hot and archived jobs alike is in the main schema. It
+        # is copied in order, so the trigger rebuilds the jobs' rollups in the
+        # target; the source's are taken out of its all-jobs totals. The
+        # source keeps its events, as the log is append-only.
+        cursor.execute('''
+        INSERT INTO main.application_events
+            (application_id, job_id, provider_id, from_status, to_status, applied_date, event_date)
+        SELECT COALESCE(applications.new_id, e.application_id), jobs.new_id, e.provider_id, e.from_status,
+               e.to_status, e.applied_date, e.event_date
+        FROM source.application_events e
+        JOIN temp.moved_jobs jobs ON jobs.old_id = e.job_id
+        LEFT JOIN temp.moved_applications applications ON applications.old_id = e.application_id
+        WHERE e.job_id IN (SELECT value FROM json_each(?))
+        ORDER BY e.id
+        ''', (ids,))
+        cursor.execute(f'''
+        UPDATE source.application_rollups AS total
+        SET reached = total.reached - moved.reached, seconds = total.seconds - moved.seconds
+        FROM (
+            SELECT provider_id, day, stage, SUM(reached) AS reached, SUM(seconds) AS seconds
+            FROM source.application_rollups WHERE job_id IN (SELECT value FROM json_each(?))
+            GROUP BY provider_id, day, stage
+        ) AS moved
+        WHERE total.provider_id = moved.provider_id AND total.job_id = {ROLLUP_ALL_JOBS}
+          AND total.day = moved.day AND total.stage = moved.stage
+        ''', (ids,))
+        cursor.execute("DELETE FROM source.application_rollups WHERE job_id IN (SELECT value FROM json_each(?))",
+                       (ids,))
+
+        # Hot jobs take their applications, scores, signatures and alerts along
+        # (ON DELETE CASCADE); the archive has no constraints
+        if schema == 'archive':
+            cursor.execute("DELETE FROM source_archive.applications WHERE job_id IN (SELECT value FROM json_each(?))",
+                           (ids,))
+        cursor.execute(f"DELETE FROM {src}.jobs WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+
+    def allocate_ids(self, shard, table, count):
+        # `count` ids of a shard's AUTOINCREMENT table, reserved as inserts
+        # would take them. Archived rows keep the ids they had in the hot
+        # table, so their moved copies take ids from there too.
+        shard.cursor.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, 0 "
+                             "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)", (table, table))
+        shard.cursor.execute("UPDATE sqlite_sequence SET seq = seq + ? WHERE name = ? RETURNING seq", (count, table))
+        last = shard.cursor.fetchone()[0]
+        return range(last - count + 1, last + 1)
+
+    def job_shard(self, location):
+        # Shard a new job with this location goes to
+        return self.regions.get(location_name(location), 0)
+
+    def job_shards(self, filters):
+        # Shards a jobs query reads: those of the `ids`, the one a location maps
+        # to, or all of them. Location queries read shard 0 as well: a client
+        # opened without the map, or before it was applied, posts there, and its
+        # jobs stay there until the next rebalance.
+        filters = filters or {}
+        if filters.get('ids') is not None:
+            return {shard_of(job_id) for job_id in filters['ids']} & set(self.shards)
+        location = filters.get('location')
+        if location and location != "All":
+            return {self.job_shard(location), 0}
+        return set(self.shards)
+
+    def application_shards(self, filters):
+        # Applications live in the shard of their job
+        filters = filters or {}
+        if filters.get('ids') is not None:
+            return {shard_of(application_id) for application_id in filters['ids']} & set(self.shards)
+        if filters.get('job_id'):
+            return {shard_of(filters['job_id'])} & set(self.shards)
+        return set(self.shards)
+
+    def by_shard(self, row_ids):
+        # {shard number: ids} for ids of jobs or applications, leaving out ids of
+        # shards that do not exist
+        grouped = defaultdict(list)
+        for row_id in row_ids:
+            if shard_of(row_id) in self.shards:
+                grouped[shard_of(row_id)].append(row_id)
+        return grouped
+
+    def fan_out(self, numbers, method, *args):
+        # Call a DatabaseManager method on each of the shards in parallel; SQLite
+        # releases the GIL while it steps through a query. Results in shard order.
+        numbers = sorted(numbers)
+        if len(numbers) == 1:
+            return [getattr(self.shards[numbers[0]], method)(*args)]
+        futures = [self.pool.submit(getattr(self.shards[number], method), *args) for number in numbers]
+        return [future.result() for future in futures]
+
+    def merge(self, results, sorts, sort, descending):
+        # k-way merge of per-shard results, each already in sort_order
+        return heapq.merge(*results, key=lambda row: row_sort_key(sorts, sort, row), reverse=descending)
+
+    def merge_pages(self, pages, sorts, sort, descending, limit):
+        # Every shard's page after the same cursor, merged: the first `limit` rows
+        # are the next page overall. The cursor is valid on every shard.
+        rows = list(self.merge([shard_rows for shard_rows, _ in pages], sorts, sort, descending))
+        more = len(rows) > limit or any(after is not None for _, after in pages)
+        rows = rows[:limit]
+        if not (more and rows):
+            return rows, None
+        return rows, (rows[-1][sorts[sort][1]], rows[-1][0])
+
+    def sweep_expired_jobs(self, chunk_size=200, max_chunks=None, today=None):
+        return sum(self.fan_out(self.shards, 'sweep_expired_jobs', chunk_size, max_chunks, today))
+
+    def find_duplicate_job(self, title, company, description):
+        # The best match in any shard
+        matches = [match for match in self.fan_out(self.shards, 'find_duplicate_job', title, company, description)
+                   if match]
+        return max(matches, key=lambda match: match[1], default=None)
+
+    def dedupe_jobs(self, chunk_size=500, merge=False):
+        # Each shard is deduplicated on its own
+        results = self.fan_out(self.shards, 'dedupe_jobs', chunk_size, merge)
+        return sum(flagged for flagged, _ in results), sum(deleted for _, deleted in results)
+
+    def latest_change(self):
+        return sum(shard.latest_change() << (number * SHARD_SEQ_BITS) for number, shard in self.shards.items())
+
+    def shard_seq(self, seq, number):
+        return (seq >> (number * SHARD_SEQ_BITS)) & ((1 << SHARD_SEQ_BITS) - 1)
+
+    def changes_pending(self):
+        # Every shard is asked, so each one's state moves on
+        return any([shard.changes_pending() for shard in self.shards.values()])
+
+    def changes_since(self, seq):
+        # As DatabaseManager.changes_since, over all shards; changed is None when
+        # any shard's log has been pruned past its part of `seq`
+        latest = 0
+        changed = {'jobs': set(), 'applications': set()}
+        for number, shard in self.shards.items():
+            shard_latest, shard_changed = shard.changes_since(self.shard_seq(seq, number))
+            latest += shard_latest << (number * SHARD_SEQ_BITS)
+            if shard_changed is None or changed is None:
+                changed = None
+                continue
+            changed['jobs'] |= shard_changed['jobs']
+            changed['applications'] |= shard_changed['applications']
+        return latest, changed
+
+    def job_changes_since(self, seq):
+        latest = 0
+        job_ids = set()
+        for number, shard in self.shards.items():
+            shard_latest, shard_job_ids = shard.job_changes_since(self.shard_seq(seq, number))
+            latest += shard_latest << (number * SHARD_SEQ_BITS)
+            job_ids = None if shard_job_ids is None or job_ids is None else job_ids | shard_job_ids
+        return latest, job_ids
+
+    def prune_change_log(self, keep=CHANGE_LOG_RETENTION):
+        return sum(self.fan_out(self.shards, 'prune_change_log', keep))
+
+    def storage_report(self, schema='main', fragmentation=False):
+        # {shard number: DatabaseManager.storage_report}
+        return dict(zip(sorted(self.shards), self.fan_out(self.shards, 'storage_report', schema, fragmentation)))
+
+    def run_maintenance(self, vacuum_pages=VACUUM_STEP_PAGES, analyze=False, fragmentation=False):
+        # One round on every shard. 'shards' holds each shard's result; 'vacuumed'
+        # and 'pending' are totals over the shards, by schema for 'vacuumed'.
+        results = dict(zip(sorted(self.shards),
+                           self.fan_out(self.shards, 'run_maintenance', vacuum_pages, analyze, fragmentation)))
+        vacuumed = Counter()
+        for result in results.values():
+            vacuumed.update(result['vacuumed'])
+        return {'shards': results, 'vacuumed': dict(vacuumed),
+                'pending': sum(result['pending'] for result in results.values())}
+
+    def convert_auto_vacuum(self):
+        # {shard number: schemas converted}
+        return dict(zip(sorted(self.shards), self.fan_out(self.shards, 'convert_auto_vacuum')))
+
+    def database_sizes(self):
+        sizes = Counter()
+        for shard_sizes in self.fan_out(self.shards, 'database_sizes'):
+            sizes.update(shard_sizes)
+        return dict(sizes)
+
+    def vacuum(self):
+        self.fan_out(self.shards, 'vacuum')
+
+    def get_application_events(self, application_id):
+        shard = self.shards.get(shard_of(application_id))
+        return shard.get_application_events(application_id) if shard is not None else []
+
+    def get_application_funnel(self, provider_id, job_id=None):
+        numbers = {shard_of(job_id)} & set(self.shards) if job_id else self.shards
+        funnel = {stage: (0, None) for stage in FUNNEL_STAGES}
+        for shard_funnel in self.fan_out(numbers, 'get_application_funnel', provider_id, job_id):
+            for stage, (reached, seconds) in shard_funnel.items():
+                total, average = funnel[stage]
+                if reached:
+                    # Averages weighted by the applications behind them
+                    seconds_total = (average or 0) * total + seconds * reached
+                    funnel[stage] = (total + reached, seconds_total / (total + reached))
+        return funnel
+
+    def get_application_activity(self, provider_id, start, end=None, job_id=None):
+        numbers = {shard_of(job_id)} & set(self.shards) if job_id else self.shards
+        activity = defaultdict(Counter)
+        for shard_activity in self.fan_out(numbers, 'get_application_activity', provider_id, start, end, job_id):
+            for day, counts in shard_activity:
+                activity[day].update(counts)
+        return [(day, dict(counts)) for day, counts in sorted(activity.items())]
+
+    # Saved searches are made in the main database and copied into the shards,
+    # where the alerts for new jobs are raised
+    def save_search(self, seeker_id, name, filters, search_id=None):
+        search_id = self.main.save_search(seeker_id, name, filters, search_id)
+        for number in self.shards:
+            self.sync_saved_searches(number)
+        return search_id
+
+    def delete_saved_search(self, search_id, seeker_id):
+        return any(self.fan_out(self.shards, 'delete_saved_search', search_id, seeker_id))
+
+    def get_saved_searches(self, seeker_id):
+        return self.main.get_saved_searches(seeker_id)
+
+    def get_notifications(self, seeker_id, unread_only=False, limit=50):
+        # Newest first across the shards
+        notifications = [notification for shard_notifications in
+                         self.fan_out(self.shards, 'get_notifications', seeker_id, unread_only, limit)
+                         for notification in shard_notifications]
+        notifications.sort(key=lambda notification: (notification[5], notification[0]), reverse=True)
+        return notifications[:limit]
+
+    def mark_notifications_read(self, seeker_id):
+        return sum(self.fan_out(self.shards, 'mark_notifications_read', seeker_id))
+
+    def load_compression_dictionaries(self, reload=False):
+        return self.main.load_compression_dictionaries(reload)
+
+    def compress_text(self, text):
+        return self.main.compress_text(text)
+
+    def decompress_text(self, value):
+        return self.main.decompress_text(value)
+
+    def train_compression_dictionary(self, sample_size=500, size=COMPRESSION_DICTIONARY_SIZE):
+        # Trained on the shard with the most jobs, then copied to the others
+        counts = [shard.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] for shard in self.shards.values()]
+        source = list(self.shards.values())[counts.index(max(counts))]
+        dictionary_id = source.train_compression_dictionary(sample_size, size)
+        if dictionary_id is not None:
+            self.sync_compression_dictionaries(source)
+        return dictionary_id
+
+    def compress_text_columns(self, chunk_size=500, schemas=('main', 'archive')):
+        return sum(self.fan_out(self.shards, 'compress_text_columns', chunk_size, schemas))
+
+    # Attachments are stored through the main database
+    def store_attachment(self, source):
+        return self.main.store_attachment(source)
+
+    def open_attachment(self, digest):
+        return self.main.open_attachment(digest)
+
+    def gc_attachments(self, grace=ATTACHMENT_GC_GRACE):
+        # Files the other shards' applications refer to are kept. An application
+        # made after they are listed refers to a file stored (or stored again)
+        # within the grace period, which is kept as well.
+        referenced = set()
+        for number, shard in self.shards.items():
+            if number:
+                referenced |= shard.resume_hashes()
+        return self.main.gc_attachments(grace, referenced)
+
+    def register_user(self, username, password, user_type, name, email):
+        return self.main.register_user(username, password, user_type, name, email)
+
+    def add_user(self, username, password_hash, user_type, name, email):
+        return self.main.add_user(username, password_hash, user_type, name, email)
+
+    def get_login(self, username):
+        return self.main.get_login(username)
+
+    def set_password_hash(self, user_id, password_hash):
+        self.main.set_password_hash(user_id, password_hash)
+
+    def authenticate_user(self, username, password):
+        return self.main.authenticate_user(username, password)
+
+    # Sessions live with the users, in the main database
+    def create_session(self, user_id, lifetime=SESSION_LIFETIME):
+        return self.main.create_session(user_id, lifetime)
+
+    def authenticate_session(self, token):
+        return self.main.authenticate_session(token)
+
+    def end_session(self, token):
+        return self.main.end_session(token)
+
+    def prune_sessions(self):
+        return self.main.prune_sessions()
+
+    def hash_plaintext_passwords(self, limit=PASSWORD_HASH_BATCH):
+        return self.main.hash_plaintext_passwords(limit)
+
+    def post_job(self, provider_id, title, company, salary, job_type, description, location=None, category=None,
+                 deadline=None, duplicates='flag'):
+        number = self.job_shard(location)
+        self.sync_users(number)
+        return self.shards[number].post_job(provider_id, title, company, salary, job_type, description, location,
+                                            category, deadline, duplicates)
+
+    def import_jobs_feed(self, feed_path, provider_id):
+        with open(feed_path, encoding='utf-8') as feed_file:
+            feed = json.load(feed_file)
+        return self.import_jobs(feed.values(), provider_id)
+
+    def import_jobs(self, jobs, provider_id, duplicates='flag'):
+        # The jobs are grouped by shard and each group imported in one
+        # transaction of its shard, so the import is atomic per shard only
+        by_shard = defaultdict(list)
+        for job in jobs:
+            by_shard[self.job_shard(job.get('location'))].append(job)
+        inserted = 0
+        for number, shard_jobs in sorted(by_shard.items()):
+            self.sync_users(number)
+            inserted += self.shards[number].import_jobs(shard_jobs, provider_id, duplicates)
+        return inserted
+
+    def get_jobs(self, filters=None, sort='posted_date', descending=True):
+        results = self.fan_out(self.job_shards(filters), 'get_jobs', filters, sort, descending)
+        return list(self.merge(results, JOB_SORTS, sort, descending))
+
+    def iter_jobs(self, filters=None, sort='posted_date', descending=True):
+        # The shards' cursors, merged as they are read
+        cursors = self.fan_out(self.job_shards(filters), 'iter_jobs', filters, sort, descending)
+        return MergedRows(cursors, lambda row: row_sort_key(JOB_SORTS, sort, row), descending)
+
+    def iter_catalog_jobs(self, job_ids=None):
+        numbers = set(self.by_shard(job_ids)) if job_ids is not None else self.shards
+        cursors = self.fan_out(numbers, 'iter_catalog_jobs', job_ids)
+        return MergedRows(cursors, lambda row: row[0])
+
+    def get_jobs_page(self, filters=None, sort='posted_date', descending=True, after=None, limit=PAGE_SIZE):
+        pages = self.fan_out(self.job_shards(filters), 'get_jobs_page', filters, sort, descending, after, limit)
+        return self.merge_pages(pages, JOB_SORTS, sort, descending, limit)
+
+    def search_jobs(self, filters=None, sort='posted_date', descending=True, limit=PAGE_SIZE):
+        # Always reads every shard: the location facet counts other locations
+        results = self.fan_out(self.shards, 'search_jobs', filters, sort, descending, limit)
+        jobs, after = self.merge_pages([(jobs, after) for jobs, after, _ in results],
+                                       JOB_SORTS, sort, descending, limit)
+        facets = defaultdict(Counter)
+        for _, _, shard_facets in results:
+            for field, counts in shard_facets.items():
+                facets[field].update(counts)
+        return jobs, after, dict(facets)
+
+    def get_job_by_id(self, job_id, include_archived=False):
+        shard = self.shards.get(shard_of(job_id))
+        if shard is None:
+            return None
+        return shard.get_job_by_id(job_id, include_archived)
+
+    def get_jobs_by_ids(self, job_ids, include_archived=False):
+        jobs = {}
+        for number, ids in self.by_shard(job_ids).items():
+            jobs.update(self.shards[number].get_jobs_by_ids(ids, include_archived))
+        return jobs
+
+    def delete_job(self, job_id, provider_id):
+        return self.delete_jobs([job_id], provider_id) == 1
+
+    def delete_jobs(self, job_ids, provider_id):
+        return sum(self.shards[number].delete_jobs(ids, provider_id)
+                   for number, ids in self.by_shard(job_ids).items())
+
+    def apply_for_job(self, job_id, seeker_id, cover_letter, resume_hash=None, resume_name=None):
+        number = shard_of(job_id)
+        if number not in self.shards:
+            return False, "This job is no longer available"
+        self.sync_users(number)
+        return self.shards[number].apply_for_job(job_id, seeker_id, cover_letter, resume_hash, resume_name)
+
+    def apply_for_jobs(self, job_ids, seeker_id, cover_letter, resume_hash=None, resume_name=None):
+        # One transaction per shard
+        job_ids = [int(job_id) for job_id in job_ids]
+        results = {job_id: (False, "This job is no longer available") for job_id in job_ids}
+        for number, ids in self.by_shard(job_ids).items():
+            self.sync_users(number)
+            results.update(self.shards[number].apply_for_jobs(ids, seeker_id, cover_letter, resume_hash,
+                                                              resume_name))
+        return results
+
+    def score_applications(self, job_id, weights=None):
+        shard = self.shards.get(shard_of(job_id))
+        return shard.score_applications(job_id, weights) if shard is not None else {}
+
+    def get_applications(self, filters=None, sort='date', descending=True):
+        results = self.fan_out(self.application_shards(filters), 'get_applications', filters, sort, descending)
+        return list(self.merge(results, APPLICATION_SORTS, sort, descending))
+
+    def iter_applications(self, filters=None, sort='date', descending=True):
+        cursors = self.fan_out(self.application_shards(filters), 'iter_applications', filters, sort, descending)
+        return MergedRows(cursors, lambda row: row_sort_key(APPLICATION_SORTS, sort, row), descending)
+
+    def get_applications_page(self, filters=None, sort='date', descending=True, after=None, limit=PAGE_SIZE):
+        pages = self.fan_out(self.application_shards(filters), 'get_applications_page',
+                             filters, sort, descending, after, limit)
+        return self.merge_pages(pages, APPLICATION_SORTS, sort, descending, limit)
+
+    def update_application_status(self, application_id, new_status):
+        shard = self.shards.get(shard_of(application_id))
+        return shard is not None and shard.update_application_status(application_id, new_status)
+
+    def update_application_statuses(self, application_ids, new_status):
+        return sum(self.shards[number].update_application_statuses(ids, new_status)
+                   for number, ids in self.by_shard(application_ids).items())
+
+    def get_user_applications(self, user_id):
+        # Newest first, as each shard returns them
+        results = self.fan_out(self.shards, 'get_user_applications', user_id)
+        return list(heapq.merge(*results, key=lambda application: application[3], reverse=True))
+
+    def get_dashboard_stats(self, user_id, user_type):
+        # Counts summed over the shards
+        stats = {}
+        for shard_stats in self.fan_out(self.shards, 'get_dashboard_stats', user_id, user_type):
+            for name, value in shard_stats.items():
+                if isinstance(value, dict):
+                    stats[name] = dict(Counter(stats.get(name, {})) + Counter(value))
+                else:
+                    stats[name] = stats.get(name, 0) + value
+        return stats
+
+    def close(self):
+        self.pool.shutdown()
+        for shard in self.shards.values():
+            shard.close()